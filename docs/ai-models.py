@@ -15,6 +15,30 @@ Le Log Analyzer supporte tous les modèles Mistral AI. Voici un guide pour chois
 | **open-mixtral-8x7b** | ⭐⭐⭐ | 💰 | 🚀 | Open source économique |
 | **open-mistral-7b** | ⭐⭐ | Gratuit | 🚀🚀 | Développement/tests |
 
+Ce tableau est indicatif : mesurez sur vos propres logs avant de choisir `ai_model`.
+
+## 📏 Mesurer plutôt que supposer
+
+Le banc `src/model_benchmark.py` analyse un corpus de logs étiquetés
+(`benchmarks/corpus`, score de gravité attendu dans `labels.json`) avec
+plusieurs modèles en parallèle et produit un tableau comparatif : latence
+p50/p90, tokens, coût, taux d'échec des appels, justesse de la tranche de
+gravité et de la décision d'alerte (score ≥ 7). La justesse et les latences
+ne portent que sur les appels réussis : un modèle peu fiable apparaît dans
+le taux d'échec, pas dans la qualité de ses analyses. Le modèle `heuristic`
+(moteur local) sert de référence.
+
+```bash
+./scripts/compare-models.sh --models mistral-large-latest,mistral-small-latest,heuristic \
+    --repeat 3 --json /tmp/models.json --csv /tmp/models.csv
+
+# Réévaluer les réponses enregistrées (nouvelles étiquettes) sans appel API
+./scripts/compare-models.sh --replay /tmp/models.json
+```
+
+Ajoutez vos propres cas (logs réels anonymisés) au corpus pour que la
+comparaison reflète votre parc.
+
 ## 🎯 Recommandations par cas d'usage
 
 ### Production - Haute qualité
@@ -0,0 +1,380 @@
+"""
+Module d'analyse en colonnes des logs d'accès web (format common/combined) :
+agrégats statistiques et lignes atypiques transmis à l'IA à la place du texte brut
+
+Avec numpy (optionnel), les agrégats sont des opérations vectorisées sur les
+colonnes (vues sans copie des tableaux array, masques, bincount) ; sans
+numpy, ils sont calculés par Counter, ligne par ligne.
+"""
+import re
+import sys
+import math
+import time
+import datetime
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# host ident user [date] "méthode chemin protocole" statut octets ["referer" "user-agent"]
+_ACCESS_LINE = re.compile(
+    r'(\S+) \S+ (\S+) \[([^\]]+)\] "(\S+) (\S+)[^"]*" (\d{3}) (\d+|-)(?: "([^"]*)" "([^"]*)")?'
+)
+
+_MONTHS = {m: i for i, m in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), 1)}
+
+
+def _minute_of(stamp, cache):
+    """Convertit 'dd/Mon/yyyy:HH:MM...' en minute depuis l'epoch (mémoïsé par minute)"""
+    key = stamp[:17]
+    minute = cache.get(key)
+    if minute is None:
+        try:
+            moment = datetime.datetime(int(key[7:11]), _MONTHS[key[3:6]], int(key[:2]),
+                                       int(key[12:14]), int(key[15:17]))
+            minute = int(moment.timestamp()) // 60
+        except (KeyError, ValueError):
+            minute = 0
+        cache[key] = minute
+    return minute
+
+
+class _Interner:
+    """Code entier unique par valeur (colonnes catégorielles)"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AccessLogColumns:
+    """Colonnes d'un lot de lignes d'accès : IP, chemin, méthode, statut, octets, minute"""
+
+    def __init__(self):
+        self.ips = _Interner()
+        self.paths = _Interner()
+        self.methods = _Interner()
+        self.agents = _Interner()
+        self.ip = array('I')
+        self.path = array('I')
+        self.method = array('B')
+        self.agent = array('I')
+        self.status = array('H')
+        self.size = array('Q')
+        self.minute = array('Q')
+        self.line_index = array('I')
+        self.unparsed = 0
+        self.total = 0
+
+    @classmethod
+    def parse(cls, lines):
+        """
+        Analyse un lot de lignes en colonnes
+
+        Args:
+            lines (list): Lignes de log
+
+        Returns:
+            AccessLogColumns: Colonnes (les lignes non reconnues sont seulement comptées)
+        """
+        columns = cls()
+        match = _ACCESS_LINE.match
+        ip_code, path_code = columns.ips.code, columns.paths.code
+        method_code, agent_code = columns.methods.code, columns.agents.code
+        ip, path, method, agent = columns.ip.append, columns.path.append, columns.method.append, columns.agent.append
+        status, size, minute, index = (columns.status.append, columns.size.append,
+                                       columns.minute.append, columns.line_index.append)
+        minutes = {}
+
+        for position, line in enumerate(lines):
+            fields = match(line)
+            if fields is None:
+                columns.unparsed += 1
+                continue
+            host, _, stamp, verb, target, code, length, _, user_agent = fields.groups()
+            query = target.find('?')
+            ip(ip_code(host))
+            path(path_code(target if query < 0 else target[:query]))
+            method(min(255, method_code(verb)))
+            agent(agent_code(user_agent or '-'))
+            status(int(code))
+            size(int(length) if length != '-' else 0)
+            minute(_minute_of(stamp, minutes))
+            index(position)
+
+        columns.total = len(lines)
+        return columns
+
+    @property
+    def parsed(self):
+        """Nombre de lignes reconnues"""
+        return len(self.status)
+
+    @property
+    def parse_ratio(self):
+        """Proportion de lignes reconnues"""
+        return self.parsed / self.total if self.total else 0.0
+
+
+def _vector(column):
+    """Vue numpy (sans copie) d'une colonne array"""
+    if not len(column):
+        return np.zeros(0, dtype=column.typecode)
+    return np.frombuffer(column, dtype=column.typecode)
+
+
+def _counts(values):
+    """
+    Compte les valeurs d'une colonne (bincount décalé au minimum pour un vecteur numpy)
+
+    Returns:
+        Counter: {valeur: occurrences}
+    """
+    if np is None or not isinstance(values, np.ndarray):
+        return Counter(values)
+    if not len(values):
+        return Counter()
+    base = int(values.min())
+    counts = np.bincount((values - base).astype(np.intp))
+    present = np.flatnonzero(counts)
+    return Counter(dict(zip((present + base).tolist(), counts[present].tolist())))
+
+
+def aggregate(columns, top_k=10):
+    """
+    Calcule les agrégats d'un lot en colonnes
+
+    Args:
+        columns (AccessLogColumns): Colonnes du lot
+        top_k (int): Taille des classements
+
+    Returns:
+        dict: Agrégats (statuts, top IP, ratios d'erreurs, pics, chemins rares, ...)
+    """
+    if np is not None:
+        ips, paths, statuses, minutes = map(_vector, (columns.ip, columns.path, columns.status, columns.minute))
+        errors = _counts(ips[statuses >= 400])
+        # Chemins 404 distincts par IP : couples (IP, chemin) uniques codés sur 64 bits
+        not_found = statuses == 404
+        pairs = np.unique((ips[not_found].astype(np.uint64) << np.uint64(32)) | paths[not_found])
+        not_found_paths = _counts(pairs >> np.uint64(32))
+        total_bytes = int(_vector(columns.size).sum())
+    else:
+        ips, paths, statuses, minutes = columns.ip, columns.path, columns.status, columns.minute
+        errors = Counter(ip for ip, code in zip(ips, statuses) if code >= 400)
+        distinct = {}
+        for ip, path, code in zip(ips, paths, statuses):
+            if code == 404:
+                distinct.setdefault(ip, set()).add(path)
+        not_found_paths = {ip: len(paths) for ip, paths in distinct.items()}
+        total_bytes = sum(columns.size)
+    status_counts, ip_counts, path_counts, per_minute = map(_counts, (statuses, ips, paths, minutes))
+
+    # Ratio d'erreurs par IP (au moins 5 requêtes pour être significatif)
+    error_ratios = sorted(
+        ((errors[ip] / count, count, ip) for ip, count in ip_counts.items() if count >= 5 and errors[ip]),
+        reverse=True
+    )[:top_k]
+
+    # Pics de débit : minutes au-delà de moyenne + 3 écarts-types
+    spikes = []
+    if len(per_minute) >= 3:
+        counts = list(per_minute.values())
+        mean = sum(counts) / len(counts)
+        std = math.sqrt(sum((count - mean) ** 2 for count in counts) / len(counts))
+        spikes = sorted(
+            (minute, count) for minute, count in per_minute.items()
+            if count > mean + 3 * std and count >= 2 * mean
+        )[:top_k]
+
+    return {
+        'requests': columns.parsed,
+        'unparsed': columns.unparsed,
+        'bytes': total_bytes,
+        'minutes': len(per_minute),
+        'status': dict(sorted(status_counts.items())),
+        'top_ips': [(columns.ips.values[ip], count) for ip, count in ip_counts.most_common(top_k)],
+        'top_paths': [(columns.paths.values[path], count) for path, count in path_counts.most_common(top_k)],
+        'error_ratios': [(columns.ips.values[ip], ratio, count) for ratio, count, ip in error_ratios],
+        'scanners': [
+            (columns.ips.values[ip], count) for count, ip in sorted(
+                ((count, ip) for ip, count in not_found_paths.items() if count >= 10),
+                key=lambda item: (-item[0], item[1])
+            )[:top_k]
+        ],
+        'rare_paths': [columns.paths.values[path] for path, count in path_counts.items() if count == 1],
+        'spikes': [(datetime.datetime.fromtimestamp(minute * 60).strftime('%H:%M'), count)
+                   for minute, count in spikes],
+        'agents': len(columns.agents.values),
+    }
+
+
+def outlier_lines(lines, columns, stats, max_lines=20):
+    """
+    Sélectionne quelques lignes représentatives des anomalies (5xx, IP
+    suspectes, chemins rares)
+
+    Returns:
+        list: Lignes d'origine sélectionnées, dans l'ordre du lot
+    """
+    suspects = {columns.ips.codes[ip] for ip, ratio, _ in stats['error_ratios'] if ratio >= 0.5}
+    suspects.update(columns.ips.codes[ip] for ip, _ in stats['scanners'])
+    rare = {columns.paths.codes[path] for path in stats['rare_paths']}
+
+    selected = []
+    seen_keys = set()
+    for position, ip, path, code in zip(columns.line_index, columns.ip, columns.path, columns.status):
+        if code >= 500 or ip in suspects or (path in rare and code >= 400):
+            # Une ligne par (IP, chemin) suffit à illustrer l'anomalie
+            key = (ip, path)
+            if key in seen_keys:
+                continue
+            seen_keys.add(key)
+            selected.append(position)
+            if len(selected) >= max_lines:
+                break
+    return [lines[position] for position in selected]
+
+
+def format_summary(stats, outliers, source=None):
+    """
+    Returns:
+        list: Résumé statistique et lignes atypiques, prêts à être transmis à l'IA
+    """
+    def ranking(items):
+        return ", ".join(f"{value} ({count})" for value, count in items) or "aucun"
+
+    total = stats['requests'] or 1
+    errors = sum(count for code, count in stats['status'].items() if code >= 400)
+    summary = [
+        f"Résumé statistique des logs d'accès web{f' de {source}' if source else ''} "
+        f"({stats['requests']} requêtes sur {stats['minutes']} minutes, "
+        f"{stats['unparsed']} lignes non reconnues) :",
+        "Statuts : " + ", ".join(f"{code}={count}" for code, count in stats['status'].items()),
+        f"Taux d'erreurs (>= 400) : {errors / total:.1%}, volume : {stats['bytes']} octets, "
+        f"{stats['agents']} user-agents distincts",
+        "Top IP : " + ranking(stats['top_ips']),
+        "Top chemins : " + ranking(stats['top_paths']),
+        "IP au ratio d'erreurs élevé : " + (", ".join(
+            f"{ip} ({ratio:.0%} de {count})" for ip, ratio, count in stats['error_ratios']) or "aucune"),
+        "IP balayant des chemins inexistants (404 distincts) : " + ranking(stats['scanners']),
+        "Pics de débit (requêtes/minute) : " + ranking(stats['spikes']),
+        f"Chemins rares (vus une fois) : {len(stats['rare_paths'])}, ex. "
+        + (", ".join(stats['rare_paths'][:10]) or "aucun"),
+    ]
+    if outliers:
+        summary.append("Lignes atypiques :")
+        summary.extend(line.rstrip('\n') for line in outliers)
+    return [line + "\n" for line in summary]
+
+
+class AccessLogSummarizer:
+    """Remplace les lots de logs d'accès web par leur résumé statistique"""
+
+    def __init__(self, top_k=10, max_outliers=20, min_ratio=0.8, min_lines=50):
+        """
+        Args:
+            top_k (int): Taille des classements
+            max_outliers (int): Nombre maximum de lignes atypiques transmises
+            min_ratio (float): Proportion minimale de lignes reconnues pour résumer le lot
+            min_lines (int): Taille minimale d'un lot résumé (en dessous, texte brut)
+        """
+        self.top_k = top_k
+        self.max_outliers = max_outliers
+        self.min_ratio = min_ratio
+        self.min_lines = min_lines
+        self.stats = {'batches': 0, 'lines_in': 0, 'lines_out': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le résumeur à partir de la configuration"""
+        return cls(
+            top_k=config.get('access_log_top_k', 10),
+            max_outliers=config.get('access_log_outliers', 20),
+            min_lines=config.get('access_log_min_lines', 50)
+        )
+
+    def summarize(self, source, lines):
+        """
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            lines (list): Lignes du lot
+
+        Returns:
+            list: Résumé et lignes atypiques, ou les lignes d'origine si le lot
+                n'est pas un log d'accès
+        """
+        if len(lines) < self.min_lines:
+            return lines
+        columns = AccessLogColumns.parse(lines)
+        if columns.parse_ratio < self.min_ratio:
+            return lines
+
+        stats = aggregate(columns, self.top_k)
+        summary = format_summary(stats, outlier_lines(lines, columns, stats, self.max_outliers), source)
+        self.stats['batches'] += 1
+        self.stats['lines_in'] += len(lines)
+        self.stats['lines_out'] += len(summary)
+        print(f"📈 {source} : {len(lines)} lignes d'accès résumées en {len(summary)} lignes")
+        return summary
+
+    def report_section(self):
+        """
+        Returns:
+            str: Volume de lignes remplacées par les résumés pour le rapport quotidien
+        """
+        return (
+            "📈 RÉSUMÉS DES LOGS D'ACCÈS WEB\n"
+            f"  Lots résumés : {self.stats['batches']}, "
+            f"{self.stats['lines_in']} lignes remplacées par {self.stats['lines_out']} lignes de résumé"
+        )
+
+
+def benchmark(lines, repeat=3):
+    """
+    Mesure le débit d'analyse en colonnes et d'agrégation
+
+    Args:
+        lines (list): Lignes de log d'accès
+        repeat (int): Nombre de mesures (la meilleure est retenue)
+
+    Returns:
+        dict: Débits en lignes par seconde
+    """
+    best_parse = best_total = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        columns = AccessLogColumns.parse(lines)
+        parsed = time.perf_counter()
+        aggregate(columns)
+        finished = time.perf_counter()
+        best_parse = min(best_parse, parsed - started)
+        best_total = min(best_total, finished - started)
+    return {
+        'lines': len(lines),
+        'parse_lines_per_second': round(len(lines) / best_parse) if best_parse else None,
+        'total_lines_per_second': round(len(lines) / best_total) if best_total else None,
+    }
+
+
+if __name__ == "__main__":
+    """Mesure du débit sur un fichier de log d'accès : python3 access_log_stats.py access.log"""
+    if len(sys.argv) != 2:
+        print("Usage : python3 access_log_stats.py <access.log>")
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding='utf-8', errors='ignore') as file:
+        sample = file.readlines()
+    result = benchmark(sample)
+    print(f"📈 {result['lines']} lignes : analyse {result['parse_lines_per_second']} lignes/s, "
+          f"analyse + agrégats {result['total_lines_per_second']} lignes/s")
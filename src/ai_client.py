@@ -0,0 +1,59 @@
+"""
+Module d'appel à l'API Mistral AI avec comptabilisation des tokens
+"""
+from mistralai import Mistral
+
+from ai_dispatcher import estimate_tokens
+
+
+def chat_complete(messages, config, log_file=None, budget=None, dispatcher=None, **options):
+    """
+    Envoie une requête de complétion à l'API et enregistre la consommation
+
+    Args:
+        messages (list): Messages de la conversation (role/content)
+        config (dict): Configuration contenant les paramètres IA
+        log_file (str): Fichier de log à l'origine de l'appel (comptabilité)
+        budget (TokenBudget): Compteur de tokens à alimenter (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités et limite de débit (optionnel),
+            fournissant éventuellement le client à utiliser à la place de l'API
+        **options: Paramètres supplémentaires transmis à l'API
+
+    Returns:
+        str: Contenu de la réponse générée
+    """
+    client = dispatcher.client if dispatcher is not None else None
+    if client is None:
+        client = Mistral(api_key=config['ai_api_key'])
+    model = config.get('ai_model', 'mistral-medium-latest')
+
+    def complete():
+        response = client.chat.complete(
+            model=model,
+            temperature=config['ai_temperature'],
+            max_tokens=config['ai_max_tokens'],
+            messages=messages,
+            **options
+        )
+        usage = getattr(response, 'usage', None)
+        return response, getattr(usage, 'total_tokens', None)
+
+    if dispatcher is not None:
+        response = dispatcher.call(
+            log_file or '-',
+            estimate_tokens(messages, config['ai_max_tokens']),
+            complete
+        )
+    else:
+        response, _ = complete()
+
+    usage = getattr(response, 'usage', None)
+    if budget is not None and usage is not None:
+        budget.record(
+            log_file or '-',
+            model,
+            usage.prompt_tokens or 0,
+            usage.completion_tokens or 0
+        )
+
+    return response.choices[0].message.content.strip()
@@ -0,0 +1,305 @@
+"""
+Module de répartition des appels IA : file à priorités par fichier,
+ordonnancement équitable pondéré et limitation de débit (requêtes et
+tokens par minute, respect des réponses 429 Retry-After)
+"""
+import heapq
+import time
+import itertools
+import threading
+from fnmatch import fnmatch
+
+# Attente maximale imposée par une réponse 429 (secondes)
+MAX_RETRY_AFTER = 300
+
+
+def parse_priorities(value):
+    """
+    Analyse les priorités par fichier au format "motif:priorité[:poids], ..."
+
+    Args:
+        value (str): Ex. "/var/log/auth.log:10:3, /var/log/apache2/*:1, syslog://*:5"
+
+    Returns:
+        dict: {motif: (priorité, poids)}
+
+    Raises:
+        ValueError: Si une entrée est invalide
+    """
+    priorities = {}
+    for entry in filter(None, (part.strip() for part in (value or '').split(','))):
+        parts = entry.split(':')
+        numbers = []
+        while len(parts) > 1 and len(numbers) < 2 and parts[-1].strip().replace('.', '', 1).isdigit():
+            numbers.insert(0, parts.pop().strip())
+        if not numbers:
+            raise ValueError(f"Priorité manquante pour '{entry}' (format motif:priorité[:poids])")
+        priority = int(numbers[0])
+        weight = float(numbers[1]) if len(numbers) > 1 else 1.0
+        if weight <= 0:
+            raise ValueError(f"Poids invalide pour '{entry}'")
+        priorities[':'.join(parts).strip()] = (priority, weight)
+    return priorities
+
+
+def estimate_tokens(messages, max_tokens):
+    """
+    Estime les tokens d'un appel (≈ 4 caractères par token + complétion maximale)
+
+    Returns:
+        int: Estimation réservée auprès du limiteur de tokens par minute
+    """
+    return sum(len(message['content']) for message in messages) // 4 + max_tokens
+
+
+def retry_after_seconds(error):
+    """
+    Détermine si une erreur est un refus de débit (HTTP 429) et le délai demandé
+
+    Returns:
+        float: Délai demandé (0 si l'en-tête Retry-After est absent), ou None
+            si l'erreur n'est pas un 429
+    """
+    response = getattr(error, 'raw_response', None) or getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None) or getattr(response, 'status_code', None)
+    if status != 429:
+        return None
+    headers = getattr(error, 'headers', None) or getattr(response, 'headers', None) or {}
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(headers.get('Retry-After') or 0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenBucket:
+    """Seau à jetons : débit par minute avec rafale égale à une minute de débit"""
+
+    def __init__(self, per_minute):
+        """
+        Args:
+            per_minute (float): Débit autorisé par minute (0 = illimité)
+        """
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """
+        Returns:
+            float: Attente nécessaire avant de pouvoir consommer amount
+        """
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount, now):
+        """Consomme amount (le niveau peut devenir négatif après régularisation)"""
+        if self.rate:
+            self._refill(now)
+            self.level -= min(amount, self.capacity)
+
+    def settle(self, delta):
+        """Régularise une estimation : delta = consommation réelle - estimation"""
+        if self.rate:
+            self.level = min(self.capacity, self.level - delta)
+
+
+class _Ticket:
+    """Demande d'appel en attente dans la file"""
+
+    __slots__ = ('source', 'tokens', 'key', 'start', 'enqueued')
+
+    def __init__(self, source, tokens, key, start, enqueued):
+        self.source = source
+        self.tokens = tokens
+        self.key = key
+        self.start = start
+        self.enqueued = enqueued
+
+    def __lt__(self, other):
+        return self.key < other.key
+
+
+class AIDispatcher:
+    """File d'appels IA : priorité stricte entre classes, équité pondérée au sein d'une classe"""
+
+    def __init__(self, requests_per_minute=0, tokens_per_minute=0, max_concurrent=4,
+                 priorities=None, default_priority=0, max_retries=3, client=None):
+        """
+        Args:
+            requests_per_minute (int): Requêtes autorisées par minute (0 = illimité)
+            tokens_per_minute (int): Tokens autorisés par minute (0 = illimité)
+            max_concurrent (int): Appels simultanés maximum
+            priorities (dict): {motif de fichier: (priorité, poids)}
+            default_priority (int): Priorité des fichiers sans motif correspondant
+            max_retries (int): Nouvelles tentatives après une réponse 429
+            client: Client (interface chat.complete de Mistral) utilisé à la
+                place de l'API, ex. IA simulée du banc de rejeu (None = API)
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrent = max(1, max_concurrent)
+        self.priorities = priorities or {}
+        self.default_priority = default_priority
+        self.max_retries = max_retries
+        self.client = client
+
+        self.stats = {}
+        self._queue = []
+        self._running = 0
+        self._paused_until = 0.0
+        self._virtual_time = 0.0
+        self._finish = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config, client=None):
+        """Construit la file d'appels à partir de la configuration"""
+        return cls(
+            requests_per_minute=config.get('ai_requests_per_minute', 0),
+            tokens_per_minute=config.get('ai_tokens_per_minute', 0),
+            max_concurrent=config.get('ai_max_concurrent', 4),
+            priorities=config.get('ai_priorities') or {},
+            max_retries=config.get('ai_max_retries', 3),
+            client=client
+        )
+
+    def priority_of(self, source):
+        """
+        Returns:
+            tuple: (priorité, poids) du fichier ou flux
+        """
+        if source in self.priorities:
+            return self.priorities[source]
+        for pattern, value in self.priorities.items():
+            if fnmatch(source, pattern):
+                return value
+        return self.default_priority, 1.0
+
+    def _source_stats(self, source):
+        return self.stats.setdefault(source, {'calls': 0, 'waited': 0.0, 'max_wait': 0.0, 'rate_limited': 0})
+
+    def acquire(self, source, tokens):
+        """
+        Attend le tour de la demande (priorité, équité, débit) puis la démarre
+
+        Args:
+            source (str): Fichier ou flux à l'origine de l'appel
+            tokens (int): Tokens estimés de l'appel
+
+        Returns:
+            _Ticket: Jeton à rendre avec release()
+        """
+        priority, weight = self.priority_of(source)
+        with self._condition:
+            # Ordonnancement équitable pondéré : temps de fin virtuel par source
+            start = max(self._virtual_time, self._finish.get(source, 0.0))
+            finish = start + tokens / weight
+            self._finish[source] = finish
+            ticket = _Ticket(source, tokens, (-priority, finish, next(self._sequence)), start, time.monotonic())
+            heapq.heappush(self._queue, ticket)
+
+            while True:
+                timeout = None
+                if self._queue[0] is ticket and self._running < self.max_concurrent:
+                    now = time.monotonic()
+                    wait = max(self._paused_until - now,
+                               self.requests.wait_time(1, now),
+                               self.tokens.wait_time(tokens, now))
+                    if wait <= 0:
+                        break
+                    timeout = wait
+                self._condition.wait(timeout)
+
+            heapq.heappop(self._queue)
+            now = time.monotonic()
+            self.requests.consume(1, now)
+            self.tokens.consume(tokens, now)
+            self._running += 1
+            self._virtual_time = max(self._virtual_time, ticket.start)
+
+            waited = now - ticket.enqueued
+            stats = self._source_stats(source)
+            stats['calls'] += 1
+            stats['waited'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+            # Le suivant dans la file peut maintenant être examiné
+            self._condition.notify_all()
+        return ticket
+
+    def release(self, ticket, used_tokens=None):
+        """
+        Termine un appel et régularise l'estimation de tokens
+
+        Args:
+            ticket (_Ticket): Jeton retourné par acquire()
+            used_tokens (int): Consommation réelle (None si inconnue)
+        """
+        with self._condition:
+            self._running -= 1
+            if used_tokens is not None:
+                self.tokens.settle(used_tokens - ticket.tokens)
+            self._condition.notify_all()
+
+    def pause(self, source, seconds):
+        """Suspend tous les appels après un refus de débit (429)"""
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._source_stats(source)['rate_limited'] += 1
+            self._condition.notify_all()
+
+    def call(self, source, tokens, func):
+        """
+        Exécute un appel IA à son tour, avec nouvelles tentatives après un 429
+
+        Args:
+            source (str): Fichier ou flux à l'origine de l'appel
+            tokens (int): Tokens estimés
+            func (callable): Appel à exécuter, retournant (résultat, tokens_consommés)
+
+        Returns:
+            Résultat de func
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = self.acquire(source, tokens)
+            try:
+                result, used_tokens = func()
+            except Exception as e:
+                self.release(ticket)
+                delay = retry_after_seconds(e)
+                if delay is None or attempt == self.max_retries:
+                    raise
+                delay = delay or 2 ** attempt
+                print(f"⏳ Limite de débit de l'API atteinte ({source}) : nouvelle tentative dans {delay:g}s")
+                self.pause(source, delay)
+                continue
+            self.release(ticket, used_tokens)
+            return result
+
+    def report_section(self):
+        """
+        Returns:
+            str: Appels, attentes et refus de débit par source pour le rapport quotidien
+        """
+        lines = ["🚦 FILE D'APPELS IA"]
+        with self._condition:
+            ordered = sorted(self.stats.items(), key=lambda item: (-self.priority_of(item[0])[0], item[0]))
+            for source, stats in ordered:
+                priority, weight = self.priority_of(source)
+                average = stats['waited'] / stats['calls'] if stats['calls'] else 0.0
+                lines.append(
+                    f"  {source} (priorité {priority}, poids {weight:g}) : {stats['calls']} appels, "
+                    f"attente moyenne {average:.1f}s (max {stats['max_wait']:.1f}s), "
+                    f"{stats['rate_limited']} refus 429"
+                )
+        if len(lines) == 1:
+            lines.append("  Aucun appel")
+        return "\n".join(lines)
@@ -0,0 +1,428 @@
+"""
+Module des moteurs d'analyse des logs : Mistral AI, serveur compatible
+OpenAI (HTTP) et moteur heuristique local, avec choix par fichier et
+bascule sur l'heuristique quand l'IA dépasse son délai
+"""
+import re
+import json
+import time
+import threading
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from fnmatch import fnmatch
+
+from ai_client import chat_complete
+from ai_dispatcher import estimate_tokens
+from structured_analysis import (
+    JSON_RESPONSE_FORMAT, parse_record, render_record, structured_config, structured_messages
+)
+
+# Marqueur des analyses produites localement (jamais réutilisées pour un lot similaire)
+HEURISTIC_MARKER = "Analyse heuristique"
+
+_IP = re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b')
+
+# Signatures du moteur heuristique :
+# (description, motif, score, [(occurrences, score aggravé)], recommandation)
+HEURISTIC_RULES = [
+    ("Échecs d'authentification",
+     r"Failed password|Invalid user|authentication failure|FAILED LOGIN",
+     4, [(10, 7), (50, 8)],
+     "Bloquer les IP sources (fail2ban), désactiver l'authentification SSH par mot de passe"),
+    ("Élévation de privilèges refusée",
+     r"sudo: .*(?:incorrect password attempts|NOT in sudoers)",
+     6, [(3, 7)],
+     "Vérifier le compte concerné et l'historique sudo"),
+    ("Arrêt critique du noyau",
+     r"Kernel panic|Oops:|BUG: unable to handle",
+     9, [],
+     "Examiner dmesg et les journaux du noyau, planifier un redémarrage contrôlé"),
+    ("Mémoire épuisée",
+     r"Out of memory|oom-killer|Killed process",
+     7, [],
+     "Identifier le processus consommateur, ajuster les limites mémoire ou le swap"),
+    ("Disque plein ou en erreur",
+     r"No space left on device|I/O error|EXT4-fs error|Buffer I/O error",
+     7, [],
+     "Libérer de l'espace disque, vérifier l'état SMART du disque"),
+    ("Erreurs critiques d'application",
+     r"\[(?:crit|alert|emerg)\]|\bCRITICAL\b|\bFATAL\b",
+     7, [],
+     "Consulter les journaux de l'application concernée"),
+    ("Plantages de processus",
+     r"segfault|core dumped",
+     5, [(10, 6)],
+     "Identifier le binaire en cause et appliquer les mises à jour"),
+    ("Tentatives d'attaque web",
+     r"\.\./|%2e%2e|union(?:\s|%20|\+)+select|<script|/etc/passwd|cmd\.exe|\bwget\s+http|/\.env\b|/\.git/",
+     6, [(20, 7)],
+     "Bloquer les IP sources, activer un WAF, vérifier les versions des applications web"),
+    ("Scanners de vulnérabilités",
+     r"nikto|sqlmap|nmap|masscan|zgrab|nuclei|dirbuster|gobuster",
+     5, [(50, 6)],
+     "Bloquer les IP sources et limiter le débit des requêtes"),
+    ("Erreurs serveur HTTP",
+     r'" 5\d\d \d+|\s5\d\d\s',
+     3, [(50, 5)],
+     "Vérifier l'état des applications derrière le serveur web"),
+]
+
+
+def analysis_messages(logs):
+    """
+    Construit les messages de la demande d'analyse d'un lot
+
+    Args:
+        logs (list): Lignes de logs à analyser
+
+    Returns:
+        list: Messages (role/content)
+    """
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Tu es un expert en cybersécurité et en analyse de logs Linux. "
+                "Pour chaque anomalie détectée, commence OBLIGATOIREMENT ta réponse par : "
+                "'SEVERITY_SCORE: X' où X est un nombre entre 1 et 10 (1=bénin, 10=critique). "
+                "Ensuite, décris les anomalies détectées et propose des recommandations claires. "
+                "Si aucune anomalie n'est détectée, indique 'SEVERITY_SCORE: 0'."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Analyse les logs suivants et attribue un score de gravité. "
+                f"Pour chaque anomalie, propose une solution ou une recommandation :"
+                f"\n{''.join(logs)}"
+            ),
+        }
+    ]
+
+
+def extract_severity_score(analysis):
+    """
+    Extrait le score de gravité de l'analyse
+
+    Args:
+        analysis (str): Texte d'analyse contenant le score
+
+    Returns:
+        int: Score de gravité entre 0 et 10
+    """
+    match = re.search(r'SEVERITY_SCORE:\s*(\d+)', analysis)
+    if match:
+        score = int(match.group(1))
+        return max(0, min(10, score))
+    return 0
+
+
+class BackendError(Exception):
+    """Erreur HTTP d'un moteur d'analyse (status_code et headers pour les 429)"""
+
+    def __init__(self, message, status_code=None, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class MistralBackend:
+    """Analyse par l'API Mistral AI"""
+
+    name = 'mistral'
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le moteur à partir de la configuration"""
+        return cls()
+
+    def analyze(self, logs, config, log_file=None, budget=None, dispatcher=None):
+        """
+        Returns:
+            str: Analyse commençant par SEVERITY_SCORE
+        """
+        if config.get('ai_structured_output'):
+            # Une réponse hors format lève StructuredOutputError : le routeur bascule sur l'heuristique
+            response = chat_complete(structured_messages(logs), structured_config(config), log_file=log_file,
+                                     budget=budget, dispatcher=dispatcher, response_format=JSON_RESPONSE_FORMAT)
+            return render_record(parse_record(response), logs)
+        return chat_complete(analysis_messages(logs), config, log_file=log_file, budget=budget, dispatcher=dispatcher)
+
+
+class OpenAICompatibleBackend:
+    """Analyse par un serveur exposant /chat/completions (vLLM, llama.cpp, Ollama, ...)"""
+
+    name = 'openai'
+
+    def __init__(self, base_url, model, api_key=None, timeout=60):
+        """
+        Args:
+            base_url (str): URL de base de l'API (ex. http://127.0.0.1:8000/v1)
+            model (str): Modèle demandé au serveur
+            api_key (str): Jeton Bearer (optionnel pour un serveur local)
+            timeout (float): Délai maximal d'une requête en secondes
+        """
+        self.url = base_url.rstrip('/') + '/chat/completions'
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le moteur à partir de la configuration"""
+        return cls(
+            config.get('openai_base_url', 'http://127.0.0.1:8000/v1'),
+            config.get('openai_model') or config.get('ai_model'),
+            api_key=config.get('openai_api_key'),
+            timeout=config.get('openai_timeout', 60)
+        )
+
+    def _post(self, payload):
+        headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.url, data=json.dumps(payload).encode('utf-8'), headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise BackendError(f"HTTP {e.code} : {e.reason}", status_code=e.code, headers=dict(e.headers or {}))
+
+    def analyze(self, logs, config, log_file=None, budget=None, dispatcher=None):
+        """
+        Returns:
+            str: Analyse commençant par SEVERITY_SCORE
+        """
+        structured = config.get('ai_structured_output', False)
+        if structured:
+            messages, config = structured_messages(logs), structured_config(config)
+        else:
+            messages = analysis_messages(logs)
+        payload = {
+            'model': self.model,
+            'messages': messages,
+            'temperature': config.get('ai_temperature', 0.5),
+            'max_tokens': config.get('ai_max_tokens', 4096),
+        }
+        if structured:
+            payload['response_format'] = JSON_RESPONSE_FORMAT
+
+        def complete():
+            data = self._post(payload)
+            return data, (data.get('usage') or {}).get('total_tokens')
+
+        if dispatcher is not None:
+            data = dispatcher.call(log_file or '-', estimate_tokens(messages, payload['max_tokens']), complete)
+        else:
+            data, _ = complete()
+
+        usage = data.get('usage')
+        if budget is not None and usage:
+            budget.record(log_file or '-', self.model, usage.get('prompt_tokens') or 0,
+                          usage.get('completion_tokens') or 0)
+        try:
+            content = data['choices'][0]['message']['content'].strip()
+        except (KeyError, IndexError, TypeError, AttributeError):
+            raise BackendError("Réponse inattendue du serveur compatible OpenAI")
+        return render_record(parse_record(content), logs) if structured else content
+
+
+class HeuristicBackend:
+    """Analyse locale par règles et signatures (aucun appel réseau, quelques millisecondes)"""
+
+    name = 'heuristic'
+
+    def __init__(self, rules=None):
+        """
+        Args:
+            rules (list): Signatures (voir HEURISTIC_RULES)
+        """
+        self.rules = [
+            (description, re.compile(pattern, re.IGNORECASE), score, escalation, advice)
+            for description, pattern, score, escalation, advice in (rules or HEURISTIC_RULES)
+        ]
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le moteur à partir de la configuration"""
+        return cls()
+
+    def analyze(self, logs, config=None, log_file=None, budget=None, dispatcher=None):
+        """
+        Returns:
+            str: Analyse commençant par SEVERITY_SCORE
+        """
+        findings = []
+        for description, regex, score, escalation, advice in self.rules:
+            matches = [line for line in logs if regex.search(line)]
+            if not matches:
+                continue
+            for count, escalated in escalation:
+                if len(matches) >= count:
+                    score = escalated
+            sources = Counter(ip for line in matches for ip in _IP.findall(line))
+            findings.append((score, description, len(matches), [ip for ip, _ in sources.most_common(3)], advice))
+
+        if not findings:
+            return f"SEVERITY_SCORE: 0\n{HEURISTIC_MARKER} : aucune signature connue détectée."
+
+        findings.sort(key=lambda finding: -finding[0])
+        lines = [f"SEVERITY_SCORE: {findings[0][0]}", f"{HEURISTIC_MARKER} (règles et signatures locales) :"]
+        for score, description, count, ips, _ in findings:
+            origin = f" (IP : {', '.join(ips)})" if ips else ""
+            lines.append(f"- {description} : {count} occurrences{origin} [score {score}]")
+        lines.append("Recommandations :")
+        lines.extend(f"- {advice}" for *_, advice in findings)
+        return "\n".join(lines)
+
+
+BACKENDS = {
+    'mistral': MistralBackend,
+    'openai': OpenAICompatibleBackend,
+    'heuristic': HeuristicBackend,
+}
+
+
+def parse_backend_map(value):
+    """
+    Analyse le choix de moteur par fichier au format "motif:moteur, ..."
+
+    Args:
+        value (str): Ex. "/var/log/apache2/*:heuristic, /var/log/auth.log:openai"
+
+    Returns:
+        dict: {motif: moteur}
+
+    Raises:
+        ValueError: Si une entrée est invalide
+    """
+    backends = {}
+    for entry in filter(None, (part.strip() for part in (value or '').split(','))):
+        pattern, _, backend = entry.rpartition(':')
+        backend = backend.strip()
+        if not pattern or backend not in BACKENDS:
+            raise ValueError(f"Moteur invalide pour '{entry}' (format motif:{'|'.join(BACKENDS)})")
+        backends[pattern.strip()] = backend
+    return backends
+
+
+class AnalyzerRouter:
+    """Choix du moteur par fichier et bascule sur l'heuristique en cas de retard ou d'erreur"""
+
+    def __init__(self, backends, default='mistral', file_backends=None, deadline=0, max_workers=4):
+        """
+        Args:
+            backends (dict): Moteurs disponibles {nom: moteur}
+            default (str): Moteur des fichiers sans motif correspondant
+            file_backends (dict): {motif de fichier: nom du moteur}
+            deadline (float): Délai en secondes avant bascule sur l'heuristique (0 = attendre)
+            max_workers (int): Analyses distantes simultanées
+        """
+        self.backends = backends
+        self.default = default
+        self.file_backends = file_backends or {}
+        self.deadline = deadline
+        self.fallback = backends.get('heuristic') or HeuristicBackend()
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analyzer")
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le routeur et les moteurs utilisés par la configuration"""
+        default = config.get('analyzer_backend', 'mistral')
+        file_backends = config.get('analyzer_backends') or {}
+        names = {default, 'heuristic', *file_backends.values()}
+        return cls(
+            {name: BACKENDS[name].from_config(config) for name in names},
+            default=default,
+            file_backends=file_backends,
+            deadline=config.get('analyzer_deadline', 0),
+            max_workers=config.get('ai_max_concurrent', 4)
+        )
+
+    def backend_for(self, source):
+        """
+        Returns:
+            str: Nom du moteur du fichier ou flux
+        """
+        if source in self.file_backends:
+            return self.file_backends[source]
+        for pattern, name in self.file_backends.items():
+            if fnmatch(source, pattern):
+                return name
+        return self.default
+
+    def _record(self, name, key, latency=None):
+        with self._lock:
+            stats = self.stats.setdefault(name, {'calls': 0, 'errors': 0, 'timeouts': 0, 'latency': 0.0})
+            stats[key] += 1
+            if latency is not None:
+                stats['latency'] += latency
+
+    def _timed(self, backend, logs, config, source, budget, dispatcher):
+        start = time.monotonic()
+        analysis = backend.analyze(logs, config, log_file=source, budget=budget, dispatcher=dispatcher)
+        self._record(backend.name, 'calls', time.monotonic() - start)
+        return analysis
+
+    def _fallback(self, logs, config, source, reason):
+        print(f"🛟 Bascule sur l'analyse heuristique pour {source} ({reason})")
+        analysis = self._timed(self.fallback, logs, config, source, None, None)
+        return f"{analysis}\n(Moteur {self.backend_for(source)} indisponible : {reason})"
+
+    def analyze(self, source, logs, config, budget=None, dispatcher=None, on_late=None):
+        """
+        Analyse un lot avec le moteur du fichier
+
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            logs (list): Lignes à analyser
+            config (dict): Configuration (paramètres IA)
+            budget (TokenBudget): Compteur de tokens (optionnel)
+            dispatcher (AIDispatcher): File d'appels à priorités (optionnel)
+            on_late (callable): Reçoit l'analyse du moteur arrivée après la bascule
+                et l'analyse heuristique déjà retournée pour le même lot
+
+        Returns:
+            str: Analyse commençant par SEVERITY_SCORE
+        """
+        backend = self.backends[self.backend_for(source)]
+        if backend is self.fallback:
+            return self._timed(backend, logs, config, source, budget, dispatcher)
+
+        future = self._executor.submit(self._timed, backend, logs, config, source, budget, dispatcher)
+        try:
+            return future.result(timeout=self.deadline or None)
+        except FutureTimeout:
+            self._record(backend.name, 'timeouts')
+            fallback = self._fallback(logs, config, source, f"délai de {self.deadline:g}s dépassé")
+            if on_late is not None:
+                def deliver(done):
+                    if done.exception() is None:
+                        on_late(done.result(), fallback)
+                future.add_done_callback(deliver)
+            return fallback
+        except Exception as e:
+            self._record(backend.name, 'errors')
+            print(f"❌ Erreur du moteur {backend.name} pour {source} : {e}")
+            return self._fallback(logs, config, source, f"erreur : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Appels, latence moyenne et bascules par moteur pour le rapport quotidien
+        """
+        lines = ["🧠 MOTEURS D'ANALYSE"]
+        with self._lock:
+            for name, stats in sorted(self.stats.items()):
+                average = stats['latency'] / stats['calls'] if stats['calls'] else 0.0
+                lines.append(
+                    f"  {name} : {stats['calls']} analyses (latence moyenne {average:.2f}s), "
+                    f"{stats['timeouts']} délais dépassés, {stats['errors']} erreurs"
+                )
+        if len(lines) == 1:
+            lines.append("  Aucune analyse")
+        return "\n".join(lines)
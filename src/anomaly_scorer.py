@@ -0,0 +1,227 @@
+"""
+Module de score d'anomalie statistique par fichier pour filtrer les appels IA
+"""
+import os
+import re
+import json
+import math
+import time
+import zlib
+import datetime
+import threading
+from array import array
+
+from log_compactor import normalize_line
+
+# Nombre d'alvéoles du profil de gabarits (taille fixe par fichier)
+TEMPLATE_BUCKETS = 512
+
+# Fréquence en dessous de laquelle un gabarit est considéré comme nouveau
+NOVELTY_FLOOR = 0.001
+
+# Motifs transmis à l'IA quel que soit le score
+DEFAULT_FORWARD_PATTERNS = (
+    r"Failed password|Invalid user|authentication failure|Out of memory|segfault|"
+    r"Kernel panic|CRITICAL|FATAL|\[crit\]|\[alert\]|\[emerg\]"
+)
+
+
+def compile_forward_patterns(patterns):
+    """
+    Compile l'expression des motifs toujours transmis à l'IA
+
+    Args:
+        patterns (str): Expression régulière (vide = aucun motif)
+
+    Returns:
+        re.Pattern: Motif compilé, ou None
+    """
+    return re.compile(patterns, re.IGNORECASE) if patterns else None
+
+
+class AnomalyScorer:
+    """
+    Maintient des lignes de base compactes par fichier (débit EWMA, profil
+    horaire saisonnier, fréquences de gabarits) et décide si un lot mérite
+    une analyse IA
+    """
+
+    def __init__(self, state_file, threshold=3.0, alpha=0.1, warmup=10, forward_patterns=None):
+        """
+        Args:
+            state_file (str): Fichier JSON de persistance des lignes de base
+            threshold (float): Score à partir duquel un lot est transmis à l'IA
+            alpha (float): Facteur de lissage des moyennes exponentielles
+            warmup (int): Nombre d'observations avant de filtrer les lots
+            forward_patterns (str): Motifs toujours transmis à l'IA
+        """
+        self.state_file = state_file
+        self.threshold = threshold
+        self.alpha = alpha
+        self.warmup = warmup
+        self.forward_regex = compile_forward_patterns(forward_patterns)
+        self.stats = {'scored': 0, 'forwarded': 0, 'skipped': 0}
+        self._lock = threading.Lock()
+        self._baselines = self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le scoreur à partir de la configuration"""
+        return cls(
+            config['anomaly_state_file'],
+            threshold=config.get('anomaly_threshold', 3.0),
+            alpha=config.get('anomaly_alpha', 0.1),
+            warmup=config.get('anomaly_warmup', 10),
+            forward_patterns=config.get('forward_patterns')
+        )
+
+    def _new_baseline(self):
+        """Crée une ligne de base vide pour un fichier"""
+        return {
+            'observations': 0,
+            'last_seen': None,
+            'rate_mean': 0.0,
+            'rate_var': 0.0,
+            'hourly_mean': array('d', [0.0] * 24),
+            'hourly_count': array('I', [0] * 24),
+            'templates': array('d', [0.0] * TEMPLATE_BUCKETS),
+        }
+
+    def _load(self):
+        """Charge les lignes de base depuis le disque"""
+        try:
+            with open(self.state_file, "r", encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️  Impossible de charger les lignes de base d'anomalie : {e}")
+            return {}
+
+        baselines = {}
+        for log_file, saved in data.items():
+            baseline = self._new_baseline()
+            baseline.update({key: saved[key] for key in ('observations', 'last_seen', 'rate_mean', 'rate_var')})
+            baseline['hourly_mean'] = array('d', saved['hourly_mean'])
+            baseline['hourly_count'] = array('I', saved['hourly_count'])
+            baseline['templates'] = array('d', saved['templates'])
+            baselines[log_file] = baseline
+        return baselines
+
+    def save(self):
+        """Écrit les lignes de base de manière atomique"""
+        with self._lock:
+            data = {
+                log_file: {
+                    key: (list(value) if isinstance(value, array) else value)
+                    for key, value in baseline.items()
+                }
+                for log_file, baseline in self._baselines.items()
+            }
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, "w", encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder les lignes de base d'anomalie : {e}")
+
+    def score(self, log_file, logs, now=None):
+        """
+        Calcule le score de déviation d'un lot et met à jour la ligne de base
+
+        Args:
+            log_file (str): Fichier de log
+            logs (list): Lignes du lot (peut être vide)
+            now (float): Horodatage de l'observation (secondes epoch)
+
+        Returns:
+            float: Score de déviation (écart en nombre d'écarts-types ou
+                nombre de gabarits nouveaux), inf pendant le préchauffage
+        """
+        now = now if now is not None else time.time()
+        hour = datetime.datetime.fromtimestamp(now).hour
+
+        with self._lock:
+            baseline = self._baselines.setdefault(log_file, self._new_baseline())
+            elapsed = now - baseline['last_seen'] if baseline['last_seen'] else None
+            baseline['last_seen'] = now
+            if not elapsed or elapsed <= 0:
+                return math.inf if logs else 0.0
+
+            # Débit en lignes par minute comparé à la moyenne glissante et au profil horaire
+            rate = len(logs) * 60.0 / elapsed
+            std = max(1.0, 0.1 * baseline['rate_mean'], math.sqrt(baseline['rate_var']))
+            rate_score = (rate - baseline['rate_mean']) / std
+            if baseline['hourly_count'][hour] >= 3:
+                rate_score = max(rate_score, (rate - baseline['hourly_mean'][hour]) / std)
+
+            # Gabarits jamais (ou plus) observés sur ce fichier
+            bucket_counts = {}
+            for line in logs:
+                bucket = zlib.crc32(normalize_line(line).encode('utf-8')) % TEMPLATE_BUCKETS
+                bucket_counts[bucket] = bucket_counts.get(bucket, 0) + 1
+            templates = baseline['templates']
+            novelty_score = sum(1 for bucket in bucket_counts if templates[bucket] < NOVELTY_FLOOR)
+
+            score = max(rate_score, float(novelty_score))
+            if baseline['observations'] < self.warmup and logs:
+                score = math.inf
+
+            # Mise à jour des lignes de base
+            alpha = self.alpha
+            delta = rate - baseline['rate_mean']
+            baseline['rate_mean'] += alpha * delta
+            baseline['rate_var'] = (1 - alpha) * (baseline['rate_var'] + alpha * delta * delta)
+            count = baseline['hourly_count'][hour]
+            baseline['hourly_mean'][hour] += (rate - baseline['hourly_mean'][hour]) / min(count + 1, 1 / alpha)
+            baseline['hourly_count'][hour] = min(count + 1, 2 ** 32 - 1)
+            if logs:
+                total = len(logs)
+                for bucket in range(TEMPLATE_BUCKETS):
+                    templates[bucket] *= (1 - alpha)
+                for bucket, bucket_count in bucket_counts.items():
+                    templates[bucket] += alpha * bucket_count / total
+            baseline['observations'] += 1
+
+            return score
+
+    def should_analyze(self, log_file, logs, now=None):
+        """
+        Détermine si un lot doit être transmis à l'IA
+
+        Args:
+            log_file (str): Fichier de log
+            logs (list): Lignes du lot (peut être vide)
+            now (float): Horodatage de l'observation
+
+        Returns:
+            bool: True si le lot dévie de la ligne de base ou contient un motif critique
+        """
+        score = self.score(log_file, logs, now)
+        if not logs:
+            return False
+
+        forward = score >= self.threshold or (
+            self.forward_regex is not None and any(self.forward_regex.search(line) for line in logs)
+        )
+
+        with self._lock:
+            self.stats['scored'] += 1
+            self.stats['forwarded' if forward else 'skipped'] += 1
+
+        if not forward:
+            print(f"🟢 Lot nominal dans {log_file} (score: {score:.1f}), analyse IA évitée")
+        return forward
+
+    def report_section(self):
+        """
+        Returns:
+            str: Statistiques du filtre pour le rapport quotidien
+        """
+        return (
+            "📉 FILTRE STATISTIQUE D'ANOMALIES\n"
+            f"  Lots évalués : {self.stats['scored']} - transmis à l'IA : {self.stats['forwarded']} "
+            f"- appels évités : {self.stats['skipped']}"
+        )
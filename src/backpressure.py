@@ -0,0 +1,201 @@
+"""
+Module de contre-pression entre la lecture des logs et leur analyse
+"""
+import os
+import random
+import threading
+from collections import deque
+
+from anomaly_scorer import compile_forward_patterns
+
+# Politiques de délestage disponibles
+SHED_POLICIES = ('reservoir', 'newest', 'prefilter')
+
+
+class BoundedLineQueue:
+    """File bornée de lignes en attente d'analyse, avec politique de délestage"""
+
+    def __init__(self, capacity, policy='newest', prefilter=None, rng=None):
+        """
+        Args:
+            capacity (int): Nombre maximum de lignes transmises par lot
+            policy (str): Politique de délestage (voir SHED_POLICIES)
+            prefilter (re.Pattern): Motif des lignes prioritaires (politique 'prefilter')
+            rng (random.Random): Générateur aléatoire (politique 'reservoir')
+        """
+        if policy not in SHED_POLICIES:
+            raise ValueError(f"Politique de délestage inconnue : {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.prefilter = prefilter
+        self.rng = rng or random.Random()
+        self.received = 0
+        self.shed = 0
+        self._reset()
+
+    def _reset(self):
+        """Vide la file pour le lot suivant"""
+        self._seen = 0
+        self._lines = deque(maxlen=self.capacity) if self.policy == 'newest' else []
+
+    def offer(self, line):
+        """
+        Propose une ligne à la file ; elle peut être délestée
+
+        Args:
+            line (str): Ligne de log
+        """
+        self.received += 1
+        self._seen += 1
+
+        if self.policy == 'newest':
+            self._lines.append(line)
+
+        elif self.policy == 'reservoir':
+            # Algorithme R : échantillon uniforme, positions conservées pour l'ordre
+            if len(self._lines) < self.capacity:
+                self._lines.append((self._seen, line))
+            else:
+                slot = self.rng.randrange(self._seen)
+                if slot < self.capacity:
+                    self._lines[slot] = (self._seen, line)
+
+        else:
+            self._lines.append(line)
+            if len(self._lines) >= 2 * self.capacity:
+                self._lines = self._keep_prefilter_hits(self._lines)
+
+    def _keep_prefilter_hits(self, lines):
+        """Conserve les lignes prioritaires, complétées par les plus récentes"""
+        if len(lines) <= self.capacity:
+            return lines
+        hits = [i for i, line in enumerate(lines) if self.prefilter and self.prefilter.search(line)]
+        hits = hits[-self.capacity:]
+        hit_set = set(hits)
+        others = [i for i in range(len(lines)) if i not in hit_set]
+        kept = sorted(hits + others[len(others) - (self.capacity - len(hits)):])
+        return [lines[i] for i in kept]
+
+    def drain(self):
+        """
+        Récupère le lot courant et réinitialise la file
+
+        Returns:
+            list: Lignes conservées (les délestées sont comptées dans self.shed)
+        """
+        if self.policy == 'reservoir':
+            lines = [line for _, line in sorted(self._lines)]
+        elif self.policy == 'prefilter':
+            lines = self._keep_prefilter_hits(self._lines)
+        else:
+            lines = list(self._lines)
+
+        self.shed += self._seen - len(lines)
+        self._reset()
+        return lines
+
+
+class BackpressureMonitor:
+    """Mesure le retard de lecture par fichier et borne les lots transmis à l'analyse"""
+
+    def __init__(self, max_lines, policy='newest', max_bytes=0, prefilter=None):
+        """
+        Args:
+            max_lines (int): Nombre maximum de lignes par lot et par fichier
+            policy (str): Politique de délestage (voir SHED_POLICIES)
+            max_bytes (int): Retard en octets au-delà duquel la lecture saute
+                directement aux données les plus récentes (0 = jamais)
+            prefilter (str): Motifs des lignes prioritaires
+        """
+        self.max_lines = max_lines
+        self.policy = policy
+        self.max_bytes = max_bytes
+        self.prefilter = compile_forward_patterns(prefilter)
+        self.stats = {}
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le moniteur à partir de la configuration"""
+        return cls(
+            config['backpressure_max_lines'],
+            policy=config.get('shed_policy', 'newest'),
+            max_bytes=config.get('backpressure_max_bytes', 0),
+            prefilter=config.get('forward_patterns')
+        )
+
+    def queue_for(self, log_file):
+        """
+        Returns:
+            BoundedLineQueue: File bornée associée au fichier
+        """
+        with self._lock:
+            if log_file not in self._queues:
+                self._queues[log_file] = BoundedLineQueue(self.max_lines, self.policy, self.prefilter)
+                self.stats[log_file] = {
+                    'received': 0, 'shed_lines': 0, 'skipped_bytes': 0,
+                    'lag_bytes': 0, 'max_lag_bytes': 0,
+                }
+            return self._queues[log_file]
+
+    def start_position(self, log_file, last_position):
+        """
+        Mesure le retard d'un fichier et détermine la position de lecture
+
+        Args:
+            log_file (str): Chemin du fichier de log
+            last_position (int): Position du dernier octet lu
+
+        Returns:
+            int: Position à partir de laquelle lire
+        """
+        self.queue_for(log_file)
+        try:
+            size = os.path.getsize(log_file)
+        except OSError:
+            return last_position
+
+        lag = max(0, size - last_position)
+        with self._lock:
+            stats = self.stats[log_file]
+            stats['lag_bytes'] = lag
+            stats['max_lag_bytes'] = max(stats['max_lag_bytes'], lag)
+            if self.max_bytes and lag > self.max_bytes:
+                stats['skipped_bytes'] += lag - self.max_bytes
+                print(f"⏩ Retard de {lag} octets sur {log_file}, lecture des {self.max_bytes} derniers octets")
+                return size - self.max_bytes
+        return last_position
+
+    def record(self, log_file):
+        """
+        Met à jour les compteurs d'un fichier après la lecture d'un lot
+
+        Args:
+            log_file (str): Chemin du fichier de log
+        """
+        with self._lock:
+            stats = self.stats[log_file]
+            queue = self._queues[log_file]
+            shed = queue.shed - stats['shed_lines']
+            stats['received'] = queue.received
+            stats['shed_lines'] = queue.shed
+        if shed:
+            print(f"🔻 {shed} lignes délestées dans {log_file} (politique : {self.policy})")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Retards et délestages par fichier pour le rapport quotidien
+        """
+        lines = [f"🔻 CONTRE-PRESSION (politique : {self.policy}, {self.max_lines} lignes max par lot)"]
+        with self._lock:
+            for log_file, stats in sorted(self.stats.items()):
+                lines.append(
+                    f"  {log_file} : {stats['received']} lignes reçues, {stats['shed_lines']} délestées, "
+                    f"{stats['skipped_bytes']} octets sautés, retard {stats['lag_bytes']} octets "
+                    f"(max {stats['max_lag_bytes']})"
+                )
+        if len(lines) == 1:
+            lines.append("  Aucun fichier lu")
+        return "\n".join(lines)
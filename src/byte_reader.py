@@ -0,0 +1,108 @@
+"""
+Module de lecture des nouvelles lignes en octets (mmap, décodage tardif)
+"""
+import io
+import os
+import re
+import mmap
+
+# Taille de région à partir de laquelle le fichier est projeté en mémoire
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+def compile_byte_filter(patterns):
+    """
+    Compile le préfiltre appliqué aux lignes avant décodage
+
+    Args:
+        patterns (str): Expression régulière (vide = aucune ligne filtrée)
+
+    Returns:
+        re.Pattern: Motif binaire compilé, ou None (sensible à la casse,
+            préfixer par (?i) sinon : la recherche insensible est bien plus lente)
+    """
+    return re.compile(patterns.encode('utf-8')) if patterns else None
+
+
+def _decode(buffer, start, end):
+    """Décode une ligne du tampon sans copie intermédiaire"""
+    with memoryview(buffer)[start:end] as view:
+        text = str(view, 'utf-8', 'ignore')
+    return text.replace('\r\n', '\n') if '\r' in text else text
+
+
+def _split_lines(buffer, start, end, byte_filter, sink):
+    """
+    Découpe la région [start, end[ (terminée par un saut de ligne) en lignes
+
+    Sans préfiltre, la région est décodée d'un bloc par le décodeur de lignes
+    natif ; avec préfiltre, le motif est recherché sur toute la région en
+    octets et seules les lignes qui le contiennent sont délimitées et décodées.
+    """
+    if byte_filter is None:
+        with memoryview(buffer)[start:end] as view:
+            text = io.TextIOWrapper(io.BytesIO(view), encoding='utf-8', errors='ignore')
+        if sink is None:
+            return text.readlines()
+        for line in text:
+            sink(line)
+        return []
+
+    lines = []
+    append = sink or lines.append
+    position = start
+    while position < end:
+        match = byte_filter.search(buffer, position, end)
+        if match is None:
+            break
+        line_start = buffer.rfind(b'\n', start, match.start()) + 1
+        line_end = buffer.find(b'\n', max(match.start(), match.end() - 1), end) + 1
+        append(_decode(buffer, max(line_start, start), line_end))
+        position = line_end
+    return lines
+
+
+def read_new_lines(file, last_position, byte_filter=None, resync=False, sink=None):
+    """
+    Lit les lignes complètes ajoutées depuis last_position dans un fichier
+    ouvert en binaire ; une ligne inachevée est laissée pour le cycle suivant
+
+    Args:
+        file: Fichier ouvert en mode 'rb'
+        last_position (int): Position du dernier octet lu
+        byte_filter (re.Pattern): Préfiltre binaire (lignes non retenues ignorées)
+        resync (bool): Ignorer la première ligne, potentiellement tronquée
+        sink (callable): Reçoit chaque ligne décodée (sinon elles sont retournées)
+
+    Returns:
+        tuple: (lignes, nouvelle_position) - lignes vide si sink est fourni
+    """
+    size = os.fstat(file.fileno()).st_size
+    if size < last_position:
+        # Fichier tronqué ou remplacé par la rotation : reprise au début
+        last_position = 0
+    if size == last_position:
+        return [], last_position
+
+    if size - last_position >= MMAP_THRESHOLD:
+        # Projection de la région nouvelle (offset aligné sur la granularité)
+        aligned = last_position - last_position % mmap.ALLOCATIONGRANULARITY
+        buffer = mmap.mmap(file.fileno(), size - aligned, offset=aligned, access=mmap.ACCESS_READ)
+        start, end = last_position - aligned, size - aligned
+    else:
+        buffer = bytearray(size - last_position)
+        file.seek(last_position)
+        end = file.readinto(buffer)
+        start, aligned = 0, last_position
+
+    try:
+        if resync:
+            start = buffer.find(b'\n', start, end) + 1 or end
+        last_newline = buffer.rfind(b'\n', start, end)
+        if last_newline < 0:
+            return [], aligned + start
+        lines = _split_lines(buffer, start, last_newline + 1, byte_filter, sink)
+        return lines, aligned + last_newline + 1
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
@@ -2,20 +2,33 @@
 Module de chargement de la configuration
 """
 import os
+import re
 import sys
 from configparser import ConfigParser
 from dotenv import load_dotenv
 
+from ai_dispatcher import parse_priorities
+from analyzer_backends import BACKENDS, parse_backend_map
+from anomaly_scorer import DEFAULT_FORWARD_PATTERNS
+from backpressure import SHED_POLICIES
+from coordination import CYCLE_TASK_TIMEOUT, default_lease_ttl, max_cycle_time
+from poll_scheduler import parse_poll_bounds
+from token_budget import parse_token_prices
+
 
 class ConfigurationError(Exception):
     """Exception levée en cas d'erreur de configuration"""
     pass
 
 
-def load_configuration():
+def load_configuration(config_file=None):
     """
     Charge la configuration depuis config.ini et .env
 
+    Args:
+        config_file (str): Fichier config.ini à utiliser à la place des
+            emplacements par défaut (optionnel)
+
     Returns:
         dict: Dictionnaire contenant toute la configuration
 
@@ -42,7 +55,7 @@ def load_configuration():
 
     # Charger config.ini
     config = ConfigParser()
-    config_paths = [
+    config_paths = [config_file] if config_file else [
         '/etc/log_analyzer/config.ini',
         os.path.join(os.path.dirname(__file__), '../config/config.ini'),
         './config.ini'
@@ -80,6 +93,197 @@ def load_configuration():
             'smtp_password': os.getenv('SMTP_PASSWORD'),
             'config_path': loaded_path
         }
+
+        # Répertoire des fichiers d'état (par défaut celui du rapport quotidien)
+        configuration['state_dir'] = config.get(
+            'Settings', 'state_dir',
+            fallback=os.path.dirname(configuration['daily_report_file'])
+        )
+
+        # Comptabilité des tokens et budget
+        configuration.update({
+            'token_budget': config.getint('Settings', 'token_budget', fallback=0),
+            'token_budget_period': config.get('Settings', 'token_budget_period', fallback='day'),
+            'ai_fallback_model': config.get('Settings', 'ai_fallback_model', fallback='mistral-small-latest'),
+            'ai_token_prices': parse_token_prices(config.get('Settings', 'ai_token_prices', fallback='')),
+            'token_usage_file': config.get(
+                'Settings', 'token_usage_file',
+                fallback=os.path.join(configuration['state_dir'], 'token_usage.json')
+            ),
+        })
+
+        # Analyse corrélée de tous les fichiers d'un cycle en un seul appel
+        configuration.update({
+            'correlation_mode': config.getboolean('Settings', 'correlation_mode', fallback=False),
+            'correlation_max_lines': config.getint('Settings', 'correlation_max_lines', fallback=1000),
+        })
+
+        # Préfiltre binaire appliqué avant décodage des lignes
+        configuration['byte_prefilter'] = config.get('Settings', 'byte_prefilter', fallback='')
+
+        # Contre-pression entre lecture et analyse
+        configuration.update({
+            'backpressure_max_lines': config.getint('Settings', 'backpressure_max_lines', fallback=0),
+            'backpressure_max_bytes': config.getint('Settings', 'backpressure_max_bytes', fallback=0),
+            'shed_policy': config.get('Settings', 'shed_policy', fallback='newest'),
+        })
+
+        # Profilage des cycles
+        configuration.update({
+            'profiling': config.getboolean('Settings', 'profiling', fallback=False),
+            'profiling_tracemalloc': config.getboolean('Settings', 'profiling_tracemalloc', fallback=False),
+            'profiling_top_n': config.getint('Settings', 'profiling_top_n', fallback=25),
+        })
+
+        # Réception syslog des serveurs distants
+        configuration.update({
+            'syslog_enabled': config.getboolean('Settings', 'syslog_enabled', fallback=False),
+            'syslog_bind': config.get('Settings', 'syslog_bind', fallback='0.0.0.0'),
+            'syslog_udp_port': config.getint('Settings', 'syslog_udp_port', fallback=5514),
+            'syslog_tcp_port': config.getint('Settings', 'syslog_tcp_port', fallback=5514),
+            'syslog_max_lines_per_host': config.getint('Settings', 'syslog_max_lines_per_host', fallback=5000),
+            'syslog_max_hosts': config.getint('Settings', 'syslog_max_hosts', fallback=256),
+            'syslog_workers': config.getint('Settings', 'syslog_workers', fallback=4),
+        })
+
+        # File d'appels IA : priorités par fichier et limites de débit de l'API
+        configuration.update({
+            'ai_priorities': parse_priorities(config.get('Settings', 'ai_priorities', fallback='')),
+            'ai_requests_per_minute': config.getint('Settings', 'ai_requests_per_minute', fallback=0),
+            'ai_tokens_per_minute': config.getint('Settings', 'ai_tokens_per_minute', fallback=0),
+            'ai_max_concurrent': config.getint('Settings', 'ai_max_concurrent', fallback=4),
+            'ai_max_retries': config.getint('Settings', 'ai_max_retries', fallback=3),
+        })
+
+        # Résumé statistique des logs d'accès web
+        configuration.update({
+            'access_log_summary': config.getboolean('Settings', 'access_log_summary', fallback=False),
+            'access_log_top_k': config.getint('Settings', 'access_log_top_k', fallback=10),
+            'access_log_outliers': config.getint('Settings', 'access_log_outliers', fallback=20),
+            'access_log_min_lines': config.getint('Settings', 'access_log_min_lines', fallback=50),
+        })
+
+        # Moteurs d'analyse : choix par fichier et bascule sur l'heuristique
+        configuration.update({
+            'analyzer_backend': config.get('Settings', 'analyzer_backend', fallback='mistral').strip(),
+            'analyzer_backends': parse_backend_map(config.get('Settings', 'analyzer_backends', fallback='')),
+            'analyzer_deadline': config.getfloat('Settings', 'analyzer_deadline', fallback=0),
+            'openai_base_url': config.get('Settings', 'openai_base_url', fallback='http://127.0.0.1:8000/v1'),
+            'openai_model': config.get('Settings', 'openai_model', fallback=''),
+            'openai_timeout': config.getfloat('Settings', 'openai_timeout', fallback=60),
+            'openai_api_key': os.getenv('OPENAI_API_KEY'),
+        })
+
+        # Sortie structurée : réponse JSON compacte (gravité, constats, recommandations)
+        configuration.update({
+            'ai_structured_output': config.getboolean('Settings', 'ai_structured_output', fallback=False),
+            'ai_structured_max_tokens': config.getint('Settings', 'ai_structured_max_tokens', fallback=512),
+        })
+
+        # Événements multi-lignes (traces de pile, lignes de continuation)
+        configuration.update({
+            'multiline_files': [
+                pattern.strip() for pattern in config.get('Settings', 'multiline_files', fallback='').split(',')
+                if pattern.strip()
+            ],
+            'multiline_start_pattern': config.get('Settings', 'multiline_start_pattern', fallback='', raw=True),
+            'multiline_hold_pattern': config.get('Settings', 'multiline_hold_pattern', fallback='', raw=True),
+            'multiline_timeout': config.getfloat('Settings', 'multiline_timeout', fallback=5.0),
+            'multiline_max_lines': config.getint('Settings', 'multiline_max_lines', fallback=200),
+            'multiline_max_bytes': config.getint('Settings', 'multiline_max_bytes', fallback=32768),
+            'multiline_state_file': config.get(
+                'Settings', 'multiline_state_file',
+                fallback=os.path.join(configuration['state_dir'], 'multiline_events.json')
+            ),
+        })
+
+        # Micro-lots : accumulation des lignes entre les cycles
+        configuration.update({
+            'microbatch': config.getboolean('Settings', 'microbatch', fallback=False),
+            'microbatch_max_lines': config.getint('Settings', 'microbatch_max_lines', fallback=200),
+            'microbatch_max_bytes': config.getint('Settings', 'microbatch_max_bytes', fallback=65536),
+            'microbatch_max_age': config.getfloat('Settings', 'microbatch_max_age', fallback=300),
+            'microbatch_state_file': config.get(
+                'Settings', 'microbatch_state_file',
+                fallback=os.path.join(configuration['state_dir'], 'microbatches.json')
+            ),
+        })
+
+        # Réutilisation des analyses de lots quasi identiques (MinHash/LSH)
+        configuration.update({
+            'similarity_dedup': config.getboolean('Settings', 'similarity_dedup', fallback=False),
+            'similarity_threshold': config.getfloat('Settings', 'similarity_threshold', fallback=0.9),
+            'similarity_max_entries': config.getint('Settings', 'similarity_max_entries', fallback=2000),
+            'similarity_max_age': config.getfloat('Settings', 'similarity_max_age', fallback=24),
+            'similarity_state_file': config.get(
+                'Settings', 'similarity_state_file',
+                fallback=os.path.join(configuration['state_dir'], 'similarity_index.json')
+            ),
+        })
+
+        # Vérifications adaptatives par fichier
+        configuration.update({
+            'adaptive_polling': config.getboolean('Settings', 'adaptive_polling', fallback=False),
+            'poll_min_interval': config.getfloat(
+                'Settings', 'poll_min_interval', fallback=max(1, configuration['log_check_interval'] / 10)
+            ),
+            'poll_max_interval': config.getfloat(
+                'Settings', 'poll_max_interval', fallback=configuration['log_check_interval'] * 4
+            ),
+            'poll_backoff': config.getfloat('Settings', 'poll_backoff', fallback=2.0),
+            'poll_bounds': parse_poll_bounds(config.get('Settings', 'poll_bounds', fallback='')),
+        })
+
+        # Watchdog systemd : retard toléré avant de suspendre l'entretien
+        configuration['watchdog_lag_threshold'] = config.getfloat(
+            'Settings', 'watchdog_lag_threshold',
+            fallback=2 * configuration['log_check_interval']
+        )
+
+        # Écrivain unique du rapport : délai maximal avant fsync (0 = à chaque lot)
+        configuration['report_fsync_interval'] = config.getfloat(
+            'Settings', 'report_fsync_interval', fallback=5.0
+        )
+
+        # Synthèse hiérarchique du rapport quotidien
+        configuration.update({
+            'report_summarize': config.getboolean('Settings', 'report_summarize', fallback=False),
+            'report_summary_workers': config.getint('Settings', 'report_summary_workers', fallback=4),
+            'report_summary_max_tokens': config.getint('Settings', 'report_summary_max_tokens', fallback=1024),
+            'summary_cache_file': config.get(
+                'Settings', 'summary_cache_file',
+                fallback=os.path.join(configuration['state_dir'], 'summary_cache.json')
+            ),
+        })
+
+        # Index plein texte des rapports archivés
+        configuration.update({
+            'report_index': config.getboolean('Settings', 'report_index', fallback=True),
+            'report_index_db': config.get(
+                'Settings', 'report_index_db',
+                fallback=os.path.join(configuration['state_dir'], 'report_index.db')
+            ),
+        })
+
+        # Coordination multi-instances (baux sur base SQLite partagée)
+        configuration.update({
+            'coordination_db': config.get('Settings', 'coordination_db', fallback=''),
+            'instance_id': config.get('Settings', 'instance_id', fallback=''),
+            'lease_ttl': config.getint('Settings', 'lease_ttl', fallback=default_lease_ttl(configuration)),
+        })
+
+        # Filtre statistique d'anomalies avant appel IA
+        configuration.update({
+            'forward_patterns': config.get('Settings', 'forward_patterns', fallback=DEFAULT_FORWARD_PATTERNS),
+            'anomaly_gate': config.getboolean('Settings', 'anomaly_gate', fallback=False),
+            'anomaly_threshold': config.getfloat('Settings', 'anomaly_threshold', fallback=3.0),
+            'anomaly_alpha': config.getfloat('Settings', 'anomaly_alpha', fallback=0.1),
+            'anomaly_warmup': config.getint('Settings', 'anomaly_warmup', fallback=10),
+            'anomaly_state_file': config.get(
+                'Settings', 'anomaly_state_file',
+                fallback=os.path.join(configuration['state_dir'], 'anomaly_baselines.json')
+            ),
+        })
     except Exception as e:
         raise ConfigurationError(f"Erreur lors de la lecture de la configuration : {e}")
 
@@ -137,6 +341,82 @@ def validate_configuration(config):
     if config.get('log_check_interval') and config['log_check_interval'] < 1:
         errors.append("log_check_interval doit être >= 1")
 
+    if config.get('token_budget') and config['token_budget'] < 0:
+        errors.append("token_budget doit être >= 0")
+
+    if config.get('token_budget_period') and config['token_budget_period'] not in ('day', 'hour'):
+        errors.append("token_budget_period doit être 'day' ou 'hour'")
+
+    if config.get('correlation_max_lines') is not None and config['correlation_max_lines'] < 1:
+        errors.append("correlation_max_lines doit être >= 1")
+
+    if config.get('shed_policy') and config['shed_policy'] not in SHED_POLICIES:
+        errors.append(f"shed_policy doit être parmi : {', '.join(SHED_POLICIES)}")
+
+    for field in ('syslog_udp_port', 'syslog_tcp_port'):
+        if config.get(field) and not (1 <= config[field] <= 65535):
+            errors.append(f"{field} doit être entre 1 et 65535 (0 = désactivé)")
+
+    if config.get('ai_requests_per_minute', 0) < 0 or config.get('ai_tokens_per_minute', 0) < 0:
+        errors.append("ai_requests_per_minute et ai_tokens_per_minute doivent être >= 0")
+
+    if 'ai_max_concurrent' in config and config['ai_max_concurrent'] < 1:
+        errors.append("ai_max_concurrent doit être >= 1")
+
+    if config.get('adaptive_polling'):
+        if not 0 < config.get('poll_min_interval', 1) <= config.get('poll_max_interval', 1):
+            errors.append("poll_min_interval doit être > 0 et <= poll_max_interval")
+        if config.get('poll_backoff', 2.0) <= 1:
+            errors.append("poll_backoff doit être > 1")
+
+    if config.get('analyzer_backend', 'mistral') not in BACKENDS:
+        errors.append(f"analyzer_backend doit être parmi : {', '.join(BACKENDS)}")
+
+    if config.get('analyzer_deadline', 0) < 0:
+        errors.append("analyzer_deadline doit être >= 0")
+
+    if config.get('ai_structured_output') and config.get('ai_structured_max_tokens', 1) < 1:
+        errors.append("ai_structured_max_tokens doit être >= 1")
+
+    if config.get('multiline_files'):
+        for key in ('multiline_start_pattern', 'multiline_hold_pattern'):
+            if config.get(key):
+                try:
+                    re.compile(config[key])
+                except re.error as e:
+                    errors.append(f"{key} invalide : {e}")
+        if config.get('multiline_timeout', 1) < 0:
+            errors.append("multiline_timeout doit être >= 0")
+        if config.get('multiline_max_lines', 1) < 1 or config.get('multiline_max_bytes', 1) < 1:
+            errors.append("multiline_max_lines et multiline_max_bytes doivent être >= 1")
+
+    if config.get('microbatch'):
+        if config.get('microbatch_max_lines', 1) < 1:
+            errors.append("microbatch_max_lines doit être >= 1")
+        if config.get('microbatch_max_bytes', 0) < 0 or config.get('microbatch_max_age', 0) < 0:
+            errors.append("microbatch_max_bytes et microbatch_max_age doivent être >= 0")
+
+    if config.get('similarity_dedup'):
+        if not 0 < config.get('similarity_threshold', 0.9) <= 1:
+            errors.append("similarity_threshold doit être entre 0 et 1")
+        if config.get('similarity_max_entries', 1) < 1:
+            errors.append("similarity_max_entries doit être >= 1")
+
+    if config.get('report_fsync_interval', 0) < 0:
+        errors.append("report_fsync_interval doit être >= 0")
+
+    if 'watchdog_lag_threshold' in config and config['watchdog_lag_threshold'] <= 0:
+        errors.append("watchdog_lag_threshold doit être > 0")
+
+    if config.get('coordination_db') and config.get('lease_ttl', 0) <= max_cycle_time(config):
+        errors.append(
+            f"lease_ttl doit être supérieur à la durée maximale d'un cycle ({max_cycle_time(config):g}s : "
+            f"intervalle allongé par le gouverneur de budget + {CYCLE_TASK_TIMEOUT}s d'analyse)"
+        )
+
+    if config.get('anomaly_alpha') and not (0 < config['anomaly_alpha'] <= 1):
+        errors.append("anomaly_alpha doit être entre 0 et 1")
+
     return len(errors) == 0, errors
 
 
@@ -155,6 +435,50 @@ def print_configuration_summary(config):
     print(f"⏱️  Intervalle de vérification : {config['log_check_interval']}s")
     print(f"🤖 Température IA : {config['ai_temperature']}")
     print(f"🤖 Tokens max : {config['ai_max_tokens']}")
+    if config.get('token_budget'):
+        print(f"💰 Budget tokens : {config['token_budget']} / {config['token_budget_period']}")
+    if config.get('correlation_mode'):
+        print(f"🔗 Mode corrélation : {config['correlation_max_lines']} lignes max par cycle")
+    if config.get('byte_prefilter'):
+        print(f"🔎 Préfiltre binaire : {config['byte_prefilter']}")
+    if config.get('backpressure_max_lines'):
+        print(f"🔻 Contre-pression : {config['backpressure_max_lines']} lignes max par lot ({config['shed_policy']})")
+    if config.get('profiling'):
+        print(f"⏱️  Profilage des cycles activé (capture : kill -USR1 <pid>)")
+    if config.get('syslog_enabled'):
+        print(f"📡 Réception syslog : {config['syslog_bind']} "
+              f"(UDP {config['syslog_udp_port'] or '-'}, TCP {config['syslog_tcp_port'] or '-'})")
+    if config.get('ai_requests_per_minute') or config.get('ai_tokens_per_minute') or config.get('ai_priorities'):
+        print(f"🚦 File d'appels IA : {config['ai_requests_per_minute'] or '∞'} requêtes/min, "
+              f"{config['ai_tokens_per_minute'] or '∞'} tokens/min, {len(config['ai_priorities'])} priorités")
+    if config.get('adaptive_polling'):
+        print(f"⏱️  Vérifications adaptatives : entre {config['poll_min_interval']:g}s et "
+              f"{config['poll_max_interval']:g}s par fichier")
+    if config.get('access_log_summary'):
+        print(f"📈 Logs d'accès web résumés (top {config['access_log_top_k']}, "
+              f"{config['access_log_outliers']} lignes atypiques max)")
+    if config.get('analyzer_backend', 'mistral') != 'mistral' or config.get('analyzer_backends'):
+        print(f"🧠 Moteur d'analyse : {config['analyzer_backend']} "
+              f"({len(config['analyzer_backends'])} choix par fichier)")
+    if config.get('analyzer_deadline'):
+        print(f"🛟 Bascule heuristique après {config['analyzer_deadline']:g}s")
+    if config.get('ai_structured_output'):
+        print(f"🧾 Sortie JSON structurée ({min(config['ai_max_tokens'], config['ai_structured_max_tokens'])} tokens max)")
+    if config.get('multiline_files'):
+        print(f"🧩 Événements multi-lignes : {', '.join(config['multiline_files'])} "
+              f"(délai {config['multiline_timeout']:g}s)")
+    if config.get('microbatch'):
+        print(f"🧺 Micro-lots : {config['microbatch_max_lines']} lignes, "
+              f"{config['microbatch_max_bytes']} octets ou {config['microbatch_max_age']:g}s max")
+    if config.get('similarity_dedup'):
+        print(f"♻️  Lots quasi identiques réutilisés (similarité ≥ {config['similarity_threshold']:.0%}, "
+              f"{config['similarity_max_age']:g}h max)")
+    if config.get('report_summarize'):
+        print(f"📝 Rapport quotidien synthétisé ({config['report_summary_workers']} synthèses en parallèle)")
+    if config.get('coordination_db'):
+        print(f"🤝 Coordination multi-instances : {config['coordination_db']} (bail {config['lease_ttl']}s)")
+    if config.get('anomaly_gate'):
+        print(f"📉 Filtre d'anomalies : seuil {config['anomaly_threshold']}")
     print(f"📄 Rapport quotidien : {config['daily_report_file']}")
     print(f"🔑 Clé API IA : {'✓ Configurée' if config['ai_api_key'] else '✗ Manquante'}")
     print(f"🔑 Mot de passe SMTP : {'✓ Configuré' if config['smtp_password'] else '✗ Manquant'}")
@@ -0,0 +1,252 @@
+"""
+Module de coordination multi-instances : baux de propriété des fichiers
+et positions de lecture partagées (SQLite sur stockage partagé)
+"""
+import os
+import json
+import math
+import time
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from token_budget import GOVERNOR_LEVELS
+
+# Attente maximale, dans un cycle, des lectures et analyses des fichiers (secondes)
+CYCLE_TASK_TIMEOUT = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    instance_id TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    log_file TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS offsets (
+    log_file TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    pending TEXT
+);
+"""
+
+
+def default_instance_id():
+    """
+    Returns:
+        str: Identifiant unique de l'instance (hôte:pid)
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def max_cycle_time(config):
+    """
+    Durée maximale entre deux renouvellements de bail : attente la plus
+    longue (intervalle ou vérifications adaptatives, allongée au maximum par
+    le gouverneur de budget) plus l'attente des lectures et analyses du cycle
+
+    Args:
+        config (dict): Configuration
+
+    Returns:
+        float: Durée en secondes
+    """
+    interval = config.get('log_check_interval', 0)
+    if config.get('adaptive_polling'):
+        interval = max(interval, config.get('poll_max_interval') or 4 * interval)
+    if config.get('token_budget'):
+        interval *= max(level[4] for level in GOVERNOR_LEVELS)
+    return interval + CYCLE_TASK_TIMEOUT
+
+
+def default_lease_ttl(config):
+    """
+    Returns:
+        int: Durée de bail par défaut : cycle le plus long plus un intervalle de marge
+    """
+    return math.ceil(max_cycle_time(config) + config.get('log_check_interval', 0))
+
+
+class LeaseCoordinator:
+    """Répartit les fichiers surveillés entre instances par baux renouvelables"""
+
+    def __init__(self, db_path, instance_id=None, lease_ttl=60):
+        """
+        Args:
+            db_path (str): Base SQLite partagée entre les instances
+            instance_id (str): Identifiant de cette instance
+            lease_ttl (float): Durée de validité d'un bail (secondes) ; une
+                instance qui ne renouvelle plus perd ses fichiers à expiration
+        """
+        self.db_path = db_path
+        self.instance_id = instance_id or default_instance_id()
+        self.lease_ttl = lease_ttl
+        self.owned = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+            try:
+                # Bases créées avant le partage des lignes en attente
+                db.execute("ALTER TABLE offsets ADD COLUMN pending TEXT")
+            except sqlite3.OperationalError:
+                pass
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le coordinateur à partir de la configuration"""
+        return cls(
+            config['coordination_db'],
+            instance_id=config.get('instance_id') or None,
+            lease_ttl=config.get('lease_ttl', 60)
+        )
+
+    @contextmanager
+    def _connect(self):
+        """Ouvre une connexion (une par appel : utilisable depuis plusieurs threads)"""
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def acquire(self, log_files, now=None):
+        """
+        Renouvelle les baux détenus et acquiert la part équitable des fichiers
+        libres ou dont le bail a expiré
+
+        Args:
+            log_files (list): Fichiers à répartir
+            now (float): Horodatage de référence
+
+        Returns:
+            list: Fichiers dont cette instance est propriétaire
+        """
+        now = now if now is not None else time.time()
+        expires_at = now + self.lease_ttl
+
+        with self._lock, self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT INTO instances (instance_id, last_seen) VALUES (?, ?) "
+                    "ON CONFLICT(instance_id) DO UPDATE SET last_seen = excluded.last_seen",
+                    (self.instance_id, now)
+                )
+                db.execute("DELETE FROM instances WHERE last_seen < ?", (now - self.lease_ttl,))
+                live_instances = db.execute("SELECT COUNT(*) FROM instances").fetchone()[0]
+                fair_share = math.ceil(len(log_files) / max(1, live_instances))
+
+                leases = {
+                    log_file: (owner, lease_expiry)
+                    for log_file, owner, lease_expiry in db.execute("SELECT log_file, owner, expires_at FROM leases")
+                }
+
+                owned = [f for f in log_files if leases.get(f, (None, 0))[0] == self.instance_id
+                         and leases[f][1] >= now]
+
+                # Rendre les fichiers en excès lorsque de nouvelles instances arrivent
+                for log_file in owned[fair_share:]:
+                    db.execute("DELETE FROM leases WHERE log_file = ? AND owner = ?", (log_file, self.instance_id))
+                owned = owned[:fair_share]
+
+                for log_file in log_files:
+                    if len(owned) >= fair_share:
+                        break
+                    owner, lease_expiry = leases.get(log_file, (None, 0))
+                    if owner is None or (owner != self.instance_id and lease_expiry < now):
+                        owned.append(log_file)
+
+                for log_file in owned:
+                    db.execute(
+                        "INSERT INTO leases (log_file, owner, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(log_file) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at",
+                        (log_file, self.instance_id, expires_at)
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+
+        gained = set(owned) - self.owned
+        lost = self.owned - set(owned)
+        if gained:
+            print(f"🤝 Fichiers acquis par {self.instance_id} : {', '.join(sorted(gained))}")
+        if lost:
+            print(f"🤝 Fichiers cédés par {self.instance_id} : {', '.join(sorted(lost))}")
+        self.owned = set(owned)
+        return [log_file for log_file in log_files if log_file in self.owned]
+
+    def release(self):
+        """Libère les baux de cette instance (arrêt propre)"""
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM leases WHERE owner = ?", (self.instance_id,))
+            db.execute("DELETE FROM instances WHERE instance_id = ?", (self.instance_id,))
+        self.owned = set()
+
+    def load_offset(self, log_file):
+        """
+        Returns:
+            int: Dernière position partagée pour ce fichier (None si inconnue)
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT position FROM offsets WHERE log_file = ?", (log_file,)).fetchone()
+        return row[0] if row else None
+
+    def load_pending(self, log_file):
+        """
+        Returns:
+            dict: Lignes lues mais pas encore analysées publiées avec la
+                position (micro-lot, événement multi-lignes), vide si aucune
+        """
+        with self._connect() as db:
+            row = db.execute("SELECT pending FROM offsets WHERE log_file = ?", (log_file,)).fetchone()
+        return json.loads(row[0]) if row and row[0] else {}
+
+    def save_offset(self, log_file, position, pending=None):
+        """
+        Publie la position lue, uniquement si le bail est toujours détenu et
+        n'a pas expiré (un autre propriétaire a pu reprendre le fichier)
+
+        Les lignes déjà lues mais encore en attente d'analyse sont publiées
+        dans la même écriture : l'instance qui reprend le fichier repart de
+        cette position avec ces lignes, rien n'est perdu.
+
+        Args:
+            log_file (str): Fichier de log
+            position (int): Nouvelle position
+            pending (dict): Lignes en attente par composant (optionnel)
+
+        Returns:
+            bool: True si la position a été enregistrée
+        """
+        now = time.time()
+        pending = json.dumps(pending) if pending else None
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT INTO offsets (log_file, position, updated_at, pending) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS "
+                "(SELECT 1 FROM leases WHERE log_file = ? AND owner = ? AND expires_at > ?) "
+                "ON CONFLICT(log_file) DO UPDATE SET position = excluded.position, "
+                "updated_at = excluded.updated_at, pending = excluded.pending",
+                (log_file, position, now, pending, log_file, self.instance_id, now)
+            )
+        return cursor.rowcount > 0
+
+    def report_section(self):
+        """
+        Returns:
+            str: Répartition des fichiers pour le rapport quotidien
+        """
+        with self._connect() as db:
+            leases = db.execute("SELECT log_file, owner FROM leases ORDER BY log_file").fetchall()
+        lines = [f"🤝 COORDINATION MULTI-INSTANCES (instance : {self.instance_id})"]
+        lines += [f"  {log_file} : {owner}" for log_file, owner in leases]
+        if len(lines) == 1:
+            lines.append("  Aucun bail actif")
+        return "\n".join(lines)
@@ -7,6 +7,10 @@ import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
+from report_index import index_archived_report
+from report_summarizer import build_report_digest
+from report_writer import REPORT_HEADER, pending_reports
+
 
 class EmailSenderError(Exception):
     """Exception levée en cas d'erreur d'envoi d'email"""
@@ -126,12 +130,18 @@ Pour plus d'informations, consultez le rapport quotidien.
         return False
 
 
-def send_daily_report(config):
+def send_daily_report(config, extra_sections=None, budget=None, writer=None, dispatcher=None):
     """
     Envoie le rapport quotidien des analyses de logs
 
     Args:
         config (dict): Configuration
+        extra_sections (callable): Fonction retournant des sections à ajouter
+            en fin de rapport (consommation de tokens, ...)
+        budget (TokenBudget): Compteur de tokens des synthèses (optionnel)
+        writer (ReportWriter): Écrivain unique du rapport ; le rapport est alors
+            mis de côté par rotation atomique et aucune entrée n'est perdue
+        dispatcher (AIDispatcher): File d'appels IA des synthèses (limites de débit, 429)
 
     Returns:
         bool: True si l'envoi a réussi ou si aucun rapport à envoyer
@@ -139,31 +149,62 @@ def send_daily_report(config):
     daily_report_file = config['daily_report_file']
 
     try:
-        if not os.path.exists(daily_report_file):
+        if writer is not None:
+            # Rotation par l'écrivain : les analyses suivantes vont dans un nouveau fichier.
+            # Les rapports dont l'envoi a échoué sont repris au prochain envoi.
+            writer.rotate()
+            pending = pending_reports(daily_report_file)
+            if not pending:
+                print("ℹ️  Aucune activité à rapporter aujourd'hui")
+                return True
+            report_content = _merge_reports(pending)
+        elif not os.path.exists(daily_report_file):
             print("ℹ️  Aucun fichier de rapport quotidien trouvé")
             return True
-
-        with open(daily_report_file, "r", encoding='utf-8') as file:
-            report_content = file.read()
+        else:
+            with open(daily_report_file, "r", encoding='utf-8') as file:
+                report_content = file.read()
 
         # Vérifier si le rapport contient du contenu utile
-        if not report_content.strip() or report_content.strip() == "📊 Rapport quotidien des logs":
+        if not report_content.strip() or report_content.strip() == REPORT_HEADER.strip():
             print("ℹ️  Aucune activité à rapporter aujourd'hui")
-            _reset_daily_report(daily_report_file)
+            if writer is None:
+                _reset_daily_report(daily_report_file)
             return True
 
+        # Synthétiser le rapport : l'email reste court, l'archive garde le détail
+        email_content = report_content
+        if config.get('report_summarize'):
+            try:
+                email_content = build_report_digest(report_content, config, budget, dispatcher)
+            except Exception as e:
+                print(f"⚠️  Synthèse du rapport impossible, envoi du rapport complet : {e}")
+
+        # Ajouter les sections complémentaires
+        if extra_sections is not None:
+            extra_content = extra_sections()
+            if extra_content:
+                report_content = f"{report_content.rstrip()}\n\n{'='*60}\n{extra_content}\n"
+                email_content = f"{email_content.rstrip()}\n\n{'='*60}\n{extra_content}\n"
+
         # Envoyer le rapport
         subject = f"📊 Rapport quotidien des logs - {datetime.date.today()}"
-        success = send_email(subject, report_content, config)
+        success = send_email(subject, email_content, config)
 
         if success:
             print(f"📧 Rapport quotidien envoyé pour le {datetime.date.today()}")
 
             # Archiver l'ancien rapport
-            _archive_report(daily_report_file, report_content)
+            archive_name = _archive_report(daily_report_file, report_content)
+            if archive_name:
+                index_archived_report(config, archive_name, report_content)
 
-            # Réinitialiser le fichier
-            _reset_daily_report(daily_report_file)
+            # Réinitialiser le fichier (ou supprimer les rapports mis de côté)
+            if writer is None:
+                _reset_daily_report(daily_report_file)
+            else:
+                for path in pending:
+                    os.remove(path)
 
         return success
 
@@ -172,8 +213,20 @@ def send_daily_report(config):
         return False
 
 
+def _merge_reports(paths):
+    """Concatène les rapports mis de côté (un seul en-tête)"""
+    parts = []
+    for path in paths:
+        with open(path, "r", encoding='utf-8') as file:
+            content = file.read()
+        if parts and content.startswith(REPORT_HEADER):
+            content = content[len(REPORT_HEADER):]
+        parts.append(content)
+    return "".join(parts)
+
+
 def _archive_report(report_file, content):
-    """Archive le rapport quotidien"""
+    """Archive le rapport quotidien et retourne le chemin de l'archive (None en cas d'échec)"""
     try:
         archive_dir = os.path.join(os.path.dirname(report_file), "archives")
         os.makedirs(archive_dir, exist_ok=True)
@@ -187,15 +240,17 @@ def _archive_report(report_file, content):
             archive.write(content)
 
         print(f"📦 Rapport archivé : {archive_name}")
+        return archive_name
     except Exception as e:
         print(f"⚠️  Impossible d'archiver le rapport : {e}")
+        return None
 
 
 def _reset_daily_report(report_file):
     """Réinitialise le fichier de rapport quotidien"""
     try:
         with open(report_file, "w", encoding='utf-8') as file:
-            file.write("📊 Rapport quotidien des logs\n")
+            file.write(REPORT_HEADER)
     except Exception as e:
         print(f"⚠️  Impossible de réinitialiser le rapport : {e}")
 
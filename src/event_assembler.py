@@ -0,0 +1,262 @@
+"""
+Module d'assemblage des événements multi-lignes (traces de pile, lignes de
+continuation) : un événement complet devient l'unité des lots, du
+dédoublonnage et des caches
+"""
+import os
+import re
+import json
+import time
+import threading
+from fnmatch import fnmatch
+
+from anomaly_scorer import compile_forward_patterns
+
+# Début d'événement par défaut : ligne commençant par un horodatage, un
+# en-tête entre crochets ou une adresse IP (les continuations commencent par
+# une indentation, "at ...", "#0 ...", "Caused by: ...", ...)
+DEFAULT_START_PATTERN = (
+    r"^(?:\[|\d{4}-\d{2}-\d{2}|\d{2}-[A-Z][a-z]{2}-\d{4}|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}|"
+    r"\d{1,3}(?:\.\d{1,3}){3} )"
+)
+
+# Dernière ligne d'un événement dont la suite peut encore arriver : ligne de
+# continuation (indentation, "at ...", "Caused by:", "#0 ...", classe
+# d'exception en début de ligne) ou annonce explicite d'une trace
+# ("Traceback", "Stack trace", ligne finissant par ":"). Une simple ligne
+# d'erreur ([php:error], "error: ...") est transmise sans attente.
+DEFAULT_HOLD_PATTERN = (
+    r"^(?:\s|at |Caused by:|#\d+ |\.\.\. \d+ more|[\w$.]+(?:Exception|Error)\b)|Traceback|Stack trace|:\s*$"
+)
+
+# Tranches de l'histogramme des tailles d'événements (lignes)
+SIZE_BUCKETS = ((1, "1"), (5, "2-5"), (20, "6-20"), (100, "21-100"), (None, ">100"))
+
+
+def _size_bucket(size):
+    for limit, label in SIZE_BUCKETS:
+        if limit is None or size <= limit:
+            return label
+
+
+class EventAssembler:
+    """Regroupe les lignes de continuation avec la ligne de début de leur événement"""
+
+    def __init__(self, files, start_pattern=DEFAULT_START_PATTERN, flush_timeout=5.0,
+                 max_lines=200, max_bytes=32768, hold_pattern=DEFAULT_HOLD_PATTERN, state_file=None,
+                 forward_patterns=None):
+        """
+        Args:
+            files (list): Motifs des fichiers ou flux à assembler
+            start_pattern (str): Expression régulière d'une ligne de début d'événement
+            flush_timeout (float): Délai en secondes après lequel un événement en
+                attente de continuation est transmis avec le lot suivant du fichier
+            max_lines (int): Lignes maximum par événement (au-delà, découpage)
+            max_bytes (int): Taille maximum d'un événement en octets (au-delà, découpage)
+            hold_pattern (str): Expression régulière de la dernière ligne d'un
+                événement pouvant encore se poursuivre (seuls ceux-ci attendent)
+            state_file (str): Fichier JSON des événements en attente (None = en mémoire)
+            forward_patterns (str): Motifs toujours transmis : un événement qui en
+                contient un n'attend jamais sa suite
+        """
+        self.files = files
+        self.start_regex = re.compile(start_pattern)
+        self.hold_regex = re.compile(hold_pattern, re.IGNORECASE)
+        self.forward_regex = compile_forward_patterns(forward_patterns)
+        self.state_file = state_file
+        self.flush_timeout = flush_timeout
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self.histogram = {label: 0 for _, label in SIZE_BUCKETS}
+        self._lock = threading.Lock()
+        self._pending = self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit l'assembleur à partir de la configuration"""
+        return cls(
+            config['multiline_files'],
+            start_pattern=config.get('multiline_start_pattern') or DEFAULT_START_PATTERN,
+            flush_timeout=config.get('multiline_timeout', 5.0),
+            max_lines=config.get('multiline_max_lines', 200),
+            max_bytes=config.get('multiline_max_bytes', 32768),
+            hold_pattern=config.get('multiline_hold_pattern') or DEFAULT_HOLD_PATTERN,
+            state_file=config.get('multiline_state_file'),
+            forward_patterns=config.get('forward_patterns')
+        )
+
+    def applies_to(self, source):
+        """
+        Returns:
+            bool: True si les lignes du fichier ou flux sont assemblées
+        """
+        return any(source == pattern or fnmatch(source, pattern) for pattern in self.files)
+
+    def _emit(self, source, event, reason=None):
+        """Enregistre les statistiques d'un événement et retourne son texte"""
+        size = len(event['lines'])
+        stats = self.stats.setdefault(source, {
+            'events': 0, 'multiline': 0, 'lines': 0, 'max_lines': 0, 'split': 0, 'timeouts': 0,
+        })
+        stats['events'] += 1
+        stats['lines'] += size
+        stats['max_lines'] = max(stats['max_lines'], size)
+        if size > 1:
+            stats['multiline'] += 1
+        if reason is not None:
+            stats[reason] += 1
+        self.histogram[_size_bucket(size)] += 1
+        return "".join(event['lines'])
+
+    def feed(self, source, lines, now=None):
+        """
+        Assemble les nouvelles lignes d'un fichier en événements
+
+        Le dernier événement ne reste en attente que si sa dernière ligne
+        annonce une suite (hold_pattern) et qu'il ne contient aucun motif
+        toujours transmis ; il est alors joint au lot suivant du fichier, au
+        plus tard après flush_timeout (voir next_delay).
+
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            lines (list): Nouvelles lignes physiques
+            now (float): Horodatage monotone de référence
+
+        Returns:
+            list: Événements complets (lignes jointes)
+        """
+        now = now if now is not None else time.time()
+        events = []
+        with self._lock:
+            event = self._pending.pop(source, None)
+            for line in lines:
+                if not line.endswith('\n'):
+                    line += '\n'
+                if event is not None and not self.start_regex.match(line):
+                    size = len(line.encode('utf-8'))
+                    if len(event['lines']) < self.max_lines and event['bytes'] + size <= self.max_bytes:
+                        event['lines'].append(line)
+                        event['bytes'] += size
+                        event['updated'] = now
+                        continue
+                    # Événement trop grand : transmis tel quel, la suite forme un nouvel événement
+                    events.append(self._emit(source, event, 'split'))
+                elif event is not None:
+                    events.append(self._emit(source, event))
+                event = {'lines': [line], 'bytes': len(line.encode('utf-8')), 'updated': now}
+
+            if event is not None:
+                if not self._holds(event):
+                    events.append(self._emit(source, event))
+                elif now - event['updated'] >= self.flush_timeout:
+                    events.append(self._emit(source, event, 'timeouts'))
+                else:
+                    self._pending[source] = event
+        return events
+
+    def _holds(self, event):
+        """Indique si un événement peut encore se poursuivre et doit attendre sa suite"""
+        if not self.hold_regex.search(event['lines'][-1]):
+            return False
+        return self.forward_regex is None or not any(self.forward_regex.search(line) for line in event['lines'])
+
+    def next_delay(self, now=None):
+        """
+        Returns:
+            float: Secondes avant l'échéance du plus ancien événement en attente,
+                ou None s'il n'y en a aucun
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            if not self._pending:
+                return None
+            oldest = min(event['updated'] for event in self._pending.values())
+        return max(0.0, oldest + self.flush_timeout - now)
+
+    def flush_expired(self, now=None):
+        """
+        Transmet les événements sans nouvelle ligne depuis flush_timeout (fichiers
+        ou flux qui n'ont pas été lus à ce cycle)
+
+        Returns:
+            dict: {source: [événement]}
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [source for source, event in self._pending.items()
+                       if now - event['updated'] >= self.flush_timeout]
+            return {source: [self._emit(source, self._pending.pop(source), 'timeouts')] for source in expired}
+
+    def export(self, source):
+        """
+        Returns:
+            dict: Événement en attente du fichier (sérialisable), ou None
+        """
+        with self._lock:
+            event = self._pending.get(source)
+            return {**event, 'lines': list(event['lines'])} if event else None
+
+    def restore(self, source, event):
+        """
+        Remplace l'événement en attente d'un fichier (reprise d'un fichier d'une autre instance)
+
+        Args:
+            source (str): Fichier de log
+            event (dict): Événement exporté par export(), None pour l'abandonner
+        """
+        with self._lock:
+            if event:
+                self._pending[source] = event
+            else:
+                self._pending.pop(source, None)
+
+    def _load(self):
+        """Charge les événements en attente depuis le disque"""
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, "r", encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️  Impossible de charger les événements multi-lignes en attente : {e}")
+            return {}
+
+    def save(self):
+        """Écrit les événements en attente de manière atomique"""
+        if not self.state_file:
+            return
+        with self._lock:
+            data = json.dumps(self._pending)
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, "w", encoding='utf-8') as file:
+                file.write(data)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder les événements multi-lignes en attente : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Tailles des événements assemblés par fichier pour le rapport quotidien
+        """
+        lines = ["🧩 ÉVÉNEMENTS MULTI-LIGNES"]
+        with self._lock:
+            for source, stats in sorted(self.stats.items()):
+                average = stats['lines'] / stats['events'] if stats['events'] else 0.0
+                lines.append(
+                    f"  {source} : {stats['events']} événements ({stats['multiline']} multi-lignes), "
+                    f"{average:.1f} lignes en moyenne, max {stats['max_lines']}, "
+                    f"{stats['split']} découpés, {stats['timeouts']} transmis après délai"
+                )
+            if len(lines) == 1:
+                lines.append("  Aucun événement")
+            else:
+                lines.append("  Tailles (lignes) : " + ", ".join(
+                    f"{label} : {count}" for label, count in self.histogram.items()
+                ))
+        return "\n".join(lines)
@@ -0,0 +1,64 @@
+"""
+Module de compaction des lignes de logs avant envoi à l'IA
+"""
+import re
+
+# Motifs variables remplacés lors de la normalisation (ordre important)
+_NORMALIZATION_PATTERNS = [
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}\b'), '<IP>'),
+    (re.compile(r'\b[0-9a-fA-F]{8,}\b'), '<HEX>'),
+    (re.compile(r'\d+'), '<N>'),
+]
+
+
+def normalize_line(line):
+    """
+    Normalise une ligne de log en remplaçant les parties variables
+    (adresses IP, identifiants hexadécimaux, nombres)
+
+    Args:
+        line (str): Ligne de log brute
+
+    Returns:
+        str: Gabarit de la ligne
+    """
+    template = line.strip()
+    for pattern, placeholder in _NORMALIZATION_PATTERNS:
+        template = pattern.sub(placeholder, template)
+    return template
+
+
+def compact_logs(logs, max_lines=None):
+    """
+    Compacte une liste de lignes : les lignes de même gabarit sont regroupées
+    (première occurrence conservée avec un compteur), puis la liste est
+    échantillonnée uniformément si elle dépasse max_lines
+
+    Args:
+        logs (list): Lignes de logs
+        max_lines (int): Nombre maximum de lignes conservées (None = illimité)
+
+    Returns:
+        list: Lignes compactées
+    """
+    first_lines = {}
+    counts = {}
+    for line in logs:
+        template = normalize_line(line)
+        if template not in counts:
+            first_lines[template] = line
+            counts[template] = 0
+        counts[template] += 1
+
+    compacted = []
+    for template, line in first_lines.items():
+        line = line.rstrip('\n')
+        if counts[template] > 1:
+            line = f"{line} [x{counts[template]}]"
+        compacted.append(line + '\n')
+
+    if max_lines and len(compacted) > max_lines:
+        step = len(compacted) / max_lines
+        compacted = [compacted[int(i * step)] for i in range(max_lines)]
+
+    return compacted
@@ -8,16 +8,47 @@ import sys
 import time
 import datetime
 import schedule
-from mistralai import Mistral
 from concurrent.futures import ThreadPoolExecutor
 
 # Imports locaux
+from access_log_stats import AccessLogSummarizer
+from ai_client import chat_complete
+from ai_dispatcher import AIDispatcher
+from analyzer_backends import (
+    HEURISTIC_MARKER, AnalyzerRouter, HeuristicBackend, analysis_messages, extract_severity_score
+)
+from anomaly_scorer import AnomalyScorer
+from backpressure import BackpressureMonitor
+from byte_reader import compile_byte_filter, read_new_lines
+from coordination import CYCLE_TASK_TIMEOUT, LeaseCoordinator
 from config_loader import load_configuration, print_configuration_summary, validate_configuration
 from email_sender import send_alert_email, send_daily_report
+from event_assembler import EventAssembler
+from log_compactor import compact_logs
+from micro_batcher import MicroBatcher
+from poll_scheduler import PollScheduler
+from profiling import NO_STAGE, CycleProfiler
+from report_writer import REPORT_HEADER, ReportWriter
+from similarity_index import SimilarityIndex, reused_analysis
+from structured_analysis import (
+    JSON_RESPONSE_FORMAT, StructuredOutputError, parse_record, render_record, structured_config, structured_messages
+)
+from syslog_receiver import SyslogReceiver
+from token_budget import TokenBudget
+from loop_watchdog import LoopWatchdog
 
 # Variable globale pour arrêt propre
 shutdown_flag = False
 
+# Composants retenant des lignes lues mais pas encore analysées
+PENDING_COMPONENTS = ('assembler', 'batcher')
+
+# Score de gravité à partir duquel une alerte est envoyée
+ALERT_SEVERITY = 7
+
+# Marqueur des analyses en échec (jamais réutilisées pour un lot similaire)
+AI_ERROR_MARKER = "Erreur d'analyse IA"
+
 
 def signal_handler(sig, frame):
     """Gestionnaire de signal pour arrêt propre"""
@@ -30,22 +61,47 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 
-def read_new_logs(log_file, last_position):
+def stage(runtime, name):
+    """
+    Retourne le contexte de mesure d'une étape (neutre si le profilage est désactivé)
+
+    Args:
+        runtime (dict): Composants d'exécution partagés
+        name (str): Nom de l'étape (read, filter, ai, report, email)
+    """
+    profiler = runtime.get('profiler') if runtime else None
+    return profiler.stage(name) if profiler is not None else NO_STAGE
+
+
+def read_new_logs(log_file, last_position, line_queue=None, resync=False, byte_filter=None):
     """
     Lit les nouvelles lignes d'un fichier log depuis la dernière position lue
 
+    La région nouvelle est lue en octets (mmap pour les gros volumes) et seules
+    les lignes retenues par le préfiltre binaire sont décodées.
+
     Args:
         log_file (str): Chemin du fichier de log
         last_position (int): Position du dernier octet lu
+        line_queue (BoundedLineQueue): File bornée recevant les lignes au fil
+            de la lecture (délestage sans tout conserver en mémoire)
+        resync (bool): Ignorer la première ligne, potentiellement tronquée
+        byte_filter (re.Pattern): Préfiltre binaire appliqué avant décodage
 
     Returns:
         tuple: (nouvelles_lignes, nouvelle_position)
     """
     try:
-        with open(log_file, "r", encoding='utf-8', errors='ignore') as file:
-            file.seek(last_position)
-            new_logs = file.readlines()
-            last_position = file.tell()
+        with open(log_file, "rb") as file:
+            new_logs, last_position = read_new_lines(
+                file,
+                last_position,
+                byte_filter=byte_filter,
+                resync=resync,
+                sink=line_queue.offer if line_queue is not None else None
+            )
+        if line_queue is not None:
+            new_logs = line_queue.drain()
         return new_logs, last_position
 
     except FileNotFoundError:
@@ -61,13 +117,16 @@ def read_new_logs(log_file, last_position):
         return [], last_position
 
 
-def analyze_logs_with_ai(logs, config):
+def analyze_logs_with_ai(logs, config, log_file=None, budget=None, dispatcher=None):
     """
     Analyse les logs via IA pour détecter des anomalies
 
     Args:
         logs (list): Liste des lignes de logs à analyser
         config (dict): Configuration contenant les paramètres IA
+        log_file (str): Fichier de log analysé (comptabilité des tokens)
+        budget (TokenBudget): Compteur de tokens à alimenter (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités (optionnel)
 
     Returns:
         str: Analyse générée par l'IA
@@ -75,64 +134,62 @@ def analyze_logs_with_ai(logs, config):
     if not logs:
         return "SEVERITY_SCORE: 0\nPas de nouvelles entrées dans les logs."
 
-    try:
-        client = Mistral(api_key=config['ai_api_key'])
-
-        # Log du modèle utilisé (pour debug)
-        model = config.get('ai_model', 'mistral-medium-latest')
+    if config.get('ai_structured_output'):
+        return analyze_logs_structured(logs, config, log_file=log_file, budget=budget, dispatcher=dispatcher)
 
-        response = client.chat.complete(
-            model=model,
-            temperature=config['ai_temperature'],
-            max_tokens=config['ai_max_tokens'],
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Tu es un expert en cybersécurité et en analyse de logs Linux. "
-                        "Pour chaque anomalie détectée, commence OBLIGATOIREMENT ta réponse par : "
-                        "'SEVERITY_SCORE: X' où X est un nombre entre 1 et 10 (1=bénin, 10=critique). "
-                        "Ensuite, décris les anomalies détectées et propose des recommandations claires. "
-                        "Si aucune anomalie n'est détectée, indique 'SEVERITY_SCORE: 0'."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Analyse les logs suivants et attribue un score de gravité. "
-                        f"Pour chaque anomalie, propose une solution ou une recommandation :"
-                        f"\n{''.join(logs)}"
-                    ),
-                }
-            ]
+    try:
+        return chat_complete(
+            analysis_messages(logs),
+            config,
+            log_file=log_file,
+            budget=budget,
+            dispatcher=dispatcher
         )
 
-        return response.choices[0].message.content.strip()
-
     except Exception as e:
         error_msg = f"❌ Erreur lors de l'analyse IA (modèle: {config.get('ai_model', 'unknown')}): {e}"
         print(error_msg)
-        return f"SEVERITY_SCORE: 0\nErreur d'analyse IA - Impossible de traiter les logs.\nDétails: {e}"
+        return f"SEVERITY_SCORE: 0\n{AI_ERROR_MARKER} - Impossible de traiter les logs.\nDétails: {e}"
 
 
-def extract_severity_score(analysis):
+def analyze_logs_structured(logs, config, log_file=None, budget=None, dispatcher=None):
     """
-    Extrait le score de gravité de l'analyse
+    Analyse les logs en mode structuré : réponse JSON compacte validée en
+    enregistrement typé, puis mise en forme pour le rapport et les alertes
 
     Args:
-        analysis (str): Texte d'analyse contenant le score
+        logs (list): Lignes de logs à analyser
+        config (dict): Configuration contenant les paramètres IA
+        log_file (str): Fichier de log analysé (comptabilité des tokens)
+        budget (TokenBudget): Compteur de tokens à alimenter (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités (optionnel)
 
     Returns:
-        int: Score de gravité entre 0 et 10
+        str: Analyse mise en forme, commençant par SEVERITY_SCORE
     """
-    match = re.search(r'SEVERITY_SCORE:\s*(\d+)', analysis)
-    if match:
-        score = int(match.group(1))
-        return max(0, min(10, score))
-    return 0
+    try:
+        response = chat_complete(
+            structured_messages(logs),
+            structured_config(config),
+            log_file=log_file,
+            budget=budget,
+            dispatcher=dispatcher,
+            response_format=JSON_RESPONSE_FORMAT
+        )
+        return render_record(parse_record(response), logs)
+
+    except StructuredOutputError as e:
+        # Réponse hors format : le score vient des signatures locales plutôt que d'un 0 silencieux
+        print(f"⚠️  {e} ({log_file}) : score heuristique utilisé")
+        return f"{HeuristicBackend().analyze(logs)}\n(Réponse structurée de l'IA invalide : {e})"
+
+    except Exception as e:
+        error_msg = f"❌ Erreur lors de l'analyse IA (modèle: {config.get('ai_model', 'unknown')}): {e}"
+        print(error_msg)
+        return f"SEVERITY_SCORE: 0\n{AI_ERROR_MARKER} - Impossible de traiter les logs.\nDétails: {e}"
 
 
-def save_analysis_to_report(log_file, analysis, config):
+def save_analysis_to_report(log_file, analysis, config, writer=None):
     """
     Sauvegarde l'analyse dans le fichier de rapport quotidien
 
@@ -140,7 +197,12 @@ def save_analysis_to_report(log_file, analysis, config):
         log_file (str): Nom du fichier de log analysé
         analysis (str): Résultat de l'analyse
         config (dict): Configuration
+        writer (ReportWriter): Écrivain unique du rapport (écriture directe si absent)
     """
+    if writer is not None:
+        writer.write(log_file, analysis)
+        return
+
     try:
         with open(config['daily_report_file'], "a", encoding='utf-8') as report_file:
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -151,7 +213,212 @@ def save_analysis_to_report(log_file, analysis, config):
         print(f"❌ Erreur lors de la sauvegarde du rapport : {e}")
 
 
-def process_log_file(log_file, last_position, config):
+def apply_budget_plan(logs, config, runtime):
+    """
+    Applique le plan du gouverneur de budget : compaction des lignes
+    et ajustement des paramètres IA
+
+    Args:
+        logs (list): Lignes de logs à analyser
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés
+
+    Returns:
+        tuple: (lignes_compactées, configuration_ajustée)
+    """
+    budget = runtime.get('budget')
+    if budget is None or not budget.limit:
+        return logs, config
+
+    plan = budget.plan(config)
+    if plan['max_lines'] is not None:
+        logs = compact_logs(logs, plan['max_lines'])
+
+    if plan['ai_model'] != config.get('ai_model') or plan['ai_max_tokens'] != config['ai_max_tokens']:
+        print(f"💰 Budget à {budget.pressure():.0%} : modèle {plan['ai_model']}, "
+              f"{plan['ai_max_tokens']} tokens max, {len(logs)} lignes")
+
+    return logs, {**config, 'ai_model': plan['ai_model'], 'ai_max_tokens': plan['ai_max_tokens']}
+
+
+def collect_log_batch(log_file, last_position, config, runtime=None):
+    """
+    Lit les nouvelles lignes d'un fichier et détermine celles à analyser
+
+    Args:
+        log_file (str): Chemin du fichier de log
+        last_position (int): Position du dernier octet lu
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés (voir create_runtime)
+
+    Returns:
+        tuple: (lignes_à_analyser, nouvelle_position)
+    """
+    runtime = runtime or {}
+
+    # Contre-pression : lecture au fil de l'eau dans une file bornée
+    backpressure = runtime.get('backpressure')
+    byte_filter = runtime.get('byte_filter')
+    with stage(runtime, 'read'):
+        if backpressure is not None:
+            start_position = backpressure.start_position(log_file, last_position)
+            new_logs, new_position = read_new_logs(
+                log_file,
+                start_position,
+                line_queue=backpressure.queue_for(log_file),
+                resync=start_position != last_position,
+                byte_filter=byte_filter
+            )
+            backpressure.record(log_file)
+        else:
+            new_logs, new_position = read_new_logs(log_file, last_position, byte_filter=byte_filter)
+
+    return select_logs_for_analysis(log_file, new_logs, runtime), new_position
+
+
+def select_logs_for_analysis(source, logs, runtime, assemble=True):
+    """
+    Détermine si un lot doit être analysé (filtre statistique d'anomalies,
+    accumulation en micro-lots) et remplace les logs d'accès web par leur
+    résumé statistique
+
+    Args:
+        source (str): Fichier de log ou flux d'origine
+        logs (list): Lignes du lot (peut être vide)
+        runtime (dict): Composants d'exécution partagés
+        assemble (bool): Assembler les événements multi-lignes (False si
+            logs contient déjà des événements complets)
+
+    Returns:
+        list: Lignes (ou événements) à analyser (vide si le lot est écarté)
+    """
+    # Événements multi-lignes : traces de pile et continuations regroupées,
+    # une trace inachevée attend sa suite jusqu'au cycle suivant
+    assembler = runtime.get('assembler')
+    if assemble and assembler is not None and assembler.applies_to(source):
+        with stage(runtime, 'read'):
+            logs = assembler.feed(source, logs)
+
+    # Filtre statistique : seuls les lots anormaux sont transmis à l'IA
+    scorer = runtime.get('scorer')
+    if scorer is not None:
+        with stage(runtime, 'filter'):
+            if not scorer.should_analyze(source, logs):
+                return []
+
+    # Micro-lots : les lignes attendent un seuil de taille, d'âge ou un motif
+    batcher = runtime.get('batcher')
+    if batcher is not None:
+        with stage(runtime, 'filter'):
+            logs = batcher.add(source, logs)
+
+    return summarize_access_logs(source, logs, runtime)
+
+
+def summarize_access_logs(source, logs, runtime):
+    """
+    Remplace les logs d'accès web par leur résumé statistique
+
+    Args:
+        source (str): Fichier de log ou flux d'origine
+        logs (list): Lignes du lot (peut être vide)
+        runtime (dict): Composants d'exécution partagés
+
+    Returns:
+        list: Lignes à analyser
+    """
+    # Logs d'accès web : agrégats et lignes atypiques plutôt que le texte brut
+    access_summary = runtime.get('access_summary')
+    if access_summary is not None and logs:
+        with stage(runtime, 'filter'):
+            logs = access_summary.summarize(source, logs)
+    return logs
+
+
+def handle_analysis(log_file, analysis, config, severity_score=None, runtime=None):
+    """
+    Enregistre une analyse dans le rapport et envoie une alerte si nécessaire
+
+    Args:
+        log_file (str): Fichier de log analysé
+        analysis (str): Résultat de l'analyse
+        config (dict): Configuration
+        severity_score (int): Score de gravité (extrait de l'analyse si absent)
+        runtime (dict): Composants d'exécution partagés ('alert_sender' remplace
+            l'envoi des alertes par courriel, ex. banc de rejeu)
+    """
+    # Sauvegarder dans le rapport quotidien
+    with stage(runtime, 'report'):
+        save_analysis_to_report(log_file, analysis, config, (runtime or {}).get('report_writer'))
+
+    # Extraire et vérifier le score de gravité
+    if severity_score is None:
+        severity_score = extract_severity_score(analysis)
+
+    # Vérifications adaptatives : un fichier préoccupant est revérifié au plus vite
+    poller = (runtime or {}).get('poller')
+    if poller is not None:
+        poller.note_severity(log_file, severity_score)
+
+    if severity_score >= ALERT_SEVERITY:
+        print(f"🚨 ALERTE CRITIQUE (Score: {severity_score}) détectée dans {log_file}")
+        with stage(runtime, 'email'):
+            (runtime or {}).get('alert_sender', send_alert_email)(log_file, analysis, severity_score, config)
+    elif severity_score > 0:
+        print(f"⚠️  Anomalie détectée (Score: {severity_score}) dans {log_file}")
+    else:
+        print(f"✅ Aucune anomalie dans {log_file}")
+
+
+def handle_late_analysis(log_file, analysis, fallback, config, runtime=None):
+    """
+    Traite l'analyse IA d'un lot arrivée après la bascule sur l'heuristique :
+    elle est toujours enregistrée dans le rapport, mais n'alerte que si
+    l'analyse de secours n'a pas déjà alerté pour ce lot
+
+    Args:
+        log_file (str): Fichier de log analysé
+        analysis (str): Analyse tardive du moteur
+        fallback (str): Analyse heuristique déjà traitée pour le même lot
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés
+    """
+    if extract_severity_score(fallback) < ALERT_SEVERITY:
+        handle_analysis(log_file, analysis, config, runtime=runtime)
+        return
+    print(f"🕓 Analyse tardive de {log_file} enregistrée (alerte déjà envoyée par l'analyse de secours)")
+    with stage(runtime, 'report'):
+        save_analysis_to_report(log_file, analysis, config, (runtime or {}).get('report_writer'))
+
+
+def collect_expired_batches(runtime):
+    """
+    Récupère les lots à analyser sans nouvelle lecture : événements
+    multi-lignes en attente des sources non lues à ce cycle (joints au
+    micro-lot du fichier s'il existe), micro-lots trop anciens
+
+    Args:
+        runtime (dict): Composants d'exécution partagés
+
+    Returns:
+        dict: {source: lignes à analyser}
+    """
+    batches = {}
+    assembler = runtime.get('assembler')
+    if assembler is not None:
+        for source, events in assembler.flush_expired().items():
+            logs = select_logs_for_analysis(source, events, runtime, assemble=False)
+            if logs:
+                batches[source] = logs
+
+    batcher = runtime.get('batcher')
+    if batcher is not None:
+        for source, lines in batcher.flush_expired().items():
+            batches[source] = batches.get(source, []) + summarize_access_logs(source, lines, runtime)
+    return batches
+
+
+def process_log_file(log_file, last_position, config, runtime=None):
     """
     Traite un fichier de log : lecture, analyse et alertes
 
@@ -159,31 +426,216 @@ def process_log_file(log_file, last_position, config):
         log_file (str): Chemin du fichier de log
         last_position (int): Position du dernier octet lu
         config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés (voir create_runtime)
 
     Returns:
         int: Nouvelle position dans le fichier
     """
-    new_logs, new_position = read_new_logs(log_file, last_position)
+    runtime = runtime or {}
+    new_logs, new_position = collect_log_batch(log_file, last_position, config, runtime)
+    analyze_batch(log_file, new_logs, config, runtime)
+    return new_position
 
-    if new_logs:
-        print(f"🔍 Analyse de {len(new_logs)} nouvelles lignes dans {log_file}...")
-        analysis = analyze_logs_with_ai(new_logs, config)
 
-        # Sauvegarder dans le rapport quotidien
-        save_analysis_to_report(log_file, analysis, config)
+def process_log_lines(source, lines, config, runtime=None):
+    """
+    Traite un lot de lignes reçues hors fichier (flux syslog d'un hôte, ...)
 
-        # Extraire et vérifier le score de gravité
-        severity_score = extract_severity_score(analysis)
+    Args:
+        source (str): Nom du flux (ex. syslog://web01)
+        lines (list): Lignes reçues depuis le dernier cycle
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés
+    """
+    runtime = runtime or {}
+    analyze_batch(source, select_logs_for_analysis(source, lines, runtime), config, runtime)
 
-        if severity_score >= 7:
-            print(f"🚨 ALERTE CRITIQUE (Score: {severity_score}) détectée dans {log_file}")
-            send_alert_email(log_file, analysis, severity_score, config)
-        elif severity_score > 0:
-            print(f"⚠️  Anomalie détectée (Score: {severity_score}) dans {log_file}")
+
+def analyze_batch(source, logs, config, runtime):
+    """
+    Analyse un lot retenu et traite le résultat (rapport, alerte)
+
+    Args:
+        source (str): Fichier de log ou flux d'origine
+        logs (list): Lignes à analyser (rien n'est fait si vide)
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés
+    """
+    if not logs:
+        return
+
+    # Lot quasi identique à un lot récent : son analyse est réutilisée
+    similarity = runtime.get('similarity')
+    if similarity is not None:
+        with stage(runtime, 'filter'):
+            match = similarity.lookup(source, logs)
+        if match is not None:
+            print(f"♻️  Lot similaire à {match['similarity']:.0%} déjà analysé dans {source} : appel IA évité")
+            handle_analysis(source, reused_analysis(match), config, severity_score=match['severity'], runtime=runtime)
+            return
+
+    print(f"🔍 Analyse de {len(logs)} nouvelles lignes dans {source}...")
+    batch = logs
+    with stage(runtime, 'filter'):
+        logs, ai_config = apply_budget_plan(logs, config, runtime)
+    analyzers = runtime.get('analyzers')
+    with stage(runtime, 'ai'):
+        if analyzers is not None:
+            # Moteur choisi par fichier ; une analyse IA arrivée après la bascule
+            # sur l'heuristique est tout de même enregistrée (sans seconde alerte)
+            analysis = analyzers.analyze(
+                source, logs, ai_config, budget=runtime.get('budget'), dispatcher=runtime.get('dispatcher'),
+                on_late=lambda late, fallback: handle_late_analysis(source, late, fallback, config, runtime)
+            )
         else:
-            print(f"✅ Aucune anomalie dans {log_file}")
+            analysis = analyze_logs_with_ai(
+                logs, ai_config, log_file=source, budget=runtime.get('budget'), dispatcher=runtime.get('dispatcher')
+            )
+    severity_score = extract_severity_score(analysis)
+    if similarity is not None and AI_ERROR_MARKER not in analysis and HEURISTIC_MARKER not in analysis:
+        similarity.add(source, batch, analysis, severity_score)
+    handle_analysis(source, analysis, config, severity_score=severity_score, runtime=runtime)
 
-    return new_position
+
+def analyze_correlated_logs_with_ai(batches, config, budget=None, dispatcher=None):
+    """
+    Analyse en un seul appel les lots de plusieurs fichiers d'un même cycle
+    afin de relier les signaux corrélés (même IP, même période, ...)
+
+    Args:
+        batches (dict): Lignes à analyser par fichier {fichier: lignes}
+        config (dict): Configuration contenant les paramètres IA
+        budget (TokenBudget): Compteur de tokens à alimenter (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités (optionnel)
+
+    Returns:
+        str: Analyse générée par l'IA, structurée en sections par fichier
+    """
+    sections = "\n".join(
+        f"### {log_file}\n{''.join(logs)}" for log_file, logs in batches.items()
+    )
+
+    try:
+        return chat_complete(
+            [
+                {
+                    "role": "system",
+                    "content": (
+                        "Tu es un expert en cybersécurité et en analyse de logs Linux. "
+                        "Tu reçois les nouvelles entrées de plusieurs fichiers de logs d'un même serveur, "
+                        "regroupées en sections '### <fichier>'. "
+                        "Commence OBLIGATOIREMENT ta réponse par 'SEVERITY_SCORE: X' (score global, "
+                        "0=aucune anomalie, 1=bénin, 10=critique) suivi des corrélations entre fichiers. "
+                        "Puis, pour chaque fichier, écris une section commençant par '### <fichier>' "
+                        "contenant 'SEVERITY_SCORE: X', les anomalies et les recommandations."
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": (
+                        f"Analyse les logs suivants, relie les événements corrélés entre fichiers "
+                        f"et attribue un score de gravité à chaque fichier :\n{sections}"
+                    ),
+                }
+            ],
+            config,
+            log_file="[corrélation]",
+            budget=budget,
+            dispatcher=dispatcher
+        )
+
+    except Exception as e:
+        error_msg = f"❌ Erreur lors de l'analyse IA corrélée (modèle: {config.get('ai_model', 'unknown')}): {e}"
+        print(error_msg)
+        return f"SEVERITY_SCORE: 0\n{AI_ERROR_MARKER} - Impossible de traiter les logs.\nDétails: {e}"
+
+
+def split_correlated_analysis(analysis, log_files):
+    """
+    Découpe une analyse corrélée en sections par fichier
+
+    Args:
+        analysis (str): Analyse structurée en sections '### <fichier>'
+        log_files (list): Fichiers attendus
+
+    Returns:
+        tuple: (analyse_globale, {fichier: section}) - seuls les fichiers ayant
+            une section propre figurent dans le dictionnaire
+    """
+    parts = re.split(r'^###\s*(.+?)\s*$', analysis, flags=re.MULTILINE)
+    overview = parts[0].strip()
+
+    # Titre = chemin complet ; le nom seul n'est accepté que s'il désigne un unique fichier
+    basenames = {}
+    for log_file in log_files:
+        basenames.setdefault(os.path.basename(log_file), []).append(log_file)
+
+    sections = {}
+    for title, body in zip(parts[1::2], parts[2::2]):
+        title = title.strip('`*" ')
+        if title in log_files:
+            log_file = title
+        elif len(basenames.get(title, ())) == 1:
+            log_file = basenames[title][0]
+        else:
+            continue
+        sections.setdefault(log_file, body.strip())
+
+    return overview, sections
+
+
+def process_correlated_batches(batches, config, runtime=None):
+    """
+    Analyse conjointement les lots d'un cycle et répartit les scores par fichier
+
+    Args:
+        batches (dict): Lignes à analyser par fichier {fichier: lignes}
+        config (dict): Configuration
+        runtime (dict): Composants d'exécution partagés
+    """
+    runtime = runtime or {}
+    batches = {log_file: logs for log_file, logs in batches.items() if logs}
+    if not batches:
+        return
+
+    if len(batches) == 1:
+        log_file, logs = next(iter(batches.items()))
+        analyze_batch(log_file, logs, config, runtime)
+        return
+
+    # Répartir le plafond de lignes entre les fichiers du cycle
+    max_lines = max(1, config.get('correlation_max_lines', 1000) // len(batches))
+    compacted = {}
+    ai_config = config
+    with stage(runtime, 'filter'):
+        for log_file, logs in batches.items():
+            logs = compact_logs(logs, max_lines)
+            compacted[log_file], ai_config = apply_budget_plan(logs, config, runtime)
+
+    print(f"🔗 Analyse corrélée de {sum(len(logs) for logs in compacted.values())} lignes "
+          f"provenant de {len(compacted)} fichiers...")
+    with stage(runtime, 'ai'):
+        analysis = analyze_correlated_logs_with_ai(
+            compacted, ai_config, budget=runtime.get('budget'), dispatcher=runtime.get('dispatcher')
+        )
+
+    global_score = extract_severity_score(analysis)
+    overview, sections = split_correlated_analysis(analysis, list(compacted))
+    for log_file, section in sections.items():
+        severity_score = extract_severity_score(section) if 'SEVERITY_SCORE' in section else global_score
+        if overview:
+            section = f"SEVERITY_SCORE: {severity_score}\n{section}\n\n🔗 Corrélations :\n{overview}"
+        handle_analysis(log_file, section, config, severity_score, runtime)
+
+    # Fichiers sans section propre : une seule entrée (et au plus une alerte) pour l'analyse globale
+    uncovered = [log_file for log_file in compacted if log_file not in sections]
+    if uncovered and overview:
+        handle_analysis(f"[corrélation] {', '.join(uncovered)}", overview, config, global_score,
+                        {**runtime, 'poller': None})
+        poller = runtime.get('poller')
+        if poller is not None:
+            for log_file in uncovered:
+                poller.note_severity(log_file, global_score)
 
 
 def initialize_daily_report(config):
@@ -201,7 +653,7 @@ def initialize_daily_report(config):
             os.makedirs(os.path.dirname(daily_report_file), exist_ok=True)
 
             with open(daily_report_file, "w", encoding='utf-8') as file:
-                file.write("📊 Rapport quotidien des logs\n")
+                file.write(REPORT_HEADER)
             print(f"📄 Fichier {daily_report_file} créé avec succès.")
         except PermissionError:
             print(f"❌ Permission refusée : Impossible de créer {daily_report_file}")
@@ -212,13 +664,142 @@ def initialize_daily_report(config):
             sys.exit(1)
 
 
-def monitor_logs(config):
+def create_runtime(config):
+    """
+    Construit les composants d'exécution partagés entre les cycles
+
+    Args:
+        config (dict): Configuration
+
+    Returns:
+        dict: Composants (budget de tokens, ...)
+    """
+    runtime = {
+        'budget': TokenBudget.from_config(config),
+        'watchdog': LoopWatchdog.from_config(config),
+        'report_writer': ReportWriter.from_config(config),
+    }
+    if config.get('byte_prefilter'):
+        runtime['byte_filter'] = compile_byte_filter(config['byte_prefilter'])
+    if config.get('backpressure_max_lines'):
+        runtime['backpressure'] = BackpressureMonitor.from_config(config)
+    if config.get('anomaly_gate'):
+        runtime['scorer'] = AnomalyScorer.from_config(config)
+    if config.get('ai_requests_per_minute') or config.get('ai_tokens_per_minute') or config.get('ai_priorities'):
+        runtime['dispatcher'] = AIDispatcher.from_config(config)
+    if (config.get('analyzer_backend', 'mistral') != 'mistral' or config.get('analyzer_backends')
+            or config.get('analyzer_deadline')):
+        runtime['analyzers'] = AnalyzerRouter.from_config(config)
+    if config.get('similarity_dedup'):
+        runtime['similarity'] = SimilarityIndex.from_config(config)
+    if config.get('multiline_files'):
+        runtime['assembler'] = EventAssembler.from_config(config)
+    if config.get('microbatch'):
+        runtime['batcher'] = MicroBatcher.from_config(config)
+    if config.get('access_log_summary'):
+        runtime['access_summary'] = AccessLogSummarizer.from_config(config)
+    if config.get('adaptive_polling'):
+        runtime['poller'] = PollScheduler.from_config(config)
+    if config.get('profiling'):
+        runtime['profiler'] = CycleProfiler.from_config(config)
+    if config.get('syslog_enabled'):
+        runtime['syslog'] = SyslogReceiver.from_config(config)
+    if config.get('coordination_db'):
+        runtime['coordinator'] = LeaseCoordinator.from_config(config)
+    return runtime
+
+
+def export_pending(runtime, log_file):
+    """
+    Returns:
+        dict: Lignes lues d'un fichier encore en attente d'analyse, par
+            composant (événement multi-lignes, micro-lot)
+    """
+    pending = {}
+    for name in PENDING_COMPONENTS:
+        component = runtime.get(name)
+        state = component.export(log_file) if component is not None else None
+        if state:
+            pending[name] = state
+    return pending
+
+
+def restore_pending(runtime, log_file, pending):
+    """
+    Remplace les lignes en attente d'un fichier par celles publiées avec sa
+    position partagée (dictionnaire vide : les lignes locales sont abandonnées)
+
+    Args:
+        runtime (dict): Composants d'exécution partagés
+        log_file (str): Fichier de log
+        pending (dict): Lignes en attente par composant (voir export_pending)
+    """
+    for name in PENDING_COMPONENTS:
+        component = runtime.get(name)
+        if component is not None:
+            component.restore(log_file, pending.get(name))
+
+
+def persist_runtime(runtime):
+    """
+    Sauvegarde l'état des composants persistants
+
+    Args:
+        runtime (dict): Composants d'exécution partagés
+    """
+    for component in runtime.values():
+        if hasattr(component, 'save'):
+            component.save()
+
+
+def build_runtime_report(runtime):
+    """
+    Assemble les sections du rapport quotidien fournies par les composants
+
+    Args:
+        runtime (dict): Composants d'exécution partagés
+
+    Returns:
+        str: Sections concaténées
+    """
+    sections = []
+    for component in runtime.values():
+        if hasattr(component, 'report_section'):
+            sections.append(component.report_section())
+    return "\n\n".join(sections)
+
+
+def next_check_delay(config, runtime):
+    """
+    Returns:
+        float: Délai avant la prochaine vérification (prochaine échéance des
+            vérifications adaptatives, des micro-lots ou des événements
+            multi-lignes en attente, allongé par le gouverneur de budget)
+    """
+    poller = runtime.get('poller')
+    delay = poller.next_delay() if poller is not None else config['log_check_interval']
+    for name in PENDING_COMPONENTS:
+        component = runtime.get(name)
+        expiry = component.next_delay() if component is not None else None
+        if expiry is not None:
+            delay = min(delay, expiry)
+    budget = runtime.get('budget')
+    if budget is None or not budget.limit:
+        return delay
+    return delay * budget.plan(config)['interval_factor']
+
+
+def monitor_logs(config, runtime=None):
     """
     Surveille les fichiers de logs et analyse les nouvelles lignes à intervalles réguliers
 
     Args:
         config (dict): Configuration complète du système
+        runtime (dict): Composants d'exécution partagés (créés si absents)
     """
+    if runtime is None:
+        runtime = create_runtime(config)
+
     log_positions = {log_file: 0 for log_file in config['log_files']}
 
     print(f"🚀 Démarrage du monitoring des logs...")
@@ -227,38 +808,159 @@ def monitor_logs(config):
     print(f"📧 Alertes envoyées à : {config['email_receiver']}")
     print(f"🕓 Rapport quotidien programmé à 04:00\n")
 
-    # Initialiser le fichier de rapport
+    # Initialiser le fichier de rapport et son écrivain unique
     initialize_daily_report(config)
+    report_writer = runtime.get('report_writer')
+    if report_writer is not None:
+        report_writer.start()
+
+    # Profilage à la demande (SIGUSR1 : capture cProfile/tracemalloc du prochain cycle)
+    profiler = runtime.get('profiler')
+    if profiler is not None:
+        profiler.install_signal_handler()
+
+    # Réception syslog des serveurs distants (flux virtuels par hôte)
+    syslog = runtime.get('syslog')
+    if syslog is not None:
+        syslog.start()
+
+    coordinator = runtime.get('coordinator')
+    poller = runtime.get('poller')
+
+    # Notifications systemd (READY, STATUS, WATCHDOG) et suivi du retard de la boucle
+    watchdog = runtime['watchdog']
+    watchdog.start()
 
     # Créer le ThreadPoolExecutor une seule fois
-    with ThreadPoolExecutor(max_workers=len(config['log_files'])) as executor:
+    max_workers = len(config['log_files']) + (config.get('syslog_workers', 4) if syslog is not None else 0)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
         while not shutdown_flag:
             try:
-                futures = {}
-                for log_file in config['log_files']:
-                    futures[log_file] = executor.submit(
-                        process_log_file,
-                        log_file,
-                        log_positions[log_file],
-                        config
-                    )
-
-                for log_file, future in futures.items():
-                    try:
-                        log_positions[log_file] = future.result(timeout=60)
-                    except Exception as e:
-                        print(f"❌ Erreur lors du traitement de {log_file} : {e}")
-
-                # Vérifier s'il est temps d'envoyer le rapport quotidien
-                schedule.run_pending()
+                watchdog.cycle_started()
+
+                # En mode corrélation, les fichiers sont seulement lus en parallèle
+                # puis analysés ensemble en un seul appel
+                correlation_mode = config.get('correlation_mode', False)
+                task = collect_log_batch if correlation_mode else process_log_file
+                if profiler is not None:
+                    profiler.start_cycle()
+                    task = profiler.wrap(task)
+
+                # Une erreur du cycle ne laisse jamais cProfile actif pour la suite du processus
+                try:
+                    # Multi-instances : seuls les fichiers dont le bail est détenu sont traités
+                    log_files = config['log_files']
+                    if coordinator is not None:
+                        previously_owned = set(coordinator.owned)
+                        log_files = coordinator.acquire(config['log_files'])
+                        for log_file in log_files:
+                            if log_file not in previously_owned:
+                                # Reprise : position et lignes en attente publiées ensemble
+                                shared_position = coordinator.load_offset(log_file)
+                                if shared_position is not None:
+                                    log_positions[log_file] = shared_position
+                                    restore_pending(runtime, log_file, coordinator.load_pending(log_file))
+                        # Fichiers cédés : leurs lignes en attente suivent la position publiée
+                        for log_file in previously_owned - set(log_files):
+                            restore_pending(runtime, log_file, {})
+
+                    # Vérifications adaptatives : seuls les fichiers à échéance et
+                    # modifiés depuis la dernière lecture (os.stat) sont ouverts
+                    files_to_read = poller.due(log_files) if poller is not None else log_files
+
+                    futures = {}
+                    for log_file in files_to_read:
+                        futures[log_file] = executor.submit(
+                            task,
+                            log_file,
+                            log_positions[log_file],
+                            config,
+                            runtime
+                        )
+
+                    # Flux syslog : une source virtuelle par hôte
+                    if syslog is not None:
+                        for host, lines in syslog.drain().items():
+                            source = f"syslog://{host}"
+                            if correlation_mode:
+                                futures[source] = executor.submit(select_logs_for_analysis, source, lines, runtime)
+                            else:
+                                futures[source] = executor.submit(process_log_lines, source, lines, config, runtime)
+
+                    # Échéance commune : la durée d'un cycle (et donc des baux) reste bornée
+                    batches = {}
+                    deadline = time.monotonic() + CYCLE_TASK_TIMEOUT
+                    for source, future in futures.items():
+                        try:
+                            result = future.result(timeout=max(0, deadline - time.monotonic()))
+                        except Exception as e:
+                            print(f"❌ Erreur lors du traitement de {source} : {e}")
+                            if poller is not None and source in log_positions:
+                                poller.invalidate(source)
+                            continue
+
+                        if source in log_positions:
+                            previous_position = log_positions[source]
+                            if correlation_mode:
+                                batches[source], log_positions[source] = result
+                            else:
+                                log_positions[source] = result
+                            if poller is not None:
+                                poller.record(source, active=log_positions[source] != previous_position)
+                        elif correlation_mode:
+                            batches[source] = result
+
+                    # Événements et micro-lots arrivés à échéance sans nouvelle ligne
+                    for source, lines in collect_expired_batches(runtime).items():
+                        if correlation_mode:
+                            batches[source] = (batches.get(source) or []) + lines
+                        else:
+                            analyze_batch(source, lines, config, runtime)
+
+                    if correlation_mode:
+                        process_correlated_batches(batches, config, runtime)
+
+                    # Sauvegarder l'état des composants (lignes de base, micro-lots, ...)
+                    # avant de publier des positions qui les supposent conservés
+                    persist_runtime(runtime)
+
+                    # Publier les positions lues, avec les lignes encore en attente, pour les autres instances
+                    if coordinator is not None:
+                        for log_file in log_files:
+                            coordinator.save_offset(log_file, log_positions[log_file],
+                                                    pending=export_pending(runtime, log_file))
+
+                    # Vérifier s'il est temps d'envoyer le rapport quotidien
+                    with stage(runtime, 'email'):
+                        schedule.run_pending()
+                finally:
+                    if profiler is not None:
+                        profiler.end_cycle()
 
                 # Attendre avant la prochaine vérification
-                time.sleep(config['log_check_interval'])
+                delay = next_check_delay(config, runtime)
+                watchdog.cycle_finished(delay)
+                time.sleep(delay)
 
             except Exception as e:
                 print(f"❌ Erreur dans la boucle principale : {e}")
+                watchdog.cycle_finished(config['log_check_interval'])
                 time.sleep(config['log_check_interval'])
 
+    watchdog.stop()
+
+    # Les micro-lots en attente sont conservés pour le prochain démarrage
+    persist_runtime(runtime)
+
+    if report_writer is not None:
+        report_writer.close()
+
+    if syslog is not None:
+        syslog.stop()
+
+    if coordinator is not None:
+        coordinator.release()
+
     print("✅ Monitoring arrêté proprement")
 
 
@@ -284,11 +986,17 @@ def main():
         # Afficher le résumé de la configuration
         print_configuration_summary(config)
 
+        # Composants partagés (budget de tokens, ...)
+        runtime = create_runtime(config)
+
         # Programmer le rapport quotidien
-        schedule.every().day.at("04:00").do(send_daily_report, config)
+        schedule.every().day.at("04:00").do(
+            send_daily_report, config, lambda: build_runtime_report(runtime),
+            runtime['budget'], runtime['report_writer'], runtime.get('dispatcher')
+        )
 
         # Démarrer le monitoring
-        monitor_logs(config)
+        monitor_logs(config, runtime)
 
     except KeyboardInterrupt:
         print("\n🛑 Arrêt demandé par l'utilisateur")
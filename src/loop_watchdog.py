@@ -0,0 +1,199 @@
+"""
+Module de suivi du retard de la boucle principale et d'intégration au
+watchdog systemd (protocole sd_notify sur NOTIFY_SOCKET)
+"""
+import os
+import time
+import socket
+import threading
+
+
+def sd_notify(message, socket_path=None):
+    """
+    Envoie une notification au gestionnaire de service (READY=1, STATUS=..., WATCHDOG=1)
+
+    Args:
+        message (str): Notification, éventuellement plusieurs lignes VAR=valeur
+        socket_path (str): Socket de notification (défaut : $NOTIFY_SOCKET)
+
+    Returns:
+        bool: True si la notification a été envoyée
+    """
+    socket_path = socket_path or os.environ.get('NOTIFY_SOCKET')
+    if not socket_path:
+        return False
+    if socket_path.startswith('@'):
+        # Socket de l'espace de noms abstrait
+        socket_path = '\0' + socket_path[1:]
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC) as sock:
+            sock.sendto(message.encode('utf-8'), socket_path)
+        return True
+    except OSError as e:
+        print(f"⚠️  Notification systemd impossible : {e}")
+        return False
+
+
+def watchdog_interval():
+    """
+    Returns:
+        float: Période du watchdog demandée par systemd (secondes), ou None
+    """
+    usec = os.environ.get('WATCHDOG_USEC')
+    pid = os.environ.get('WATCHDOG_PID')
+    if not usec or (pid and pid != str(os.getpid())):
+        return None
+    try:
+        return int(usec) / 1_000_000
+    except ValueError:
+        return None
+
+
+class LoopWatchdog:
+    """Mesure la durée et le retard des cycles et n'entretient le watchdog que si la boucle progresse"""
+
+    def __init__(self, interval, lag_threshold, notify_socket=None, watchdog_period=None):
+        """
+        Args:
+            interval (float): Intervalle nominal entre deux cycles (log_check_interval)
+            lag_threshold (float): Retard toléré (cycle trop long ou démarrage en retard)
+                au-delà duquel le watchdog n'est plus entretenu
+            notify_socket (str): Socket de notification (défaut : $NOTIFY_SOCKET)
+            watchdog_period (float): Période du watchdog (défaut : $WATCHDOG_USEC)
+        """
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.notify_socket = notify_socket or os.environ.get('NOTIFY_SOCKET')
+        self.watchdog_period = watchdog_period if watchdog_period is not None else watchdog_interval()
+
+        self.cycles = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.avg_lag = 0.0
+        self.slow_cycles = 0
+        self.stalls = 0
+
+        self._cycle_started_at = None
+        self._expected_start = None
+        self._deadline = None
+        self._stalled = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le suivi de boucle à partir de la configuration"""
+        return cls(
+            config['log_check_interval'],
+            config.get('watchdog_lag_threshold') or 2 * config['log_check_interval']
+        )
+
+    def notify(self, message):
+        """Envoie une notification si le service est supervisé par systemd"""
+        if self.notify_socket:
+            return sd_notify(message, self.notify_socket)
+        return False
+
+    def start(self):
+        """Signale que le service est prêt et démarre l'entretien du watchdog"""
+        with self._lock:
+            self._deadline = time.monotonic() + self.lag_threshold
+        self.notify(f"READY=1\nSTATUS=Surveillance démarrée (intervalle {self.interval}s)\nMAINPID={os.getpid()}")
+        if self.notify_socket and self.watchdog_period:
+            self._thread = threading.Thread(target=self._run, name="watchdog", daemon=True)
+            self._thread.start()
+            print(f"🐕 Watchdog systemd actif (période {self.watchdog_period:g}s, retard toléré {self.lag_threshold:g}s)")
+
+    def stop(self):
+        """Arrête l'entretien du watchdog (arrêt propre)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.notify("STOPPING=1\nSTATUS=Arrêt en cours")
+
+    def cycle_started(self, now=None):
+        """Début d'un cycle : mesure le retard par rapport au démarrage prévu"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            lag = max(0.0, now - self._expected_start) if self._expected_start is not None else 0.0
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self.avg_lag = lag if self.cycles == 0 else 0.9 * self.avg_lag + 0.1 * lag
+            self._cycle_started_at = now
+            self._deadline = now + self.lag_threshold
+
+    def cycle_finished(self, next_delay, now=None):
+        """
+        Fin d'un cycle : mesure sa durée et fixe l'échéance du prochain
+
+        Args:
+            next_delay (float): Attente prévue avant le prochain cycle
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self.cycles += 1
+            if self._cycle_started_at is not None:
+                self.last_duration = now - self._cycle_started_at
+                self.max_duration = max(self.max_duration, self.last_duration)
+                if self.last_duration > self.interval:
+                    self.slow_cycles += 1
+            self._cycle_started_at = None
+            self._expected_start = now + next_delay
+            self._deadline = self._expected_start + self.lag_threshold
+            status = self.status()
+        self.notify(f"STATUS={status}")
+
+    def status(self):
+        """
+        Returns:
+            str: État courant de la boucle (durée et retard du dernier cycle)
+        """
+        return (
+            f"Cycle {self.cycles} : durée {self.last_duration:.1f}s, retard {self.last_lag:.1f}s "
+            f"(max {self.max_lag:.1f}s)"
+        )
+
+    def pet(self, now=None):
+        """
+        Entretient le watchdog si la boucle a progressé avant son échéance
+
+        Returns:
+            bool: True si WATCHDOG=1 a été envoyé
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            healthy = self._deadline is None or now <= self._deadline
+            overdue = 0.0 if healthy else now - self._deadline + self.lag_threshold
+            newly_stalled = not healthy and not self._stalled
+            self._stalled = not healthy
+            if newly_stalled:
+                self.stalls += 1
+
+        if healthy:
+            return self.notify("WATCHDOG=1")
+        if newly_stalled:
+            print(f"🐕 Boucle principale bloquée depuis {overdue:.0f}s : watchdog suspendu")
+            self.notify(f"STATUS=Boucle bloquée depuis {overdue:.0f}s")
+        return False
+
+    def _run(self):
+        """Entretient le watchdog à la moitié de sa période"""
+        while not self._stop.wait(self.watchdog_period / 2):
+            self.pet()
+
+    def report_section(self):
+        """
+        Returns:
+            str: Durées et retards des cycles pour le rapport quotidien
+        """
+        with self._lock:
+            return "\n".join([
+                "🐕 BOUCLE PRINCIPALE",
+                f"  Cycles : {self.cycles} (dont {self.slow_cycles} plus longs que l'intervalle de {self.interval}s)",
+                f"  Durée d'un cycle : dernier {self.last_duration:.1f}s, max {self.max_duration:.1f}s",
+                f"  Retard au démarrage : moyen {self.avg_lag:.1f}s, max {self.max_lag:.1f}s",
+                f"  Blocages détectés (watchdog suspendu) : {self.stalls}",
+            ])
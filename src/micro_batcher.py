@@ -0,0 +1,186 @@
+"""
+Module d'accumulation des lignes entre les cycles (micro-lots) : un lot
+n'est transmis à l'IA qu'au-delà d'une taille, d'un âge maximal ou dès
+qu'une ligne correspond à un motif toujours transmis
+"""
+import os
+import json
+import time
+import threading
+
+from anomaly_scorer import compile_forward_patterns
+
+# Raisons de vidage d'un micro-lot
+FLUSH_REASONS = ('size', 'age', 'pattern')
+
+
+class MicroBatcher:
+    """Tampon de lignes par fichier, persisté pour qu'un redémarrage ne perde rien"""
+
+    def __init__(self, state_file=None, max_lines=200, max_bytes=65536, max_age=300, forward_patterns=None):
+        """
+        Args:
+            state_file (str): Fichier JSON des tampons (None = en mémoire)
+            max_lines (int): Nombre de lignes déclenchant l'analyse
+            max_bytes (int): Taille en octets déclenchant l'analyse (0 = ignorée)
+            max_age (float): Âge maximal en secondes de la plus ancienne ligne en attente
+            forward_patterns (str): Motifs provoquant une analyse immédiate
+        """
+        self.state_file = state_file
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.forward_regex = compile_forward_patterns(forward_patterns)
+        self.stats = {'batches': 0, 'lines': 0, **{reason: 0 for reason in FLUSH_REASONS}}
+        self._lock = threading.Lock()
+        self._buffers = self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit l'accumulateur à partir de la configuration"""
+        return cls(
+            config.get('microbatch_state_file'),
+            max_lines=config.get('microbatch_max_lines', 200),
+            max_bytes=config.get('microbatch_max_bytes', 65536),
+            max_age=config.get('microbatch_max_age', 300),
+            forward_patterns=config.get('forward_patterns')
+        )
+
+    def add(self, source, lines, now=None):
+        """
+        Ajoute les lignes d'un cycle au tampon du fichier
+
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            lines (list): Nouvelles lignes (peut être vide)
+            now (float): Horodatage de référence
+
+        Returns:
+            list: Lignes à analyser maintenant (vide si le tampon est conservé)
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            buffer = self._buffers.get(source)
+            if lines:
+                if buffer is None:
+                    buffer = self._buffers[source] = {'lines': [], 'bytes': 0, 'since': now}
+                buffer['lines'].extend(lines)
+                buffer['bytes'] += sum(len(line.encode('utf-8')) for line in lines)
+                self.stats['batches'] += 1
+                self.stats['lines'] += len(lines)
+            if buffer is None:
+                return []
+
+            reason = None
+            if self.forward_regex is not None and any(self.forward_regex.search(line) for line in lines):
+                reason = 'pattern'
+            elif len(buffer['lines']) >= self.max_lines or (self.max_bytes and buffer['bytes'] >= self.max_bytes):
+                reason = 'size'
+            elif now - buffer['since'] >= self.max_age:
+                reason = 'age'
+
+            if reason is None:
+                return []
+            return self._flush(source, reason)
+
+    def _flush(self, source, reason):
+        self.stats[reason] += 1
+        return self._buffers.pop(source)['lines']
+
+    def avoided_calls(self):
+        """
+        Returns:
+            int: Appels IA évités (lots reçus moins lots transmis à l'IA)
+        """
+        return self.stats['batches'] - sum(self.stats[reason] for reason in FLUSH_REASONS)
+
+    def flush_expired(self, now=None):
+        """
+        Vide les tampons ayant atteint l'âge maximal (fichiers sans nouvelle ligne)
+
+        Returns:
+            dict: {source: lignes à analyser}
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            expired = [source for source, buffer in self._buffers.items() if now - buffer['since'] >= self.max_age]
+            return {source: self._flush(source, 'age') for source in expired}
+
+    def next_delay(self, now=None):
+        """
+        Returns:
+            float: Délai avant l'expiration du plus ancien tampon, ou None si aucun
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            if not self._buffers:
+                return None
+            oldest = min(buffer['since'] for buffer in self._buffers.values())
+        return max(0.0, oldest + self.max_age - now)
+
+    def export(self, source):
+        """
+        Returns:
+            dict: Tampon en attente du fichier (sérialisable), ou None
+        """
+        with self._lock:
+            buffer = self._buffers.get(source)
+            return {**buffer, 'lines': list(buffer['lines'])} if buffer else None
+
+    def restore(self, source, buffer):
+        """
+        Remplace le tampon d'un fichier (reprise d'un fichier d'une autre instance)
+
+        Args:
+            source (str): Fichier de log
+            buffer (dict): Tampon exporté par export(), None pour l'abandonner
+        """
+        with self._lock:
+            if buffer:
+                self._buffers[source] = buffer
+            else:
+                self._buffers.pop(source, None)
+
+    def _load(self):
+        """Charge les tampons depuis le disque"""
+        if not self.state_file:
+            return {}
+        try:
+            with open(self.state_file, "r", encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️  Impossible de charger les micro-lots en attente : {e}")
+            return {}
+
+    def save(self):
+        """Écrit les tampons de manière atomique"""
+        if not self.state_file:
+            return
+        with self._lock:
+            data = json.dumps(self._buffers)
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, "w", encoding='utf-8') as file:
+                file.write(data)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder les micro-lots en attente : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Lots regroupés et causes de vidage pour le rapport quotidien
+        """
+        stats = self.stats
+        with self._lock:
+            pending = sum(len(buffer['lines']) for buffer in self._buffers.values())
+            avoided = max(0, self.avoided_calls() - len(self._buffers))
+        return (
+            "🧺 MICRO-LOTS\n"
+            f"  {stats['lines']} lignes en {stats['batches']} lots, {avoided} appels IA évités par regroupement\n"
+            f"  Vidages : {stats['size']} par taille, {stats['age']} par âge, {stats['pattern']} par motif "
+            f"({pending} lignes en attente)"
+        )
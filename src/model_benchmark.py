@@ -0,0 +1,317 @@
+"""
+Banc de comparaison des modèles : analyse un corpus de logs étiquetés avec
+plusieurs modèles en parallèle et compare latence, tokens, coût et justesse
+du score de gravité
+"""
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from analyzer_backends import HeuristicBackend, MistralBackend, extract_severity_score
+from config_loader import load_configuration
+from profiling import percentile
+from report_summarizer import severity_band
+from token_budget import DEFAULT_TOKEN_PRICES
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '../benchmarks/corpus')
+
+# Modèle de référence évalué localement par le moteur heuristique (sans API)
+HEURISTIC_MODEL = 'heuristic'
+
+DEFAULT_MODELS = (
+    'mistral-large-latest',
+    'mistral-medium-latest',
+    'mistral-small-latest',
+    HEURISTIC_MODEL,
+)
+
+# Colonnes du tableau comparatif (CSV et affichage) ; la justesse et la
+# latence ne portent que sur les appels réussis, les échecs sont comptés à part
+SUMMARY_FIELDS = (
+    'model', 'calls', 'errors', 'error_rate', 'latency_p50', 'latency_p90', 'latency_max',
+    'prompt_tokens', 'completion_tokens', 'cost_usd',
+    'band_accuracy', 'alert_accuracy', 'severity_mae',
+)
+
+
+def load_corpus(directory):
+    """
+    Charge un corpus de logs étiquetés : un fichier par cas et labels.json
+    donnant le score de gravité attendu ({"fichier.log": score, ...})
+
+    Args:
+        directory (str): Répertoire du corpus
+
+    Returns:
+        list: Cas {name, logs, severity}
+    """
+    with open(os.path.join(directory, 'labels.json'), "r", encoding='utf-8') as file:
+        labels = json.load(file)
+
+    corpus = []
+    for name, severity in sorted(labels.items()):
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "r", encoding='utf-8', errors='ignore') as file:
+                logs = [line for line in file if line.strip()]
+        except FileNotFoundError:
+            print(f"⚠️  Cas étiqueté introuvable : {path}")
+            continue
+        corpus.append({'name': name, 'logs': logs, 'severity': int(severity)})
+    return corpus
+
+
+def load_replay(path):
+    """
+    Charge les réponses d'un banc précédent (sortie --json) pour les réévaluer
+    sans appeler l'API
+
+    Returns:
+        dict: Appels enregistrés {modèle|cas|essai: appel}
+    """
+    with open(path, "r", encoding='utf-8') as file:
+        calls = json.load(file).get('calls', [])
+    return {_call_key(call['model'], call['fixture'], call['attempt']): call for call in calls}
+
+
+def _call_key(model, fixture, attempt):
+    return f"{model}|{fixture}|{attempt}"
+
+
+def _share(calls, predicate):
+    """
+    Returns:
+        float: Part des appels vérifiant predicate, ou None sans appel
+    """
+    return round(sum(1 for call in calls if predicate(call)) / len(calls), 4) if calls else None
+
+
+class _CallUsage:
+    """Consommation de tokens d'un appel (même interface record() que TokenBudget)"""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, log_file, model, prompt_tokens, completion_tokens, now=None):
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+
+
+class ModelBenchmark:
+    """Exécute chaque cas du corpus avec chaque modèle et agrège les mesures par modèle"""
+
+    def __init__(self, corpus, models, config, repeat=1, concurrency=4, replay=None):
+        """
+        Args:
+            corpus (list): Cas étiquetés (voir load_corpus)
+            models (list): Modèles à comparer (HEURISTIC_MODEL = moteur local)
+            config (dict): Configuration (paramètres IA, tarifs)
+            repeat (int): Nombre d'essais par cas et par modèle
+            concurrency (int): Appels simultanés
+            replay (dict): Réponses enregistrées réutilisées à la place de l'API ; les appels
+                sans réponse enregistrée sont alors ignorés (jamais d'appel réel)
+        """
+        self.corpus = corpus
+        self.models = list(models)
+        self.config = config
+        self.repeat = max(1, repeat)
+        self.concurrency = max(1, concurrency)
+        self.replay = replay or {}
+        self.replay_only = replay is not None
+        self.prices = config.get('ai_token_prices') or DEFAULT_TOKEN_PRICES
+        self.heuristic = HeuristicBackend()
+        self.backend = MistralBackend()
+        self.calls = []
+        self.skipped = []
+
+    def _analyze(self, model, fixture, usage):
+        """
+        Analyse un cas
+
+        Returns:
+            str: Analyse commençant par SEVERITY_SCORE
+
+        Raises:
+            Exception: Si l'appel au modèle échoue (compté comme erreur)
+        """
+        if model == HEURISTIC_MODEL:
+            return self.heuristic.analyze(fixture['logs'])
+        return self.backend.analyze(
+            fixture['logs'], {**self.config, 'ai_model': model}, log_file=fixture['name'], budget=usage
+        )
+
+    def run_call(self, model, fixture, attempt):
+        """
+        Returns:
+            dict: Mesures d'un appel (latence, tokens, score obtenu et attendu),
+                None en rejeu si aucune réponse n'est enregistrée pour cet appel
+        """
+        key = _call_key(model, fixture['name'], attempt)
+        recorded = self.replay.get(key)
+        if recorded is None and self.replay_only and model != HEURISTIC_MODEL:
+            # Rejeu : un appel réel échouerait (clé API factice) et fausserait le score
+            print(f"⚠️  Réponse enregistrée absente, appel ignoré : {key}")
+            self.skipped.append(key)
+            return None
+        if recorded is not None:
+            analysis, error = recorded['analysis'], recorded['error']
+            latency = recorded['latency']
+            prompt_tokens, completion_tokens = recorded['prompt_tokens'], recorded['completion_tokens']
+        else:
+            usage = _CallUsage()
+            start = time.monotonic()
+            try:
+                analysis, error = self._analyze(model, fixture, usage), False
+            except Exception as e:
+                print(f"❌ Échec de {model} sur {fixture['name']} : {e}")
+                analysis, error = f"Erreur d'analyse : {e}", True
+            latency = time.monotonic() - start
+            prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+
+        return {
+            'model': model,
+            'fixture': fixture['name'],
+            'attempt': attempt,
+            'expected': fixture['severity'],
+            'severity': None if error else extract_severity_score(analysis),
+            'error': error,
+            'latency': round(latency, 4),
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'replayed': recorded is not None,
+            'analysis': analysis,
+        }
+
+    def run(self):
+        """
+        Lance tous les appels (modèles, cas et essais mélangés) en parallèle
+
+        Returns:
+            list: Tableau comparatif, une ligne par modèle
+        """
+        jobs = [(model, fixture, attempt)
+                for attempt in range(self.repeat) for fixture in self.corpus for model in self.models]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            calls = list(executor.map(lambda job: self.run_call(*job), jobs))
+        self.calls = [call for call in calls if call is not None]
+        return self.summary()
+
+    def summary(self):
+        """
+        Returns:
+            list: Mesures agrégées par modèle (voir SUMMARY_FIELDS)
+        """
+        rows = []
+        for model in self.models:
+            calls = [call for call in self.calls if call['model'] == model]
+            if not calls:
+                continue
+            succeeded = [call for call in calls if not call['error']]
+            latencies = [call['latency'] for call in succeeded]
+            prompt_tokens = sum(call['prompt_tokens'] for call in calls)
+            completion_tokens = sum(call['completion_tokens'] for call in calls)
+            price_in, price_out = self.prices.get(model, (0.0, 0.0))
+            rows.append({
+                'model': model,
+                'calls': len(calls),
+                'errors': len(calls) - len(succeeded),
+                'error_rate': round(1 - len(succeeded) / len(calls), 4),
+                'latency_p50': percentile(latencies, 0.5),
+                'latency_p90': percentile(latencies, 0.9),
+                'latency_max': max(latencies) if latencies else None,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'cost_usd': round((prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000, 6),
+                'band_accuracy': _share(
+                    succeeded, lambda call: severity_band(call['severity']) == severity_band(call['expected'])
+                ),
+                'alert_accuracy': _share(succeeded, lambda call: (call['severity'] >= 7) == (call['expected'] >= 7)),
+                'severity_mae': round(
+                    sum(abs(call['severity'] - call['expected']) for call in succeeded) / len(succeeded), 3
+                ) if succeeded else None,
+            })
+        return rows
+
+
+def format_summary(rows):
+    """
+    Returns:
+        str: Tableau comparatif lisible
+    """
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "-"
+
+    def share(value):
+        return f"{value:.0%}" if value is not None else "-"
+
+    lines = [
+        f"{'Modèle':<24} {'Appels':>6} {'Échecs':>6} {'p50':>7} {'p90':>7} {'Tokens':>8} "
+        f"{'Coût $':>9} {'Gravité':>8} {'Alerte':>7} {'Écart':>6}"
+    ]
+    for row in rows:
+        mae = f"{row['severity_mae']:.2f}" if row['severity_mae'] is not None else "-"
+        lines.append(
+            f"{row['model']:<24} {row['calls']:>6} {share(row['error_rate']):>6} {seconds(row['latency_p50']):>7} "
+            f"{seconds(row['latency_p90']):>7} {row['prompt_tokens'] + row['completion_tokens']:>8} "
+            f"{row['cost_usd']:>9.4f} {share(row['band_accuracy']):>8} {share(row['alert_accuracy']):>7} "
+            f"{mae:>6}"
+        )
+    lines.append("Justesse, écart et latences : appels réussis uniquement")
+    return "\n".join(lines)
+
+
+def write_csv(rows, path):
+    """Écrit le tableau comparatif au format CSV"""
+    with open(path, "w", encoding='utf-8', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    """Interface en ligne de commande du banc de comparaison"""
+    parser = argparse.ArgumentParser(description="Comparaison des modèles sur un corpus de logs étiquetés")
+    parser.add_argument('--models', default=','.join(DEFAULT_MODELS),
+                        help=f"Modèles séparés par des virgules ('{HEURISTIC_MODEL}' = moteur local)")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="Répertoire du corpus (fichiers et labels.json)")
+    parser.add_argument('--config', help="config.ini (paramètres IA et tarifs)")
+    parser.add_argument('--repeat', type=int, default=1, help="Essais par cas et par modèle")
+    parser.add_argument('--concurrency', type=int, default=4, help="Appels simultanés")
+    parser.add_argument('--replay', help="Réévalue les réponses d'un banc précédent (fichier --json)")
+    parser.add_argument('--json', help="Écrit le tableau et les réponses dans ce fichier JSON")
+    parser.add_argument('--csv', help="Écrit le tableau comparatif dans ce fichier CSV")
+    args = parser.parse_args(argv)
+
+    models = [model.strip() for model in args.models.split(',') if model.strip()]
+    replay = load_replay(args.replay) if args.replay else None
+
+    # SMTP n'est jamais utilisé ; la clé API n'est nécessaire que pour les appels réels
+    os.environ.setdefault('SMTP_PASSWORD', 'benchmark')
+    if replay is not None or models == [HEURISTIC_MODEL]:
+        os.environ.setdefault('AI_API_KEY', 'benchmark')
+    config = load_configuration(args.config)
+
+    corpus = load_corpus(args.corpus)
+    print(f"🧪 {len(corpus)} cas étiquetés x {len(models)} modèles x {args.repeat} essais")
+    benchmark = ModelBenchmark(corpus, models, config, repeat=args.repeat,
+                               concurrency=args.concurrency, replay=replay)
+    rows = benchmark.run()
+
+    print(format_summary(rows))
+    if benchmark.skipped:
+        print(f"⚠️  {len(benchmark.skipped)} appels ignorés faute de réponse enregistrée")
+    if args.csv:
+        write_csv(rows, args.csv)
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as file:
+            json.dump({'summary': rows, 'calls': benchmark.calls}, file, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+Module de planification adaptative des vérifications par fichier
+(intervalle raccourci sur activité, recul exponentiel au repos)
+"""
+import os
+import time
+import threading
+from fnmatch import fnmatch
+
+# Score de gravité à partir duquel un fichier est vérifié au rythme minimal
+HOT_SEVERITY = 4
+
+
+def parse_poll_bounds(value):
+    """
+    Analyse les bornes d'intervalle par fichier au format "motif:min:max, ..."
+
+    Args:
+        value (str): Ex. "/var/log/auth.log:5:60, /var/log/apache2/*:30:900"
+
+    Returns:
+        dict: {motif: (min, max)} en secondes
+
+    Raises:
+        ValueError: Si une entrée est invalide
+    """
+    bounds = {}
+    for entry in filter(None, (part.strip() for part in (value or '').split(','))):
+        try:
+            pattern, low, high = entry.rsplit(':', 2)
+            low, high = float(low), float(high)
+        except ValueError:
+            raise ValueError(f"Bornes invalides pour '{entry}' (format motif:min:max)")
+        if not 0 < low <= high:
+            raise ValueError(f"Bornes invalides pour '{entry}' (0 < min <= max)")
+        bounds[pattern.strip()] = (low, high)
+    return bounds
+
+
+class PollScheduler:
+    """Prochaine vérification par fichier, déterminée par son activité récente"""
+
+    def __init__(self, base_interval, min_interval, max_interval, bounds=None, backoff=2.0):
+        """
+        Args:
+            base_interval (float): Intervalle initial (log_check_interval)
+            min_interval (float): Intervalle minimal par défaut
+            max_interval (float): Intervalle maximal par défaut
+            bounds (dict): Bornes spécifiques {motif: (min, max)}
+            backoff (float): Facteur d'allongement à chaque vérification sans nouveauté
+        """
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.bounds = bounds or {}
+        self.backoff = backoff
+        self.stats = {}
+        self._state = {}
+        self._watched = ()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le planificateur à partir de la configuration"""
+        return cls(
+            config['log_check_interval'],
+            config.get('poll_min_interval') or max(1, config['log_check_interval'] / 10),
+            config.get('poll_max_interval') or config['log_check_interval'] * 4,
+            bounds=config.get('poll_bounds') or {},
+            backoff=config.get('poll_backoff', 2.0)
+        )
+
+    def bounds_of(self, log_file):
+        """
+        Returns:
+            tuple: (min, max) de l'intervalle de ce fichier
+        """
+        if log_file in self.bounds:
+            return self.bounds[log_file]
+        for pattern, value in self.bounds.items():
+            if fnmatch(log_file, pattern):
+                return value
+        return self.min_interval, self.max_interval
+
+    def _entry(self, log_file):
+        entry = self._state.get(log_file)
+        if entry is None:
+            low, high = self.bounds_of(log_file)
+            entry = self._state[log_file] = {
+                'interval': min(high, max(low, self.base_interval)),
+                'next_check': 0.0,
+                'signature': None,
+            }
+            self.stats[log_file] = {'checks': 0, 'stats_only': 0, 'reads': 0}
+        return entry
+
+    def due(self, log_files, now=None):
+        """
+        Détermine les fichiers à lire : échéance atteinte et fichier modifié
+        (un simple os.stat suffit pour les fichiers au repos)
+
+        Args:
+            log_files (list): Fichiers surveillés
+            now (float): Horodatage monotone de référence
+
+        Returns:
+            list: Fichiers à lire ce cycle
+        """
+        now = now if now is not None else time.monotonic()
+        to_read = []
+        with self._lock:
+            self._watched = tuple(log_files)
+            for log_file in log_files:
+                entry = self._entry(log_file)
+                if entry['next_check'] > now:
+                    continue
+                stats = self.stats[log_file]
+                stats['checks'] += 1
+                try:
+                    stat = os.stat(log_file)
+                    signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    signature = None
+
+                if signature is not None and signature != entry['signature']:
+                    entry['signature'] = signature
+                    stats['reads'] += 1
+                    to_read.append(log_file)
+                else:
+                    stats['stats_only'] += 1
+                    self._reschedule(log_file, entry, active=False, now=now)
+        return to_read
+
+    def _reschedule(self, log_file, entry, active, now):
+        low, high = self.bounds_of(log_file)
+        if active:
+            entry['interval'] = max(low, entry['interval'] / self.backoff)
+        else:
+            entry['interval'] = min(high, entry['interval'] * self.backoff)
+        entry['next_check'] = now + entry['interval']
+
+    def record(self, log_file, active, now=None):
+        """
+        Enregistre le résultat d'une lecture et planifie la suivante
+
+        Args:
+            log_file (str): Fichier lu
+            active (bool): True si de nouvelles lignes ont été lues
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            self._reschedule(log_file, self._entry(log_file), active, now)
+
+    def invalidate(self, log_file, now=None):
+        """Force la relecture à la prochaine échéance (lecture précédente en échec)"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            entry = self._entry(log_file)
+            entry['signature'] = None
+            self._reschedule(log_file, entry, active=False, now=now)
+
+    def note_severity(self, log_file, severity_score, now=None):
+        """Un fichier dont l'analyse est grave est revérifié au rythme minimal"""
+        if severity_score < HOT_SEVERITY:
+            return
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            entry = self._entry(log_file)
+            entry['interval'] = self.bounds_of(log_file)[0]
+            entry['next_check'] = min(entry['next_check'], now + entry['interval'])
+
+    def next_delay(self, now=None):
+        """
+        Returns:
+            float: Attente jusqu'à la prochaine échéance (au plus base_interval)
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            deadlines = [self._state[log_file]['next_check'] for log_file in self._watched if log_file in self._state]
+        if not deadlines:
+            return self.base_interval
+        earliest = min(deadlines)
+        return min(self.base_interval, max(0.0, earliest - now))
+
+    def report_section(self):
+        """
+        Returns:
+            str: Intervalles et vérifications par fichier pour le rapport quotidien
+        """
+        lines = ["⏱️  VÉRIFICATIONS ADAPTATIVES"]
+        with self._lock:
+            for log_file, entry in sorted(self._state.items()):
+                stats = self.stats[log_file]
+                lines.append(
+                    f"  {log_file} : intervalle actuel {entry['interval']:.0f}s, {stats['checks']} vérifications "
+                    f"({stats['reads']} lectures, {stats['stats_only']} sans ouverture)"
+                )
+        if len(lines) == 1:
+            lines.append("  Aucune vérification")
+        return "\n".join(lines)
@@ -0,0 +1,209 @@
+"""
+Module de profilage du monitoring : durées par étape, cProfile et tracemalloc
+"""
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import signal
+import cProfile
+import datetime
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Contexte neutre réutilisé lorsque le profilage est désactivé
+NO_STAGE = nullcontext()
+
+# Étapes mesurées à chaque cycle, dans l'ordre d'affichage
+STAGES = ('read', 'filter', 'ai', 'report', 'email')
+
+
+def percentile(values, fraction):
+    """Percentile par rang le plus proche"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class CycleProfiler:
+    """Mesure les durées par étape de chaque cycle et capture des profils à la demande"""
+
+    def __init__(self, output_dir, tracemalloc_enabled=False, top_n=25):
+        """
+        Args:
+            output_dir (str): Répertoire où sont écrits les profils et durées
+            tracemalloc_enabled (bool): Suivre les allocations mémoire (coûteux)
+            top_n (int): Nombre d'entrées conservées dans les captures
+        """
+        self.output_dir = output_dir
+        self.tracemalloc_enabled = tracemalloc_enabled
+        self.top_n = top_n
+        self.capture_requested = False
+        self.cycles = 0
+        self.totals = {}
+        self._timings = {}
+        self._cycle_start = None
+        self._profiles = None
+        self._main_profile = None
+        self._lock = threading.Lock()
+
+        if tracemalloc_enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le profileur à partir de la configuration"""
+        return cls(
+            os.path.dirname(config['daily_report_file']),
+            tracemalloc_enabled=config.get('profiling_tracemalloc', False),
+            top_n=config.get('profiling_top_n', 25)
+        )
+
+    def install_signal_handler(self, signum=getattr(signal, 'SIGUSR1', None)):
+        """
+        Déclenche une capture au prochain cycle à la réception du signal
+
+        Args:
+            signum (int): Signal à écouter (SIGUSR1 par défaut)
+        """
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return
+
+        def request_capture(sig, frame):
+            self.capture_requested = True
+            print("🔬 Capture de profil demandée pour le prochain cycle")
+
+        signal.signal(signum, request_capture)
+
+    @contextmanager
+    def _timed(self, name):
+        """Chronomètre une étape et cumule sa durée sur le cycle"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._timings[name] = self._timings.get(name, 0.0) + elapsed
+
+    def stage(self, name):
+        """
+        Args:
+            name (str): Nom de l'étape (voir STAGES)
+
+        Returns:
+            contextmanager: Contexte chronométrant l'étape
+        """
+        return self._timed(name)
+
+    def wrap(self, func):
+        """
+        Enveloppe une tâche exécutée dans un thread de travail afin qu'elle
+        soit profilée par cProfile lorsqu'une capture est en cours
+
+        Args:
+            func (callable): Tâche à exécuter
+
+        Returns:
+            callable: Tâche enveloppée
+        """
+        profiles = self._profiles
+        # Depuis Python 3.12, cProfile observe tous les threads (sys.monitoring)
+        if profiles is None or sys.version_info >= (3, 12):
+            return func
+
+        @functools.wraps(func)
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            with self._lock:
+                profiles.append(profile)
+            return profile.runcall(func, *args, **kwargs)
+
+        return profiled
+
+    def start_cycle(self):
+        """Démarre la mesure d'un cycle (et la capture si elle a été demandée)"""
+        with self._lock:
+            self._timings = {}
+        self._cycle_start = time.perf_counter()
+
+        if self.capture_requested:
+            self.capture_requested = False
+            self._profiles = []
+            self._main_profile = cProfile.Profile()
+            self._main_profile.enable()
+
+    def end_cycle(self):
+        """Termine la mesure du cycle, écrit les durées et les éventuelles captures"""
+        total = time.perf_counter() - (self._cycle_start or time.perf_counter())
+        with self._lock:
+            timings = dict(self._timings)
+            self.cycles += 1
+            for name, elapsed in timings.items():
+                self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.totals['cycle'] = self.totals.get('cycle', 0.0) + total
+
+        record = {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'), 'cycle': round(total, 4)}
+        record.update({name: round(elapsed, 4) for name, elapsed in timings.items()})
+        self._write("cycle_timings.jsonl", json.dumps(record) + "\n", mode="a")
+
+        if self._main_profile is not None:
+            self._main_profile.disable()
+            self._dump_capture([self._main_profile] + self._profiles)
+            self._main_profile = None
+            self._profiles = None
+
+    def _dump_capture(self, profiles):
+        """Écrit le profil cProfile fusionné et l'instantané tracemalloc"""
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        try:
+            stats = pstats.Stats(profiles[0])
+            for profile in profiles[1:]:
+                stats.add(profile)
+            prof_file = os.path.join(self.output_dir, f"profile_{stamp}.prof")
+            stats.dump_stats(prof_file)
+
+            summary = io.StringIO()
+            pstats.Stats(prof_file, stream=summary).sort_stats('cumulative').print_stats(self.top_n)
+            self._write(f"profile_{stamp}.txt", summary.getvalue())
+            print(f"🔬 Profil cProfile écrit : {prof_file}")
+        except Exception as e:
+            print(f"⚠️  Impossible d'écrire le profil cProfile : {e}")
+
+        if self.tracemalloc_enabled and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"Mémoire suivie : {current / 1024:.0f} KiB (pic : {peak / 1024:.0f} KiB)"]
+            lines += [str(stat) for stat in snapshot.statistics('lineno')[:self.top_n]]
+            self._write(f"tracemalloc_{stamp}.txt", "\n".join(lines) + "\n")
+            print(f"🔬 Instantané tracemalloc écrit dans {self.output_dir}")
+
+    def _write(self, name, content, mode="w"):
+        """Écrit un fichier dans le répertoire de sortie"""
+        try:
+            with open(os.path.join(self.output_dir, name), mode, encoding='utf-8') as file:
+                file.write(content)
+        except Exception as e:
+            print(f"⚠️  Impossible d'écrire {name} : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Durées moyennes par étape pour le rapport quotidien
+        """
+        lines = ["⏱️  PROFILAGE DES CYCLES"]
+        with self._lock:
+            if not self.cycles:
+                lines.append("  Aucun cycle mesuré")
+            else:
+                for name in ('cycle',) + STAGES:
+                    if name in self.totals:
+                        lines.append(f"  {name} : {self.totals[name] / self.cycles * 1000:.1f} ms en moyenne")
+                lines.append(f"  Cycles mesurés : {self.cycles}")
+        return "\n".join(lines)
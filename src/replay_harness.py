@@ -0,0 +1,393 @@
+"""
+Banc de rejeu : rejoue des logs enregistrés à vitesse accélérée contre
+monitor_logs (IA et SMTP simulés) et mesure le délai de détection des incidents
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import datetime
+import threading
+from types import SimpleNamespace
+from collections import Counter
+
+import log_monitor
+from ai_dispatcher import AIDispatcher
+from config_loader import load_configuration
+from log_compactor import normalize_line
+from profiling import percentile
+
+# Événements considérés comme des incidents à détecter (surchargeable)
+DEFAULT_INCIDENT_PATTERN = (
+    r'Failed password|Invalid user|authentication failure|Out of memory|segfault|'
+    r'FAILURE|Permission denied|\[(?:error|crit|alert|emerg)\]|CRITICAL|possible break-in'
+)
+
+_ISO = re.compile(r'(\d{4}-\d{2}-\d{2})[T ](\d{2}:\d{2}:\d{2})')
+_SYSLOG = re.compile(r'^([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}:\d{2}:\d{2})')
+_COMBINED = re.compile(r'\[(\d{2}/[A-Z][a-z]{2}/\d{4}:\d{2}:\d{2}:\d{2})')
+
+_CALL_MARKER = re.compile(r'REPLAY_CALL: (\d+)')
+
+# Ligne d'un lot envoyé : numéro du mode structuré et compteur de compaction facultatifs
+_SENT_LINE = re.compile(r'^(?:L\d+: )?(.*?)(?: \[x(\d+)\])?$')
+
+# Fichiers d'état créés même si la configuration de base ne les nomme pas
+_DEFAULT_STATE_FILES = {
+    'token_usage_file': 'token_usage.json',
+    'anomaly_state_file': 'anomaly_baselines.json',
+    'summary_cache_file': 'summary_cache.json',
+    'report_index_db': 'report_index.db',
+}
+
+
+def parse_timestamp(line, year=None):
+    """
+    Extrait l'horodatage d'origine d'une ligne (ISO 8601, syslog ou format combiné)
+
+    Args:
+        line (str): Ligne de log
+        year (int): Année utilisée pour les horodatages syslog (sans année)
+
+    Returns:
+        float: Horodatage en secondes, ou None si absent
+    """
+    match = _ISO.search(line)
+    if match:
+        return datetime.datetime.fromisoformat(f"{match.group(1)} {match.group(2)}").timestamp()
+    match = _SYSLOG.match(line)
+    if match:
+        stamp = f"{year or datetime.date.today().year} {match.group(1)} {match.group(2)} {match.group(3)}"
+        return datetime.datetime.strptime(stamp, "%Y %b %d %H:%M:%S").timestamp()
+    match = _COMBINED.search(line)
+    if match:
+        return datetime.datetime.strptime(match.group(1), "%d/%b/%Y:%H:%M:%S").timestamp()
+    return None
+
+
+def load_recording(path):
+    """
+    Charge un log enregistré ; une ligne sans horodatage hérite du précédent
+
+    Returns:
+        list: Couples (horodatage, ligne)
+    """
+    events = []
+    previous = None
+    with open(path, "r", encoding='utf-8', errors='ignore') as file:
+        for line in file:
+            if not line.strip():
+                continue
+            timestamp = parse_timestamp(line)
+            if timestamp is None:
+                timestamp = previous if previous is not None else 0.0
+            # Les horodatages non monotones (rotation, horloges) ne reculent pas
+            previous = timestamp if previous is None else max(previous, timestamp)
+            events.append((previous, line if line.endswith('\n') else line + '\n'))
+    return events
+
+
+class _ReplayClient:
+    """IA simulée transmise par la file d'appels (même interface chat.complete que le client Mistral)"""
+
+    def __init__(self, complete):
+        """
+        Args:
+            complete (callable): Produit la réponse à partir des messages
+        """
+        self.chat = self
+        self._complete = complete
+
+    def complete(self, messages, **options):
+        """
+        Returns:
+            SimpleNamespace: Réponse au format du client Mistral (sans consommation de tokens)
+        """
+        content = self._complete(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+
+class ReplayHarness:
+    """Rejoue des enregistrements dans des fichiers temporaires surveillés par monitor_logs"""
+
+    def __init__(self, recordings, config, speed=10.0, incident_pattern=DEFAULT_INCIDENT_PATTERN,
+                 ai_latency=0.0, work_dir=None):
+        """
+        Args:
+            recordings (list): Fichiers de logs enregistrés (un fichier surveillé chacun)
+            config (dict): Configuration de base (intervalle, lots, filtres, ...)
+            speed (float): Facteur d'accélération du rejeu (1, 10, 100, ...)
+            incident_pattern (str): Expression régulière des lignes d'incident
+            ai_latency (float): Latence simulée de l'IA (secondes)
+            work_dir (str): Répertoire de travail (temporaire par défaut)
+        """
+        self.speed = speed
+        self.ai_latency = ai_latency
+        self.incident_regex = re.compile(incident_pattern)
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="log-replay-")
+        self.targets = {
+            recording: os.path.join(self.work_dir, f"{index}_{os.path.basename(recording)}")
+            for index, recording in enumerate(recordings)
+        }
+        self.config = self._isolate(config)
+
+        self.incidents = []
+        self.lines_written = 0
+        self.ai_calls = 0
+        self.alerts = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _isolate(self, config):
+        """Redirige fichiers et états vers le répertoire de travail, désactive les entrées externes"""
+        state_dir = os.path.join(self.work_dir, 'state')
+        os.makedirs(state_dir, exist_ok=True)
+        # Tout fichier d'état (*_file, *_db) est recréé sous le répertoire de
+        # travail : le rejeu ne lit ni n'écrase jamais l'état de production
+        state_files = {key: os.path.join(state_dir, name) for key, name in _DEFAULT_STATE_FILES.items()}
+        state_files.update({
+            key: os.path.join(state_dir, os.path.basename(value))
+            for key, value in config.items()
+            if key.endswith(('_file', '_db')) and key != 'daily_report_file' and isinstance(value, str) and value
+        })
+        return {
+            **config,
+            **state_files,
+            'log_files': list(self.targets.values()),
+            'daily_report_file': os.path.join(self.work_dir, 'daily_report.txt'),
+            'state_dir': state_dir,
+            'ai_api_key': config.get('ai_api_key') or 'replay',
+            # Tous les lots passent par l'IA simulée (le délai de bascule reste mesuré)
+            'analyzer_backend': 'mistral',
+            'analyzer_backends': {},
+            'correlation_mode': False,
+            'syslog_enabled': False,
+            'coordination_db': '',
+            'profiling': False,
+        }
+
+    # --- Écriture ---
+
+    def _replay(self):
+        """Écrit les lignes enregistrées en respectant leurs écarts (divisés par speed)"""
+        events = []
+        for recording, target in self.targets.items():
+            events.extend((timestamp, target, line) for timestamp, line in load_recording(recording))
+        events.sort(key=lambda event: event[0])
+        if not events:
+            return
+
+        handles = {target: open(target, "a", encoding='utf-8') for target in self.targets.values()}
+        try:
+            origin = events[0][0]
+            started = time.monotonic()
+            for timestamp, target, line in events:
+                delay = started + (timestamp - origin) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                with self._lock:
+                    handles[target].write(line)
+                    handles[target].flush()
+                    self.lines_written += 1
+                    if self.incident_regex.search(line):
+                        self.incidents.append({
+                            'file': target,
+                            'line': line.rstrip('\n'),
+                            'template': normalize_line(line),
+                            'written_at': time.monotonic(),
+                            'sent': False,
+                            'detected_at': None,
+                        })
+        finally:
+            for handle in handles.values():
+                handle.close()
+
+    # --- Substituts ---
+
+    def _claim_incidents(self, prompt, now):
+        """
+        Rattache à un appel les incidents dont la ligne figure dans le lot envoyé :
+        un incident retenu plusieurs cycles (micro-lot, événement multi-lignes)
+        est rattaché à l'appel qui le transmet réellement
+
+        Returns:
+            list: Incidents transmis par l'appel (chacun au plus une fois)
+        """
+        sent = Counter()
+        for line in prompt.splitlines():
+            match = _SENT_LINE.match(line)
+            sent[normalize_line(match.group(1))] += int(match.group(2) or 1)
+
+        claimed = []
+        for incident in self.incidents:
+            if incident['sent'] or incident['written_at'] > now or not sent[incident['template']]:
+                continue
+            sent[incident['template']] -= 1
+            incident['sent'] = True
+            claimed.append(incident)
+        return claimed
+
+    def _complete(self, messages):
+        """IA simulée : gravité élevée si le lot contient une ligne d'incident"""
+        if self.ai_latency:
+            time.sleep(self.ai_latency)
+        prompt = messages[-1]['content']
+        with self._lock:
+            self.ai_calls += 1
+            call_id = self.ai_calls
+            self._calls[call_id] = self._claim_incidents(prompt, time.monotonic())
+        if self.incident_regex.search(prompt):
+            return f"SEVERITY_SCORE: 9\nREPLAY_CALL: {call_id}\nIncident simulé détecté."
+        return f"SEVERITY_SCORE: 1\nREPLAY_CALL: {call_id}\nAucune anomalie simulée."
+
+    def _send_alert_email(self, log_file, analysis, severity_score, config):
+        """SMTP simulé : horodate la détection des incidents du lot alerté"""
+        alerted_at = time.monotonic()
+        match = _CALL_MARKER.search(analysis)
+        with self._lock:
+            self.alerts += 1
+            for incident in self._calls.get(int(match.group(1)), []) if match else []:
+                if incident['detected_at'] is None:
+                    incident['detected_at'] = alerted_at
+        return True
+
+    # --- Exécution ---
+
+    def run(self, drain=None):
+        """
+        Rejoue les enregistrements contre monitor_logs puis calcule les mesures
+
+        Args:
+            drain (float): Attente après la dernière ligne (défaut : 2 intervalles)
+
+        Returns:
+            dict: Mesures du rejeu
+        """
+        for target in self.targets.values():
+            open(target, "w").close()
+
+        drain = drain if drain is not None else 2 * self.config['log_check_interval'] + self.ai_latency
+        # IA et alertes simulées injectées dans les composants : tous les appels
+        # (analyse directe, routeur de moteurs, synthèses) passent par la file d'appels
+        runtime = log_monitor.create_runtime(self.config)
+        runtime['dispatcher'] = AIDispatcher.from_config(self.config, client=_ReplayClient(self._complete))
+        runtime['alert_sender'] = self._send_alert_email
+
+        log_monitor.shutdown_flag = False
+        monitor = threading.Thread(target=log_monitor.monitor_logs, args=(self.config, runtime),
+                                   name="replay-monitor", daemon=True)
+        started = time.monotonic()
+        monitor.start()
+        try:
+            self._replay()
+            replay_duration = time.monotonic() - started
+            time.sleep(drain)
+        finally:
+            log_monitor.shutdown_flag = True
+            monitor.join(timeout=self.config['log_check_interval'] + 60)
+
+        return self.results(replay_duration)
+
+    def results(self, replay_duration):
+        """
+        Returns:
+            dict: Délais de détection par incident, taux de faux négatifs et débit
+        """
+        latencies = [incident['detected_at'] - incident['written_at']
+                     for incident in self.incidents if incident['detected_at'] is not None]
+        missed = len(self.incidents) - len(latencies)
+        return {
+            'speed': self.speed,
+            'log_check_interval': self.config['log_check_interval'],
+            'lines_written': self.lines_written,
+            'replay_seconds': round(replay_duration, 3),
+            'throughput_lines_per_second': round(self.lines_written / replay_duration, 1) if replay_duration else None,
+            'ai_calls': self.ai_calls,
+            'alerts': self.alerts,
+            'incidents': len(self.incidents),
+            'detected': len(latencies),
+            'false_negative_rate': round(missed / len(self.incidents), 4) if self.incidents else 0.0,
+            'latency_p50': percentile(latencies, 0.5),
+            'latency_p95': percentile(latencies, 0.95),
+            'latency_max': max(latencies) if latencies else None,
+            'per_incident': [
+                {
+                    'file': os.path.basename(incident['file']),
+                    'line': incident['line'][:200],
+                    'latency': (incident['detected_at'] - incident['written_at'])
+                    if incident['detected_at'] is not None else None,
+                }
+                for incident in self.incidents
+            ],
+        }
+
+    def cleanup(self):
+        """Supprime le répertoire de travail"""
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def format_results(results):
+    """
+    Returns:
+        str: Résumé lisible des mesures du rejeu
+    """
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "-"
+
+    lines = [
+        f"⏩ Rejeu x{results['speed']:g} (intervalle {results['log_check_interval']}s)",
+        f"  Lignes rejouées : {results['lines_written']} en {results['replay_seconds']}s "
+        f"({results['throughput_lines_per_second']} lignes/s)",
+        f"  Appels IA : {results['ai_calls']}, alertes : {results['alerts']}",
+        f"  Incidents : {results['incidents']}, détectés : {results['detected']}, "
+        f"faux négatifs : {results['false_negative_rate']:.1%}",
+        f"  Délai de détection : p50 {seconds(results['latency_p50'])}, "
+        f"p95 {seconds(results['latency_p95'])}, max {seconds(results['latency_max'])}",
+    ]
+    for incident in results['per_incident']:
+        status = seconds(incident['latency']) if incident['latency'] is not None else "❌ non détecté"
+        lines.append(f"    [{status}] {incident['file']} : {incident['line'][:100]}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """Interface en ligne de commande du banc de rejeu"""
+    parser = argparse.ArgumentParser(description="Rejeu de logs enregistrés et mesure du délai d'alerte")
+    parser.add_argument('recordings', nargs='+', help="Logs enregistrés (horodatages d'origine)")
+    parser.add_argument('--speed', type=float, default=10.0, help="Accélération (1, 10, 100, ...)")
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(__file__), '../config/config.ini.example'),
+                        help="config.ini de base (lots, filtres, préfiltre, ...)")
+    parser.add_argument('--interval', type=float, help="Remplace log_check_interval (secondes)")
+    parser.add_argument('--incident-pattern', default=DEFAULT_INCIDENT_PATTERN)
+    parser.add_argument('--ai-latency', type=float, default=0.0, help="Latence simulée de l'IA (secondes)")
+    parser.add_argument('--drain', type=float, help="Attente après la dernière ligne (secondes)")
+    parser.add_argument('--json', help="Écrit les mesures détaillées dans ce fichier JSON")
+    args = parser.parse_args(argv)
+
+    # IA et SMTP sont simulés : les secrets réels ne sont pas nécessaires
+    os.environ.setdefault('AI_API_KEY', 'replay')
+    os.environ.setdefault('SMTP_PASSWORD', 'replay')
+    config = load_configuration(args.config)
+    if args.interval is not None:
+        config['log_check_interval'] = args.interval
+
+    harness = ReplayHarness(args.recordings, config, speed=args.speed,
+                            incident_pattern=args.incident_pattern, ai_latency=args.ai_latency)
+    try:
+        results = harness.run(drain=args.drain)
+    finally:
+        harness.cleanup()
+
+    print(format_results(results))
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+    return 0 if results['false_negative_rate'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
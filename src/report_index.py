@@ -0,0 +1,324 @@
+"""
+Module d'index plein texte des rapports archivés (SQLite FTS5)
+"""
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import datetime
+from contextlib import contextmanager
+
+from report_summarizer import parse_report_entries
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    archive TEXT NOT NULL,
+    day TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT NOT NULL,
+    severity INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_day ON entries (day);
+CREATE INDEX IF NOT EXISTS entries_archive ON entries (archive);
+CREATE TABLE IF NOT EXISTS entities (
+    entry_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entities_lookup ON entities (kind, value);
+CREATE INDEX IF NOT EXISTS entities_entry ON entities (entry_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses USING fts5 (
+    source, analysis, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+_IPV4 = re.compile(r'\b(?:(?:25[0-5]|2[0-4]\d|1?\d?\d)\.){3}(?:25[0-5]|2[0-4]\d|1?\d?\d)\b')
+_IPV6 = re.compile(r'(?<![\w:])(?:[0-9a-fA-F]{1,4}:){2,7}[0-9a-fA-F]{1,4}(?![\w:])')
+
+# Formes courantes d'un nom d'utilisateur dans les logs et les analyses
+_USERS = re.compile(
+    r"(?:\buser(?:name)?[=:]\s*|\bfor (?:invalid user )?|\butilisateur\s+)"
+    r"['\"`]?([a-zA-Z_][\w.-]{0,31})",
+    re.IGNORECASE
+)
+_USER_STOPWORDS = {'from', 'user', 'the', 'le', 'la', 'un', 'une', 'invalid', 'unknown'}
+
+_ARCHIVE_DATE = re.compile(r'rapport_(\d{4}-\d{2}-\d{2})\.txt$')
+
+
+class ReportSearchError(Exception):
+    """Requête de recherche refusée par SQLite (syntaxe FTS5 invalide)"""
+    pass
+
+
+def fts_query(query):
+    """
+    Convertit une recherche libre en requête FTS5 : chaque terme devient une
+    expression entre guillemets (wp-admin, /etc/passwd, sshd[123] ne sont pas
+    interprétés comme opérateurs ou colonnes)
+
+    Args:
+        query (str): Termes séparés par des espaces
+
+    Returns:
+        str: Requête FTS5 (vide si aucun terme ne contient de mot)
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split() if re.search(r'\w', term))
+
+
+def extract_entities(text):
+    """
+    Extrait les adresses IP et noms d'utilisateur d'une analyse
+
+    Args:
+        text (str): Texte de l'analyse
+
+    Returns:
+        set: Couples (type, valeur) avec type 'ip' ou 'user'
+    """
+    entities = {('ip', ip) for ip in _IPV4.findall(text)}
+    entities.update(('ip', ip.lower()) for ip in _IPV6.findall(text))
+    entities.update(
+        ('user', user.rstrip('.').lower()) for user in _USERS.findall(text)
+        if user.lower() not in _USER_STOPWORDS
+    )
+    return entities
+
+
+def _query_kind(term):
+    """Détermine si le terme recherché est une adresse IP"""
+    if _IPV4.fullmatch(term) or _IPV6.fullmatch(term):
+        return 'ip'
+    return None
+
+
+class ReportIndex:
+    """Index incrémental des analyses archivées : termes, IP, utilisateurs, gravité et date"""
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path (str): Base SQLite de l'index
+        """
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Ouvre une connexion à l'index"""
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def index_archive(self, archive_path, content=None):
+        """
+        Indexe (ou réindexe) un rapport archivé
+
+        Args:
+            archive_path (str): Chemin de l'archive
+            content (str): Contenu de l'archive (relu sur disque si absent)
+
+        Returns:
+            int: Nombre d'analyses indexées
+        """
+        archive_path = os.path.abspath(archive_path)
+        if content is None:
+            with open(archive_path, "r", encoding='utf-8') as file:
+                content = file.read()
+        stat = os.stat(archive_path)
+        match = _ARCHIVE_DATE.search(archive_path)
+        archive_day = match.group(1) if match else datetime.date.fromtimestamp(stat.st_mtime).isoformat()
+
+        entries = parse_report_entries(content)
+        with self._connect() as db:
+            self._remove_archive(db, archive_path)
+            for entry in entries:
+                cursor = db.execute(
+                    "INSERT INTO entries (archive, day, timestamp, source, severity) VALUES (?, ?, ?, ?, ?)",
+                    (archive_path, entry['timestamp'][:10] or archive_day, entry['timestamp'],
+                     entry['source'], entry['severity'])
+                )
+                entry_id = cursor.lastrowid
+                db.execute(
+                    "INSERT INTO analyses (rowid, source, analysis) VALUES (?, ?, ?)",
+                    (entry_id, entry['source'], entry['analysis'])
+                )
+                db.executemany(
+                    "INSERT INTO entities (entry_id, kind, value) VALUES (?, ?, ?)",
+                    [(entry_id, kind, value) for kind, value in extract_entities(entry['analysis'])]
+                )
+            db.execute(
+                "INSERT OR REPLACE INTO archives (path, size, mtime) VALUES (?, ?, ?)",
+                (archive_path, stat.st_size, stat.st_mtime)
+            )
+            db.commit()
+        return len(entries)
+
+    @staticmethod
+    def _remove_archive(db, archive_path):
+        """Supprime les analyses d'une archive déjà indexée"""
+        ids = [row[0] for row in db.execute("SELECT id FROM entries WHERE archive = ?", (archive_path,))]
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            db.execute(f"DELETE FROM analyses WHERE rowid IN ({marks})", chunk)
+            db.execute(f"DELETE FROM entities WHERE entry_id IN ({marks})", chunk)
+        db.execute("DELETE FROM entries WHERE archive = ?", (archive_path,))
+
+    def update(self, archive_dir):
+        """
+        Indexe les archives nouvelles ou modifiées d'un répertoire
+
+        Args:
+            archive_dir (str): Répertoire des archives
+
+        Returns:
+            int: Nombre d'archives (ré)indexées
+        """
+        with self._connect() as db:
+            known = {path: (size, mtime) for path, size, mtime in db.execute("SELECT path, size, mtime FROM archives")}
+
+        indexed = 0
+        for name in sorted(os.listdir(archive_dir)):
+            if not _ARCHIVE_DATE.search(name):
+                continue
+            path = os.path.abspath(os.path.join(archive_dir, name))
+            stat = os.stat(path)
+            if known.get(path) != (stat.st_size, stat.st_mtime):
+                self.index_archive(path)
+                indexed += 1
+        return indexed
+
+    def search(self, query, days=None, min_severity=0, source=None, limit=100, today=None, raw=False):
+        """
+        Recherche les analyses archivées
+
+        Args:
+            query (str): Adresse IP, "user:nom" ou termes recherchés
+            days (int): Limiter aux N derniers jours
+            min_severity (int): Gravité minimale
+            source (str): Limiter à une source (fichier ou hôte)
+            limit (int): Nombre maximum de résultats
+            today (datetime.date): Date de référence
+            raw (bool): Transmettre la requête telle quelle (syntaxe FTS5 : OR, NEAR, préfixe*)
+
+        Returns:
+            list: Résultats {day, timestamp, source, severity, analysis}, du plus récent au plus ancien
+
+        Raises:
+            ReportSearchError: Si la requête est refusée par SQLite
+        """
+        query = query.strip()
+        conditions = ["e.severity >= ?"]
+        params = [min_severity]
+        if days:
+            since = (today or datetime.date.today()) - datetime.timedelta(days=days)
+            conditions.append("e.day >= ?")
+            params.append(since.isoformat())
+        if source:
+            conditions.append("e.source = ?")
+            params.append(source)
+
+        if query.lower().startswith('user:'):
+            match_sql = "e.id IN (SELECT entry_id FROM entities WHERE kind = 'user' AND value = ?)"
+            match_params = [query[5:].strip().lower()]
+        elif _query_kind(query):
+            match_sql = "e.id IN (SELECT entry_id FROM entities WHERE kind = 'ip' AND value = ?)"
+            match_params = [query.lower()]
+        else:
+            match_sql = "e.id IN (SELECT rowid FROM analyses WHERE analyses MATCH ?)"
+            match_params = [query if raw else fts_query(query)]
+            if not match_params[0]:
+                return []
+
+        sql = (
+            "SELECT e.day, e.timestamp, e.source, e.severity, a.analysis "
+            "FROM entries e JOIN analyses a ON a.rowid = e.id "
+            f"WHERE {match_sql} AND {' AND '.join(conditions)} "
+            "ORDER BY e.timestamp DESC LIMIT ?"
+        )
+        try:
+            with self._connect() as db:
+                rows = db.execute(sql, match_params + params + [limit]).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ReportSearchError(f"Requête invalide « {query} » : {e}")
+        return [
+            {'day': day, 'timestamp': timestamp, 'source': src, 'severity': severity, 'analysis': analysis}
+            for day, timestamp, src, severity, analysis in rows
+        ]
+
+
+def index_archived_report(config, archive_path, content):
+    """
+    Ajoute un rapport qui vient d'être archivé à l'index
+
+    Args:
+        config (dict): Configuration
+        archive_path (str): Chemin de l'archive
+        content (str): Contenu archivé
+    """
+    if not config.get('report_index'):
+        return
+    try:
+        count = ReportIndex(config['report_index_db']).index_archive(archive_path, content)
+        print(f"🔎 {count} analyses indexées depuis {os.path.basename(archive_path)}")
+    except Exception as e:
+        print(f"⚠️  Impossible d'indexer le rapport archivé : {e}")
+
+
+def main(argv=None):
+    """Interface en ligne de commande de recherche dans les archives"""
+    from config_loader import load_configuration
+
+    parser = argparse.ArgumentParser(description="Recherche dans les rapports archivés")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update = subparsers.add_parser('update', help="Indexer les archives nouvelles ou modifiées")
+    update.add_argument('--archives', help="Répertoire des archives (défaut : celui du rapport quotidien)")
+
+    search = subparsers.add_parser('search', help="Rechercher une IP, user:nom ou des termes")
+    search.add_argument('query')
+    search.add_argument('--days', type=int, help="Limiter aux N derniers jours")
+    search.add_argument('--min-severity', type=int, default=0)
+    search.add_argument('--source')
+    search.add_argument('--limit', type=int, default=100)
+    search.add_argument('--raw', action='store_true', help="Requête en syntaxe FTS5 (OR, NEAR, préfixe*)")
+    args = parser.parse_args(argv)
+
+    config = load_configuration()
+    index = ReportIndex(config['report_index_db'])
+
+    if args.command == 'update':
+        archive_dir = args.archives or os.path.join(os.path.dirname(config['daily_report_file']), "archives")
+        print(f"🔎 {index.update(archive_dir)} archives indexées")
+        return 0
+
+    started = time.perf_counter()
+    try:
+        results = index.search(args.query, args.days, args.min_severity, args.source, args.limit, raw=args.raw)
+    except ReportSearchError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = (time.perf_counter() - started) * 1000
+    for result in results:
+        print(f"[{result['timestamp']}] [{result['source']}] gravité {result['severity']}")
+        print(result['analysis'])
+        print("-" * 60)
+    print(f"🔎 {len(results)} analyses trouvées en {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Module de synthèse hiérarchique (map-reduce) du rapport quotidien
+"""
+import os
+import re
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from ai_client import chat_complete
+
+# En-tête d'une entrée du rapport : [AAAA-MM-JJ HH:MM:SS] [source]
+_ENTRY_HEADER = re.compile(r'^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] \[(.+)\]$', re.MULTILINE)
+
+_SEVERITY = re.compile(r'SEVERITY_SCORE:\s*(\d+)')
+
+# Tranches de gravité, de la plus grave à la plus bénigne
+SEVERITY_BANDS = (
+    ('critique', 7),
+    ('modérée', 4),
+    ('bénigne', 1),
+    ('aucune', 0),
+)
+
+# Nombre maximum de synthèses conservées dans le cache
+CACHE_MAX_ENTRIES = 1000
+
+# Taille maximale d'un groupe envoyé en une fois à l'IA (caractères)
+GROUP_MAX_CHARS = 30000
+
+
+def parse_report_entries(content):
+    """
+    Découpe le contenu du rapport quotidien en entrées
+
+    Args:
+        content (str): Contenu brut du rapport
+
+    Returns:
+        list: Entrées {timestamp, source, analysis, severity}
+    """
+    parts = _ENTRY_HEADER.split(content)
+    entries = []
+    for timestamp, source, analysis in zip(parts[1::3], parts[2::3], parts[3::3]):
+        analysis = analysis.strip()
+        match = _SEVERITY.search(analysis)
+        entries.append({
+            'timestamp': timestamp,
+            'source': source,
+            'analysis': analysis,
+            'severity': max(0, min(10, int(match.group(1)))) if match else 0,
+        })
+    return entries
+
+
+def severity_band(score):
+    """
+    Returns:
+        str: Tranche de gravité du score
+    """
+    for band, minimum in SEVERITY_BANDS:
+        if score >= minimum:
+            return band
+    return 'aucune'
+
+
+def group_entries(entries):
+    """
+    Regroupe les entrées par source et tranche de gravité
+
+    Returns:
+        dict: {(source, tranche): entrées}, les plus graves en premier
+    """
+    groups = {}
+    for entry in entries:
+        groups.setdefault((entry['source'], severity_band(entry['severity'])), []).append(entry)
+    band_order = [band for band, _ in SEVERITY_BANDS]
+    return dict(sorted(groups.items(), key=lambda item: (band_order.index(item[0][1]), item[0][0])))
+
+
+class SummaryCache:
+    """Cache disque des synthèses intermédiaires, indexé par empreinte du contenu"""
+
+    def __init__(self, cache_file):
+        """
+        Args:
+            cache_file (str): Fichier JSON du cache (None = cache en mémoire)
+        """
+        self.cache_file = cache_file
+        self.hits = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        if cache_file:
+            try:
+                with open(cache_file, "r", encoding='utf-8') as file:
+                    self._entries = json.load(file)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"⚠️  Impossible de charger le cache des synthèses : {e}")
+
+    @staticmethod
+    def key(*parts):
+        """Calcule l'empreinte d'un contenu à synthétiser"""
+        return hashlib.sha256("\x1f".join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Retourne une synthèse en cache, ou None"""
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self.hits += 1
+            return summary
+
+    def put(self, key, summary):
+        """Ajoute une synthèse au cache (les plus anciennes sont évincées)"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = summary
+            while len(self._entries) > CACHE_MAX_ENTRIES:
+                del self._entries[next(iter(self._entries))]
+
+    def save(self):
+        """Écrit le cache de manière atomique"""
+        if not self.cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            tmp_file = self.cache_file + ".tmp"
+            with self._lock, open(tmp_file, "w", encoding='utf-8') as file:
+                json.dump(self._entries, file)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder le cache des synthèses : {e}")
+
+
+def _summarize(prompt, content, config, cache, budget, label, dispatcher=None):
+    """Synthétise un contenu via l'IA, en passant par le cache"""
+    key = SummaryCache.key(config.get('ai_model', ''), prompt, content)
+    summary = cache.get(key)
+    if summary is not None:
+        return summary
+
+    summary = chat_complete(
+        [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": content},
+        ],
+        {**config, 'ai_max_tokens': config.get('report_summary_max_tokens', 1024)},
+        log_file=label,
+        budget=budget,
+        dispatcher=dispatcher
+    )
+    cache.put(key, summary)
+    return summary
+
+
+def summarize_group(source, band, entries, config, cache, budget=None, dispatcher=None):
+    """
+    Synthétise les analyses d'un groupe (étape map)
+
+    Args:
+        source (str): Fichier ou flux d'origine
+        band (str): Tranche de gravité
+        entries (list): Entrées du groupe
+        config (dict): Configuration
+        cache (SummaryCache): Cache des synthèses
+        budget (TokenBudget): Compteur de tokens (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités et limite de débit (optionnel)
+
+    Returns:
+        str: Synthèse du groupe
+    """
+    if len(entries) == 1:
+        return entries[0]['analysis']
+
+    content = "\n\n".join(f"[{entry['timestamp']}]\n{entry['analysis']}" for entry in entries)
+    if len(content) > GROUP_MAX_CHARS:
+        # Groupe trop volumineux : synthèse par sous-groupes puis fusion
+        half = len(entries) // 2
+        content = "\n\n".join(
+            summarize_group(source, band, part, config, cache, budget, dispatcher)
+            for part in (entries[:half], entries[half:])
+        )
+
+    prompt = (
+        "Tu es un expert en cybersécurité. Tu reçois plusieurs analyses de logs d'une même source "
+        f"({source}) et de gravité {band}. Fusionne-les en une synthèse concise : anomalies "
+        "récurrentes (avec leur nombre d'occurrences et leur période), faits marquants et "
+        "recommandations dédupliquées. Commence par 'SEVERITY_SCORE: X' (score maximal du groupe)."
+    )
+    try:
+        return _summarize(prompt, content, config, cache, budget, "[rapport quotidien]", dispatcher)
+    except Exception as e:
+        print(f"⚠️  Synthèse impossible pour {source} ({band}) : {e}")
+        return content[:2000]
+
+
+def build_report_digest(content, config, budget=None, dispatcher=None):
+    """
+    Construit le rapport quotidien synthétisé : synthèses par source et
+    gravité calculées en parallèle (map), puis résumé exécutif (reduce)
+
+    Args:
+        content (str): Contenu brut du rapport quotidien
+        config (dict): Configuration
+        budget (TokenBudget): Compteur de tokens (optionnel)
+        dispatcher (AIDispatcher): File d'appels à priorités et limite de débit (optionnel)
+
+    Returns:
+        str: Rapport synthétisé (le détail complet reste dans l'archive)
+    """
+    entries = parse_report_entries(content)
+    groups = group_entries(entries)
+    cache = SummaryCache(config.get('summary_cache_file'))
+
+    # Les groupes sans anomalie sont seulement comptés
+    to_summarize = {key: group for key, group in groups.items() if key[1] != 'aucune'}
+    with ThreadPoolExecutor(max_workers=config.get('report_summary_workers', 4)) as executor:
+        futures = {
+            key: executor.submit(summarize_group, key[0], key[1], group, config, cache, budget, dispatcher)
+            for key, group in to_summarize.items()
+        }
+        summaries = {key: future.result() for key, future in futures.items()}
+
+    digest = ""
+    if summaries:
+        prompt = (
+            "Tu es un expert en cybersécurité. À partir des synthèses par source et par gravité "
+            "d'une journée de surveillance, rédige un résumé exécutif de quelques paragraphes : "
+            "incidents majeurs, tendances, sources à surveiller et actions prioritaires."
+        )
+        reduce_input = "\n\n".join(
+            f"### {source} - gravité {band} ({len(groups[(source, band)])} analyses)\n{summary}"
+            for (source, band), summary in summaries.items()
+        )
+        try:
+            digest = _summarize(prompt, reduce_input, config, cache, budget, "[rapport quotidien]", dispatcher)
+        except Exception as e:
+            print(f"⚠️  Résumé exécutif impossible : {e}")
+            digest = "Résumé exécutif indisponible (erreur IA), voir les synthèses ci-dessous."
+
+    cache.save()
+
+    lines = [
+        "📊 Rapport quotidien des logs (synthèse)",
+        f"{len(entries)} analyses, {len(summaries)} groupes synthétisés "
+        f"({cache.hits} synthèses réutilisées depuis le cache)",
+        "",
+        "=" * 60,
+        "RÉSUMÉ EXÉCUTIF",
+        "=" * 60,
+        digest or "Aucune anomalie détectée.",
+    ]
+    for (source, band), summary in summaries.items():
+        lines += [
+            "",
+            "=" * 60,
+            f"{source} - gravité {band} ({len(groups[(source, band)])} analyses)",
+            "=" * 60,
+            summary,
+        ]
+
+    quiet = sorted(source for source, band in groups if band == 'aucune')
+    if quiet:
+        lines += ["", f"✅ Analyses sans anomalie : {', '.join(quiet)}"]
+    lines += ["", "Le détail complet des analyses est conservé dans l'archive du rapport."]
+    return "\n".join(lines) + "\n"
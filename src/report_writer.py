@@ -0,0 +1,259 @@
+"""
+Module d'écriture du rapport quotidien par un thread unique : file
+d'entrées, écritures groupées, fsync périodique et rotation atomique
+"""
+import os
+import glob
+import time
+import queue
+import datetime
+import threading
+
+REPORT_HEADER = "📊 Rapport quotidien des logs\n"
+
+# Nombre maximum d'entrées regroupées en une écriture
+BATCH_MAX = 256
+
+# Entrées conservées après un échec d'écriture (réessayées au lot suivant)
+RETRY_MAX = 10000
+
+# Délai avant un nouvel essai lorsqu'aucune entrée n'arrive (secondes)
+RETRY_DELAY = 5.0
+
+
+def pending_reports(report_file):
+    """
+    Returns:
+        list: Rapports mis de côté par une rotation et pas encore envoyés (du plus ancien au plus récent)
+    """
+    return sorted(glob.glob(f"{glob.escape(report_file)}.*.pending"))
+
+
+class _Command:
+    """Opération exécutée par le thread d'écriture entre deux lots"""
+
+    def __init__(self, name):
+        self.name = name
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ReportWriter:
+    """Seul écrivain du rapport quotidien : un descripteur ouvert, écritures groupées"""
+
+    def __init__(self, report_file, fsync_interval=5.0):
+        """
+        Args:
+            report_file (str): Fichier du rapport quotidien
+            fsync_interval (float): Délai maximal avant fsync des entrées écrites
+                (0 = fsync après chaque lot)
+        """
+        self.report_file = report_file
+        self.fsync_interval = fsync_interval
+        self.stats = {'entries': 0, 'batches': 0, 'fsyncs': 0, 'rotations': 0, 'write_errors': 0, 'dropped': 0}
+        self._queue = queue.Queue()
+        self._retry = []
+        self._thread = None
+        self._handle = None
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit l'écrivain à partir de la configuration"""
+        return cls(config['daily_report_file'], fsync_interval=config.get('report_fsync_interval', 5.0))
+
+    def start(self):
+        """Démarre le thread d'écriture"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="report-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, log_file, analysis, timestamp=None):
+        """
+        Ajoute une analyse au rapport (non bloquant)
+
+        Args:
+            log_file (str): Fichier de log analysé
+            analysis (str): Résultat de l'analyse
+            timestamp (datetime.datetime): Horodatage de l'entrée (maintenant par défaut)
+        """
+        timestamp = (timestamp or datetime.datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put(f"\n[{timestamp}] [{log_file}]\n{analysis}\n")
+
+    def _execute(self, name, timeout=30):
+        """Soumet une opération au thread d'écriture et attend son résultat"""
+        command = _Command(name)
+        self._queue.put(command)
+        if self._thread is None or not self._thread.is_alive():
+            # Thread non démarré (outil en ligne de commande, tests) : exécution directe
+            self._process([self._queue.get_nowait() for _ in range(self._queue.qsize())])
+        if not command.done.wait(timeout):
+            raise TimeoutError(f"Écrivain du rapport indisponible ({name})")
+        if command.error is not None:
+            raise command.error
+        return command.result
+
+    def flush(self):
+        """Attend que les entrées en file soient écrites et synchronisées sur disque"""
+        return self._execute('flush')
+
+    def rotate(self):
+        """
+        Met de côté le rapport courant (renommage atomique) et en ouvre un
+        nouveau : les entrées suivantes vont dans le nouveau fichier
+
+        Returns:
+            str: Chemin du rapport mis de côté, ou None si aucun rapport
+        """
+        return self._execute('rotate')
+
+    def close(self):
+        """Écrit les entrées restantes et arrête le thread"""
+        if self._thread is not None and self._thread.is_alive():
+            self._execute('stop')
+            self._thread.join(timeout=5)
+        else:
+            self._process([self._queue.get_nowait() for _ in range(self._queue.qsize())])
+            self._close_handle()
+
+    # --- Thread d'écriture ---
+
+    def _open(self):
+        if self._handle is None:
+            directory = os.path.dirname(self.report_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.report_file)
+            self._handle = open(self.report_file, "a", encoding='utf-8')
+            if is_new:
+                self._handle.write(REPORT_HEADER)
+        return self._handle
+
+    def _close_handle(self):
+        if self._handle is not None:
+            self._sync()
+            self._handle.close()
+            self._handle = None
+
+    def _sync(self):
+        if self._handle is not None:
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+            self.stats['fsyncs'] += 1
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _write_entries(self, entries):
+        entries = self._retry + entries
+        self._retry = []
+        if not entries:
+            return
+        try:
+            self._open().write("".join(entries))
+            self._handle.flush()
+            self._dirty = True
+            self.stats['entries'] += len(entries)
+            self.stats['batches'] += 1
+        except Exception as e:
+            print(f"❌ Erreur lors de la sauvegarde du rapport ({len(entries)} entrées conservées) : {e}")
+            self.stats['write_errors'] += 1
+            # Descripteur fermé (rouvert au prochain essai), entrées réessayées au lot suivant
+            if self._handle is not None:
+                try:
+                    self._handle.close()
+                except Exception:
+                    pass
+                self._handle = None
+            if len(entries) > RETRY_MAX:
+                self.stats['dropped'] += len(entries) - RETRY_MAX
+                entries = entries[-RETRY_MAX:]
+            self._retry = entries
+
+    def _rotate(self):
+        self._close_handle()
+        if not os.path.exists(self.report_file):
+            return None
+        with open(self.report_file, "r", encoding='utf-8') as file:
+            content = file.read()
+        if not content.strip() or content == REPORT_HEADER:
+            return None
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = f"{self.report_file}.{stamp}.pending"
+        os.replace(self.report_file, rotated)
+        self._open()
+        self._sync()
+        self.stats['rotations'] += 1
+        return rotated
+
+    def _process(self, items):
+        """Écrit un lot d'entrées puis exécute les opérations demandées, dans l'ordre"""
+        entries = []
+        stop = None
+        for item in items:
+            if not isinstance(item, _Command):
+                entries.append(item)
+                continue
+            if item.name == 'stop':
+                # Arrêt : les entrées encore en file sont écrites avant fermeture
+                stop = item
+                continue
+            self._write_entries(entries)
+            entries = []
+            try:
+                if item.name == 'rotate':
+                    item.result = self._rotate()
+                elif item.name == 'flush':
+                    self._sync()
+            except Exception as e:
+                item.error = e
+            item.done.set()
+        # Entrées restantes ; nouvel essai des entrées conservées à l'arrêt ou sans nouvelle entrée
+        if entries or not items or stop is not None:
+            self._write_entries(entries)
+
+        if stop is not None:
+            try:
+                self._close_handle()
+            except Exception as e:
+                stop.error = e
+            stop.done.set()
+        return stop is not None
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._dirty:
+                timeout = max(0.0, self._last_sync + self.fsync_interval - time.monotonic())
+            if self._retry:
+                timeout = min(timeout, RETRY_DELAY) if timeout is not None else RETRY_DELAY
+            try:
+                items = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                items = []
+            while len(items) < BATCH_MAX:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if self._process(items):
+                return
+            if self._dirty and time.monotonic() - self._last_sync >= self.fsync_interval:
+                try:
+                    self._sync()
+                except Exception as e:
+                    print(f"⚠️  fsync du rapport impossible : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Activité de l'écrivain du rapport pour le rapport quotidien
+        """
+        return (
+            "📝 ÉCRITURE DU RAPPORT\n"
+            f"  {self.stats['entries']} entrées en {self.stats['batches']} écritures, "
+            f"{self.stats['fsyncs']} fsync, {self.stats['rotations']} rotations, "
+            f"{self.stats['write_errors']} échecs d'écriture ({self.stats['dropped']} entrées perdues)"
+        )
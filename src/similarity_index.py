@@ -0,0 +1,323 @@
+"""
+Module de détection des lots quasi identiques (MinHash et LSH) pour
+réutiliser une analyse récente plutôt que rappeler l'IA
+"""
+import os
+import re
+import json
+import time
+import zlib
+import random
+import datetime
+import threading
+from collections import OrderedDict
+
+from anomaly_scorer import compile_forward_patterns
+from log_compactor import normalize_line
+
+# Nombre de permutations MinHash (longueur des signatures)
+NUM_PERM = 64
+
+# Découpage LSH des signatures : BANDS bandes de ROWS valeurs
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Taille des fragments de mots (shingles) extraits de chaque ligne
+SHINGLE_SIZE = 3
+
+# Gabarits distincts maximum d'un lot indexé (au-delà, le lot est trop
+# hétérogène pour servir de référence)
+MAX_TEMPLATES = 1000
+
+# Chemins (URL, fichiers) : leurs segments sont masqués dans les gabarits pour
+# qu'un même scanner sondant d'autres chemins reste un lot similaire et connu ;
+# la ponctuation ("..", "%2e", extension) est conservée et distingue les chemins suspects
+_PATH = re.compile(r'(?<![\w.:/])/[^\s"\'?#]*')
+_PATH_SEGMENT = re.compile(r'[A-Za-z0-9_-]+')
+
+_PRIME = (1 << 61) - 1
+
+# Coefficients fixes : les signatures restent comparables après redémarrage
+_rng = random.Random(0x10C1A)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def template(line):
+    """
+    Gabarit d'une ligne : ligne normalisée dont les segments de chemins sont masqués
+
+    Args:
+        line (str): Ligne de log
+
+    Returns:
+        str: Gabarit (ex. '<IP> ... "GET /*/*.* HTTP/<N>.<N>" <N> ...')
+    """
+    return normalize_line(_PATH.sub(lambda match: _PATH_SEGMENT.sub('*', match.group(0)), line))
+
+
+def shingles(logs):
+    """
+    Extrait les fragments des gabarits d'un lot (IP, nombres, identifiants et
+    segments de chemins masqués)
+
+    Args:
+        logs (list): Lignes du lot
+
+    Returns:
+        set: Empreintes 32 bits des fragments de SHINGLE_SIZE mots
+    """
+    hashes = set()
+    for line in logs:
+        words = template(line).split()
+        if len(words) <= SHINGLE_SIZE:
+            hashes.add(zlib.crc32(" ".join(words).encode('utf-8')))
+            continue
+        for i in range(len(words) - SHINGLE_SIZE + 1):
+            hashes.add(zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode('utf-8')))
+    return hashes
+
+
+def templates(logs):
+    """
+    Extrait les gabarits d'un lot (voir template)
+
+    Args:
+        logs (list): Lignes du lot
+
+    Returns:
+        set: Empreintes 32 bits des gabarits de lignes
+    """
+    return {zlib.crc32(template(line).encode('utf-8')) for line in logs}
+
+
+def minhash(hashes):
+    """
+    Calcule la signature MinHash d'un ensemble de fragments
+
+    Returns:
+        tuple: NUM_PERM minima (vide si l'ensemble est vide)
+    """
+    if not hashes:
+        return ()
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def estimate_similarity(first, second):
+    """
+    Returns:
+        float: Estimation de l'indice de Jaccard entre deux signatures
+    """
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for x, y in zip(first, second) if x == y) / len(first)
+
+
+def _band_keys(signature):
+    return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class SimilarityIndex:
+    """Table LSH bornée des lots analysés récemment (éviction des moins utilisés)"""
+
+    def __init__(self, state_file=None, threshold=0.9, max_entries=2000, max_age=24 * 3600, forward_patterns=None):
+        """
+        Args:
+            state_file (str): Fichier JSON de persistance (None = en mémoire)
+            threshold (float): Similarité de Jaccard minimale pour réutiliser une analyse
+            max_entries (int): Nombre maximum de lots conservés
+            max_age (float): Âge maximal d'une analyse réutilisable en secondes
+            forward_patterns (str): Motifs dont la présence impose une nouvelle analyse
+        """
+        self.state_file = state_file
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.forward_regex = compile_forward_patterns(forward_patterns)
+        self.stats = {'lookups': 0, 'saved_calls': 0, 'saved_tokens': 0, 'evictions': 0, 'novel': 0}
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        for entry in self._load():
+            self._insert(entry)
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit l'index à partir de la configuration"""
+        return cls(
+            config.get('similarity_state_file'),
+            threshold=config.get('similarity_threshold', 0.9),
+            max_entries=config.get('similarity_max_entries', 2000),
+            max_age=config.get('similarity_max_age', 24) * 3600,
+            forward_patterns=config.get('forward_patterns')
+        )
+
+    def _insert(self, entry):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        for key in _band_keys(entry['signature']):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)))
+            self.stats['evictions'] += 1
+
+    def _evict(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        for key in _band_keys(entry['signature']):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def lookup(self, source, logs, now=None):
+        """
+        Cherche un lot du même fichier suffisamment proche et encore récent
+
+        Une analyse n'est réutilisée que si chaque gabarit du nouveau lot figure
+        dans le lot de référence : une seule ligne inédite (ou correspondant à
+        forward_patterns) dans un lot par ailleurs routinier impose un appel IA.
+        Les chemins étant masqués dans les gabarits, les mêmes requêtes vers
+        d'autres chemins restent connues.
+
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            logs (list): Lignes du lot à analyser
+            now (float): Horodatage de référence
+
+        Returns:
+            dict: Analyse réutilisable {analysis, severity, similarity, time}, ou None
+        """
+        if self.forward_regex is not None and any(self.forward_regex.search(line) for line in logs):
+            return None
+        signature = minhash(shingles(logs))
+        if not signature:
+            return None
+        batch_templates = templates(logs)
+        now = now if now is not None else time.time()
+        with self._lock:
+            self.stats['lookups'] += 1
+            candidates = set()
+            for key in _band_keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+
+            best_id, best, novel = None, 0.0, False
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if entry['source'] != source or now - entry['time'] > self.max_age:
+                    continue
+                similarity = estimate_similarity(signature, entry['signature'])
+                if similarity < self.threshold or similarity <= best:
+                    continue
+                if not batch_templates <= entry['templates']:
+                    novel = True
+                    continue
+                best_id, best = entry_id, similarity
+            if best_id is None:
+                if novel:
+                    self.stats['novel'] += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            entry = self._entries[best_id]
+            entry['reuses'] += 1
+            self.stats['saved_calls'] += 1
+            self.stats['saved_tokens'] += sum(len(line) for line in logs) // 4
+            return {
+                'analysis': entry['analysis'],
+                'severity': entry['severity'],
+                'similarity': best,
+                'time': entry['time'],
+            }
+
+    def add(self, source, logs, analysis, severity, now=None):
+        """
+        Enregistre l'analyse d'un lot pour les recherches suivantes
+
+        Args:
+            source (str): Fichier de log ou flux d'origine
+            logs (list): Lignes analysées
+            analysis (str): Analyse produite par l'IA
+            severity (int): Score de gravité de l'analyse
+        """
+        signature = minhash(shingles(logs))
+        batch_templates = templates(logs)
+        if not signature or len(batch_templates) > MAX_TEMPLATES:
+            return
+        with self._lock:
+            self._insert({
+                'source': source,
+                'signature': signature,
+                'templates': batch_templates,
+                'analysis': analysis,
+                'severity': severity,
+                'time': now if now is not None else time.time(),
+                'reuses': 0,
+            })
+
+    def _load(self):
+        """Charge les lots enregistrés depuis le disque"""
+        if not self.state_file:
+            return []
+        try:
+            with open(self.state_file, "r", encoding='utf-8') as file:
+                entries = json.load(file)
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            print(f"⚠️  Impossible de charger l'index de similarité : {e}")
+            return []
+        # Les lots enregistrés sans gabarits (anciennes versions) ne sont plus réutilisables
+        entries = [entry for entry in entries if 'templates' in entry]
+        for entry in entries:
+            entry['signature'] = tuple(entry['signature'])
+            entry['templates'] = set(entry['templates'])
+        return entries
+
+    def save(self):
+        """Écrit l'index de manière atomique"""
+        if not self.state_file:
+            return
+        with self._lock:
+            data = [{**entry, 'signature': list(entry['signature']), 'templates': sorted(entry['templates'])}
+                    for entry in self._entries.values()]
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, "w", encoding='utf-8') as file:
+                json.dump(data, file)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder l'index de similarité : {e}")
+
+    def report_section(self):
+        """
+        Returns:
+            str: Appels IA évités grâce aux lots quasi identiques pour le rapport quotidien
+        """
+        stats = self.stats
+        return (
+            "♻️  LOTS QUASI IDENTIQUES\n"
+            f"  {stats['saved_calls']} appels IA évités sur {stats['lookups']} lots "
+            f"(similarité ≥ {self.threshold:.0%}), ~{stats['saved_tokens']} tokens économisés, "
+            f"{stats['novel']} lots similaires réanalysés pour lignes inédites, "
+            f"{len(self._entries)} lots indexés ({stats['evictions']} évincés)"
+        )
+
+
+def reused_analysis(match):
+    """
+    Met à jour légèrement une analyse réutilisée (origine et similarité)
+
+    Args:
+        match (dict): Résultat de SimilarityIndex.lookup()
+
+    Returns:
+        str: Analyse à enregistrer dans le rapport
+    """
+    analysed_at = datetime.datetime.fromtimestamp(match['time']).strftime("%Y-%m-%d %H:%M")
+    return (
+        f"{match['analysis'].rstrip()}\n"
+        f"♻️  Analyse reprise d'un lot similaire à {match['similarity']:.0%} analysé le {analysed_at}."
+    )
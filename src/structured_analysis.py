@@ -0,0 +1,163 @@
+"""
+Module du mode de sortie structurée : l'IA répond en JSON compact
+(gravité, constats avec références de lignes, recommandations), la réponse
+est validée en enregistrement typé puis mise en forme pour le rapport et
+les alertes
+"""
+import re
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Format de réponse JSON demandé à l'API
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
+
+# Bornes de l'enregistrement (réponse compacte)
+MAX_FINDINGS = 10
+MAX_RECOMMENDATIONS = 5
+MAX_TEXT_LENGTH = 300
+
+# Longueur des extraits de lignes cités dans le rendu
+QUOTE_LENGTH = 160
+
+STRUCTURED_PROMPT = (
+    "Tu es un expert en cybersécurité et en analyse de logs Linux. "
+    "Réponds UNIQUEMENT par un objet JSON compact, sans texte autour, au format : "
+    '{"severity": X, "findings": [{"line": N, "issue": "..."}], "recommendations": ["..."]} '
+    "où severity est un entier de 0 (aucune anomalie) à 10 (critique), line le numéro "
+    "de la ligne concernée (préfixe LN: des logs), issue une description courte de "
+    f"l'anomalie. Au plus {MAX_FINDINGS} constats et {MAX_RECOMMENDATIONS} recommandations, "
+    "une phrase chacun. Si aucune anomalie : severity 0 et listes vides."
+)
+
+_JSON_OBJECT = re.compile(r'\{.*\}', re.DOTALL)
+
+
+class StructuredOutputError(ValueError):
+    """Réponse de l'IA non conforme au format structuré"""
+    pass
+
+
+@dataclass
+class Finding:
+    """Anomalie constatée, rattachée à une ligne du lot"""
+    issue: str
+    line: Optional[int] = None
+
+
+@dataclass
+class AnalysisRecord:
+    """Analyse structurée d'un lot de logs"""
+    severity: int
+    findings: list = field(default_factory=list)
+    recommendations: list = field(default_factory=list)
+
+
+def structured_messages(logs):
+    """
+    Construit les messages de la demande d'analyse structurée (lignes numérotées)
+
+    Args:
+        logs (list): Lignes (ou événements) à analyser
+
+    Returns:
+        list: Messages (role/content)
+    """
+    numbered = "".join(f"L{number}: {line.rstrip()}\n" for number, line in enumerate(logs, start=1))
+    return [
+        {"role": "system", "content": STRUCTURED_PROMPT},
+        {"role": "user", "content": f"Logs à analyser :\n{numbered}"},
+    ]
+
+
+def structured_config(config):
+    """
+    Returns:
+        dict: Configuration de l'appel avec la complétion bornée (ai_structured_max_tokens)
+    """
+    return {**config, 'ai_max_tokens': min(config.get('ai_max_tokens', 4096), config.get('ai_structured_max_tokens', 512))}
+
+
+def _text(value):
+    return " ".join(str(value).split())[:MAX_TEXT_LENGTH]
+
+
+def parse_record(text):
+    """
+    Valide une réponse JSON et la convertit en enregistrement typé
+
+    Args:
+        text (str): Réponse de l'IA
+
+    Returns:
+        AnalysisRecord: Enregistrement (gravité bornée entre 0 et 10)
+
+    Raises:
+        StructuredOutputError: Si la réponse n'est pas un objet JSON conforme
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        # Objet JSON entouré de texte ou de balises ```json
+        match = _JSON_OBJECT.search(text or '')
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        raise StructuredOutputError("Réponse structurée : objet JSON attendu")
+
+    try:
+        severity = max(0, min(10, int(data['severity'])))
+    except (KeyError, TypeError, ValueError):
+        raise StructuredOutputError("Réponse structurée : champ severity entier manquant")
+
+    for key in ('findings', 'recommendations'):
+        if not isinstance(data.get(key) or [], list):
+            raise StructuredOutputError(f"Réponse structurée : champ {key} de type liste attendu")
+
+    findings = []
+    for item in (data.get('findings') or [])[:MAX_FINDINGS]:
+        if isinstance(item, dict):
+            issue = item.get('issue') or item.get('description')
+            line = item.get('line')
+        else:
+            issue, line = item, None
+        if not issue:
+            continue
+        try:
+            line = int(line) if line is not None else None
+        except (TypeError, ValueError):
+            line = None
+        findings.append(Finding(_text(issue), line))
+
+    recommendations = [_text(item) for item in (data.get('recommendations') or [])[:MAX_RECOMMENDATIONS] if item]
+    return AnalysisRecord(severity, findings, recommendations)
+
+
+def render_record(record, logs=None):
+    """
+    Met en forme un enregistrement pour le rapport quotidien et les alertes
+
+    Args:
+        record (AnalysisRecord): Analyse structurée
+        logs (list): Lignes analysées (citation des lignes référencées)
+
+    Returns:
+        str: Analyse commençant par SEVERITY_SCORE
+    """
+    lines = [f"SEVERITY_SCORE: {record.severity}"]
+    if not record.findings:
+        lines.append("Aucune anomalie détectée.")
+    else:
+        lines.append("Anomalies :")
+        for finding in record.findings:
+            reference = f"[L{finding.line}] " if finding.line else ""
+            lines.append(f"- {reference}{finding.issue}")
+            if logs and finding.line and 1 <= finding.line <= len(logs):
+                quote = " ".join(logs[finding.line - 1].split())
+                lines.append(f"    > {quote[:QUOTE_LENGTH]}")
+    if record.recommendations:
+        lines.append("Recommandations :")
+        lines.extend(f"- {recommendation}" for recommendation in record.recommendations)
+    return "\n".join(lines)
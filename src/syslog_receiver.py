@@ -0,0 +1,252 @@
+"""
+Module de réception syslog (UDP/TCP) pour l'ingestion multi-serveurs
+"""
+import re
+import asyncio
+import threading
+from collections import deque
+
+# RFC 5424 : <PRI>VERSION TIMESTAMP HOST APP PROCID MSGID [SD] MSG
+_RFC5424 = re.compile(
+    r'^<(?P<pri>\d{1,3})>(?P<version>\d{1,2}) (?P<timestamp>\S+) (?P<host>\S+) '
+    r'(?P<app>\S+) (?P<procid>\S+) (?P<msgid>\S+) '
+    r'(?P<sd>-|(?:\[(?:[^\]\\]|\\.)*\])+) ?(?P<message>.*)$',
+    re.DOTALL
+)
+
+# RFC 3164 : <PRI>Mmm dd hh:mm:ss HOST TAG: MSG
+_RFC3164 = re.compile(
+    r'^<(?P<pri>\d{1,3})>(?P<timestamp>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) '
+    r'(?P<host>\S+) (?P<message>.*)$',
+    re.DOTALL
+)
+
+_TAG = re.compile(r'^(?P<app>[^\s:\[]+)(?:\[(?P<procid>[^\]]*)\])?: ?(?P<message>.*)$', re.DOTALL)
+
+
+def parse_syslog_message(data, peer_host=None):
+    """
+    Analyse un message syslog RFC 5424 ou RFC 3164
+
+    Args:
+        data (bytes): Message brut (sans délimiteur de trame)
+        peer_host (str): Adresse de l'émetteur, utilisée si l'en-tête n'a pas d'hôte
+
+    Returns:
+        dict: facility, severity, timestamp, host, app, message
+    """
+    text = data.decode('utf-8', errors='ignore').lstrip('\ufeff').rstrip('\r\n')
+
+    match = _RFC5424.match(text)
+    if match:
+        fields = match.groupdict()
+        message = fields['message'].lstrip('\ufeff')
+        app = fields['app'] if fields['app'] != '-' else ''
+        host = fields['host'] if fields['host'] != '-' else peer_host
+    else:
+        match = _RFC3164.match(text)
+        if match:
+            fields = match.groupdict()
+            host = fields['host']
+            tag = _TAG.match(fields['message'])
+            app, message = (tag.group('app'), tag.group('message')) if tag else ('', fields['message'])
+        else:
+            # Message sans en-tête reconnu : conservé tel quel
+            pri = re.match(r'^<(\d{1,3})>', text)
+            fields = {'pri': pri.group(1) if pri else '13', 'timestamp': '-'}
+            host, app, message = peer_host, '', text[pri.end():] if pri else text
+
+    pri = int(fields['pri'])
+    return {
+        'facility': pri // 8,
+        'severity': pri % 8,
+        'timestamp': fields['timestamp'],
+        'host': host or 'unknown',
+        'app': app,
+        'message': message,
+    }
+
+
+def format_syslog_line(record):
+    """
+    Returns:
+        str: Ligne de log lisible pour l'analyse
+    """
+    app = f"{record['app']}: " if record['app'] else ''
+    return f"{record['timestamp']} {record['host']} {app}{record['message']}\n"
+
+
+class _UDPProtocol(asyncio.DatagramProtocol):
+    """Réception des datagrammes syslog (un message par datagramme)"""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        self.receiver.ingest(data, addr[0])
+
+
+class SyslogReceiver:
+    """Serveur syslog UDP/TCP alimentant des flux virtuels bornés par hôte"""
+
+    def __init__(self, bind='0.0.0.0', udp_port=5514, tcp_port=5514, max_lines_per_host=5000, max_hosts=256):
+        """
+        Args:
+            bind (str): Adresse d'écoute
+            udp_port (int): Port UDP (None = désactivé, 0 = port libre)
+            tcp_port (int): Port TCP (None = désactivé, 0 = port libre)
+            max_lines_per_host (int): Lignes conservées par hôte entre deux cycles
+            max_hosts (int): Nombre maximum d'hôtes suivis
+        """
+        self.bind = bind
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.max_lines_per_host = max_lines_per_host
+        self.max_hosts = max_hosts
+        self.udp_address = None
+        self.tcp_address = None
+        self.stats = {}
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._startup_error = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le récepteur à partir de la configuration"""
+        return cls(
+            bind=config.get('syslog_bind', '0.0.0.0'),
+            udp_port=config.get('syslog_udp_port') or None,
+            tcp_port=config.get('syslog_tcp_port') or None,
+            max_lines_per_host=config.get('syslog_max_lines_per_host', 5000),
+            max_hosts=config.get('syslog_max_hosts', 256)
+        )
+
+    def ingest(self, data, peer_host=None):
+        """
+        Ajoute un message brut au flux de son hôte
+
+        Args:
+            data (bytes): Message syslog
+            peer_host (str): Adresse de l'émetteur
+        """
+        if not data.strip():
+            return
+        record = parse_syslog_message(data, peer_host)
+        host = record['host']
+
+        with self._lock:
+            if host not in self._buffers:
+                if len(self._buffers) >= self.max_hosts:
+                    self.stats.setdefault('[hôtes refusés]', {'received': 0, 'dropped': 0})['dropped'] += 1
+                    return
+                self._buffers[host] = deque(maxlen=self.max_lines_per_host)
+                self.stats[host] = {'received': 0, 'dropped': 0}
+            buffer = self._buffers[host]
+            stats = self.stats[host]
+            stats['received'] += 1
+            if len(buffer) == buffer.maxlen:
+                stats['dropped'] += 1
+            buffer.append(format_syslog_line(record))
+
+    def drain(self):
+        """
+        Récupère les lignes reçues depuis le dernier appel
+
+        Returns:
+            dict: Lignes par hôte {hôte: lignes}
+        """
+        with self._lock:
+            batches = {host: list(buffer) for host, buffer in self._buffers.items() if buffer}
+            for buffer in self._buffers.values():
+                buffer.clear()
+        return batches
+
+    async def _handle_tcp(self, reader, writer):
+        """Lit un flux TCP en tramage par comptage d'octets (RFC 6587) ou par saut de ligne"""
+        peer_host = writer.get_extra_info('peername', ('unknown',))[0]
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                if first.isdigit():
+                    length = first + await reader.readuntil(b' ')
+                    self.ingest(await reader.readexactly(int(length[:-1])), peer_host)
+                elif first not in b'\r\n':
+                    self.ingest(first + await reader.readuntil(b'\n'), peer_host)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self):
+        """Ouvre les sockets d'écoute"""
+        servers = []
+        if self.udp_port is not None:
+            transport, _ = await self._loop.create_datagram_endpoint(
+                lambda: _UDPProtocol(self), local_addr=(self.bind, self.udp_port)
+            )
+            servers.append(transport)
+            self.udp_address = transport.get_extra_info('sockname')[:2]
+        if self.tcp_port is not None:
+            server = await asyncio.start_server(self._handle_tcp, self.bind, self.tcp_port)
+            servers.append(server)
+            self.tcp_address = server.sockets[0].getsockname()[:2]
+        return servers
+
+    def _run(self):
+        """Boucle asyncio exécutée dans un thread dédié"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            servers = self._loop.run_until_complete(self._serve())
+        except Exception as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            for server in servers:
+                server.close()
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+
+    def start(self, timeout=5):
+        """
+        Démarre l'écoute dans un thread d'arrière-plan
+
+        Raises:
+            OSError: Si les ports ne peuvent pas être ouverts
+        """
+        self._thread = threading.Thread(target=self._run, name="syslog-receiver", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        if self._startup_error is not None:
+            raise self._startup_error
+        print(f"📡 Réception syslog active (UDP : {self.udp_address}, TCP : {self.tcp_address})")
+
+    def stop(self):
+        """Arrête l'écoute"""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def report_section(self):
+        """
+        Returns:
+            str: Messages reçus et perdus par hôte pour le rapport quotidien
+        """
+        lines = ["📡 RÉCEPTION SYSLOG"]
+        with self._lock:
+            for host, stats in sorted(self.stats.items()):
+                lines.append(f"  {host} : {stats['received']} messages reçus, {stats['dropped']} perdus")
+        if len(lines) == 1:
+            lines.append("  Aucun message reçu")
+        return "\n".join(lines)
@@ -0,0 +1,233 @@
+"""
+Module de comptabilisation des tokens IA et de gouvernance du budget
+"""
+import os
+import json
+import datetime
+import threading
+
+# Tarifs par défaut en $ / 1M tokens (input, output) - voir docs/ai-models.py
+DEFAULT_TOKEN_PRICES = {
+    'mistral-large-latest': (2.00, 6.00),
+    'mistral-medium-latest': (0.80, 2.40),
+    'mistral-small-latest': (0.20, 0.60),
+    'open-mixtral-8x22b': (0.80, 2.40),
+    'open-mixtral-8x7b': (0.20, 0.60),
+    'open-mistral-7b': (0.10, 0.10),
+}
+
+# Paliers du gouverneur, du plus strict au plus souple :
+# (part du budget consommée, facteur ai_max_tokens, lignes max, modèle de repli, facteur d'intervalle)
+GOVERNOR_LEVELS = [
+    (0.9, 0.125, 50, True, 4),
+    (0.75, 0.25, 150, True, 2),
+    (0.5, 0.5, 400, False, 1),
+]
+
+# Nombre minimum de tokens de réponse conservé par le gouverneur
+MIN_MAX_TOKENS = 256
+
+# Nombre de jours d'historique conservés dans le fichier de consommation
+HISTORY_DAYS = 31
+
+
+def parse_token_prices(value):
+    """
+    Analyse la liste de tarifs 'modèle:input:output, ...' du config.ini
+
+    Args:
+        value (str): Valeur brute de l'option ai_token_prices
+
+    Returns:
+        dict: Tarifs par modèle {modèle: (input, output)}
+    """
+    prices = dict(DEFAULT_TOKEN_PRICES)
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        model, price_in, price_out = item.rsplit(':', 2)
+        prices[model.strip()] = (float(price_in), float(price_out))
+    return prices
+
+
+class TokenBudget:
+    """Comptabilise la consommation de tokens et ajuste les paramètres IA selon le budget"""
+
+    def __init__(self, usage_file, limit=0, period='day', fallback_model=None, prices=None):
+        """
+        Args:
+            usage_file (str): Fichier JSON de persistance de la consommation
+            limit (int): Budget de tokens par période (0 = illimité)
+            period (str): Période du budget ('day' ou 'hour')
+            fallback_model (str): Modèle utilisé quand le budget s'épuise
+            prices (dict): Tarifs par modèle {modèle: (input, output)}
+        """
+        self.usage_file = usage_file
+        self.limit = limit
+        self.period = period
+        self.fallback_model = fallback_model
+        self.prices = prices or dict(DEFAULT_TOKEN_PRICES)
+        self._lock = threading.Lock()
+        self._days = self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """Construit le compteur à partir de la configuration"""
+        return cls(
+            config['token_usage_file'],
+            limit=config.get('token_budget', 0),
+            period=config.get('token_budget_period', 'day'),
+            fallback_model=config.get('ai_fallback_model'),
+            prices=config.get('ai_token_prices')
+        )
+
+    def _load(self):
+        """Charge l'historique de consommation depuis le disque"""
+        try:
+            with open(self.usage_file, "r", encoding='utf-8') as file:
+                return json.load(file).get('days', {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️  Impossible de charger la consommation de tokens : {e}")
+            return {}
+
+    def _save(self):
+        """Écrit l'historique de consommation de manière atomique"""
+        try:
+            os.makedirs(os.path.dirname(self.usage_file) or '.', exist_ok=True)
+            tmp_file = self.usage_file + ".tmp"
+            with open(tmp_file, "w", encoding='utf-8') as file:
+                json.dump({'days': self._days}, file)
+            os.replace(tmp_file, self.usage_file)
+        except Exception as e:
+            print(f"⚠️  Impossible de sauvegarder la consommation de tokens : {e}")
+
+    def cost(self, model, prompt_tokens, completion_tokens):
+        """
+        Calcule le coût d'un appel
+
+        Returns:
+            float: Coût en $ (0 si le modèle n'a pas de tarif connu)
+        """
+        price_in, price_out = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+    def record(self, log_file, model, prompt_tokens, completion_tokens, now=None):
+        """
+        Enregistre la consommation d'un appel à l'API
+
+        Args:
+            log_file (str): Fichier de log analysé
+            model (str): Modèle utilisé
+            prompt_tokens (int): Tokens envoyés
+            completion_tokens (int): Tokens générés
+            now (datetime): Horodatage de l'appel (par défaut maintenant)
+        """
+        now = now or datetime.datetime.now()
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+
+        with self._lock:
+            day = self._days.setdefault(now.date().isoformat(), {
+                'hours': {}, 'files': {}, 'models': {}
+            })
+            for counters in (day, day['files'].setdefault(log_file, {}), day['models'].setdefault(model, {})):
+                counters['prompt_tokens'] = counters.get('prompt_tokens', 0) + prompt_tokens
+                counters['completion_tokens'] = counters.get('completion_tokens', 0) + completion_tokens
+                counters['calls'] = counters.get('calls', 0) + 1
+                counters['cost'] = counters.get('cost', 0.0) + cost
+
+            hour = f"{now.hour:02d}"
+            day['hours'][hour] = day['hours'].get(hour, 0) + prompt_tokens + completion_tokens
+
+            for old_day in sorted(self._days)[:-HISTORY_DAYS]:
+                del self._days[old_day]
+
+            self._save()
+
+    def used(self, now=None):
+        """
+        Returns:
+            int: Tokens consommés sur la période courante du budget
+        """
+        now = now or datetime.datetime.now()
+        with self._lock:
+            day = self._days.get(now.date().isoformat())
+            if not day:
+                return 0
+            if self.period == 'hour':
+                return day['hours'].get(f"{now.hour:02d}", 0)
+            return day.get('prompt_tokens', 0) + day.get('completion_tokens', 0)
+
+    def pressure(self, now=None):
+        """
+        Returns:
+            float: Part du budget consommée (0 si aucun budget n'est défini)
+        """
+        if not self.limit:
+            return 0.0
+        return self.used(now) / self.limit
+
+    def plan(self, config, now=None):
+        """
+        Détermine les paramètres IA à appliquer selon la consommation courante :
+        plus le budget s'épuise, plus la compaction et l'échantillonnage sont
+        stricts, plus l'intervalle est long, et le modèle de repli est utilisé
+
+        Args:
+            config (dict): Configuration
+            now (datetime): Horodatage de référence
+
+        Returns:
+            dict: ai_model, ai_max_tokens, max_lines (None = illimité), interval_factor
+        """
+        plan = {
+            'ai_model': config.get('ai_model', 'mistral-medium-latest'),
+            'ai_max_tokens': config['ai_max_tokens'],
+            'max_lines': None,
+            'interval_factor': 1,
+        }
+
+        pressure = self.pressure(now)
+        for threshold, tokens_factor, max_lines, use_fallback, interval_factor in GOVERNOR_LEVELS:
+            if pressure >= threshold:
+                plan['ai_max_tokens'] = max(MIN_MAX_TOKENS, int(config['ai_max_tokens'] * tokens_factor))
+                plan['max_lines'] = max_lines
+                plan['interval_factor'] = interval_factor
+                if use_fallback and self.fallback_model:
+                    plan['ai_model'] = self.fallback_model
+                break
+
+        return plan
+
+    def report_section(self, now=None):
+        """
+        Returns:
+            str: Résumé de la consommation pour le rapport quotidien
+        """
+        now = now or datetime.datetime.now()
+        lines = ["💰 CONSOMMATION DE TOKENS IA"]
+
+        with self._lock:
+            for date in ((now - datetime.timedelta(days=1)).date().isoformat(), now.date().isoformat()):
+                day = self._days.get(date)
+                if not day:
+                    continue
+                lines.append(
+                    f"  {date} : {day['prompt_tokens']} in / {day['completion_tokens']} out "
+                    f"- {day['calls']} appels - ${day['cost']:.4f}"
+                )
+                for label, group in (("modèle", day['models']), ("fichier", day['files'])):
+                    for name, counters in sorted(group.items()):
+                        lines.append(
+                            f"    {label} {name} : {counters['prompt_tokens']} in / "
+                            f"{counters['completion_tokens']} out - ${counters['cost']:.4f}"
+                        )
+
+        if self.limit:
+            lines.append(
+                f"  Budget ({self.period}) : {self.used(now)}/{self.limit} tokens "
+                f"({self.pressure(now):.0%})"
+            )
+
+        if len(lines) == 1:
+            lines.append("  Aucun appel enregistré")
+        return "\n".join(lines)
@@ -6,6 +6,8 @@ import os
 import sys
 import tempfile
 import shutil
+import time
+import tracemalloc
 from unittest.mock import Mock, patch, MagicMock
 
 # Ajouter le dossier src au path
@@ -171,6 +173,41 @@ class TestLogMonitor(unittest.TestCase):
         self.assertEqual(len(new_logs), 1)
         self.assertEqual(new_logs[0].strip(), "Line 4: New entry")
 
+    def test_read_new_logs_partial_line_and_rotation(self):
+        """Test ligne inachevée conservée pour le cycle suivant et reprise après rotation"""
+        from log_monitor import read_new_logs
+
+        logs, position = read_new_logs(self.test_log, 0)
+        with open(self.test_log, 'a') as f:
+            f.write("Line 4: partial")
+        logs, partial_position = read_new_logs(self.test_log, position)
+        self.assertEqual(logs, [])
+        self.assertEqual(partial_position, position)
+
+        with open(self.test_log, 'w') as f:
+            f.write("Rotated\n")
+        logs, _ = read_new_logs(self.test_log, position)
+        self.assertEqual(logs, ["Rotated\n"])
+
+    def test_read_new_logs_byte_filter_mmap(self):
+        """Test préfiltre binaire sur une région projetée en mémoire"""
+        from byte_reader import MMAP_THRESHOLD, compile_byte_filter
+        from log_monitor import read_new_logs
+
+        _, position = read_new_logs(self.test_log, 0)
+        with open(self.test_log, 'ab') as f:
+            line = b"GET /index.html 200 caf\xc3\xa9\n"
+            f.write(line * (MMAP_THRESHOLD // len(line) + 1))
+            f.write(b"POST /login 500 error\n")
+
+        logs, new_position = read_new_logs(self.test_log, position, byte_filter=compile_byte_filter("error"))
+        self.assertEqual(logs, ["POST /login 500 error\n"])
+        self.assertEqual(new_position, os.path.getsize(self.test_log))
+
+        logs, _ = read_new_logs(self.test_log, position)
+        self.assertEqual(logs[0], "GET /index.html 200 café\n")
+        self.assertEqual(len(logs), MMAP_THRESHOLD // len(line) + 2)
+
     def test_extract_severity_score(self):
         """Test extraction du score de gravité"""
         from log_monitor import extract_severity_score
@@ -191,6 +228,1711 @@ class TestLogMonitor(unittest.TestCase):
         self.assertEqual(score, 10)  # Devrait être limité à 10
 
 
+class TestTokenBudget(unittest.TestCase):
+    """Tests pour la comptabilité des tokens et le gouverneur de budget"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.usage_file = os.path.join(self.test_dir, 'token_usage.json')
+        self.config = {'ai_model': 'mistral-medium-latest', 'ai_max_tokens': 4096}
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_record_persists_usage(self):
+        """Test persistance de la consommation entre deux instances"""
+        from token_budget import TokenBudget
+
+        budget = TokenBudget(self.usage_file)
+        budget.record('/var/log/auth.log', 'mistral-medium-latest', 1000, 200)
+
+        reloaded = TokenBudget(self.usage_file)
+        self.assertEqual(reloaded.used(), 1200)
+        self.assertIn('/var/log/auth.log', reloaded.report_section())
+
+    def test_plan_tightens_under_pressure(self):
+        """Test resserrement progressif des paramètres à l'approche du budget"""
+        from token_budget import TokenBudget
+
+        budget = TokenBudget(self.usage_file, limit=1000, fallback_model='mistral-small-latest')
+        self.assertEqual(budget.plan(self.config)['ai_model'], 'mistral-medium-latest')
+        self.assertIsNone(budget.plan(self.config)['max_lines'])
+
+        budget.record('/var/log/auth.log', 'mistral-medium-latest', 800, 150)
+        plan = budget.plan(self.config)
+        self.assertEqual(plan['ai_model'], 'mistral-small-latest')
+        self.assertEqual(plan['interval_factor'], 4)
+        self.assertLess(plan['ai_max_tokens'], 4096)
+
+    def test_compact_logs(self):
+        """Test regroupement des lignes de même gabarit"""
+        from log_compactor import compact_logs
+
+        logs = [f"Failed password from 10.0.0.{i} port {1000 + i}\n" for i in range(50)]
+        logs.append("Out of memory: Kill process 42\n")
+
+        compacted = compact_logs(logs)
+        self.assertEqual(len(compacted), 2)
+        self.assertIn("[x50]", compacted[0])
+        self.assertEqual(len(compact_logs(logs, max_lines=1)), 1)
+
+
+class TestAnomalyScorer(unittest.TestCase):
+    """Tests pour le filtre statistique d'anomalies"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.test_dir, 'baselines.json')
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _train(self, scorer, start):
+        """Alimente le scoreur avec un trafic régulier"""
+        now = start
+        for _ in range(20):
+            now += 60
+            scorer.should_analyze('/var/log/app.log', ["GET /index.html 200\n"] * 10, now=now)
+        return now
+
+    def test_steady_traffic_is_skipped_and_spike_forwarded(self):
+        """Test filtrage du trafic régulier et transmission des pics"""
+        from anomaly_scorer import AnomalyScorer
+
+        scorer = AnomalyScorer(self.state_file, warmup=5)
+        now = self._train(scorer, 1_700_000_000)
+
+        self.assertFalse(scorer.should_analyze('/var/log/app.log', ["GET /index.html 200\n"] * 10, now=now + 60))
+        self.assertTrue(scorer.should_analyze('/var/log/app.log', ["GET /index.html 200\n"] * 500, now=now + 120))
+        self.assertGreater(scorer.stats['skipped'], 0)
+
+    def test_forward_pattern_and_persistence(self):
+        """Test transmission des motifs critiques et persistance des lignes de base"""
+        from anomaly_scorer import AnomalyScorer
+
+        scorer = AnomalyScorer(self.state_file, warmup=5, forward_patterns=r"Out of memory")
+        now = self._train(scorer, 1_700_000_000)
+        scorer.save()
+
+        reloaded = AnomalyScorer(self.state_file, warmup=5, forward_patterns=r"Out of memory")
+        self.assertTrue(reloaded.should_analyze(
+            '/var/log/app.log', ["GET /index.html 200\n"] * 9 + ["Out of memory: Kill process 1\n"], now=now + 60
+        ))
+
+
+class TestCorrelation(unittest.TestCase):
+    """Tests pour l'analyse corrélée multi-fichiers"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.config = {
+            'ai_model': 'mistral-medium-latest',
+            'ai_max_tokens': 4096,
+            'daily_report_file': os.path.join(self.test_dir, 'daily_report.txt'),
+        }
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_split_correlated_analysis(self):
+        """Test découpage d'une analyse corrélée par fichier"""
+        from log_monitor import split_correlated_analysis
+
+        analysis = (
+            "SEVERITY_SCORE: 8\nL'IP 203.0.113.7 apparaît dans les deux fichiers.\n"
+            "### /var/log/auth.log\nSEVERITY_SCORE: 8\nBrute force SSH\n"
+            "### access.log\nSEVERITY_SCORE: 3\nScan de chemins\n"
+        )
+        overview, sections = split_correlated_analysis(
+            analysis, ['/var/log/auth.log', '/var/log/apache2/access.log', '/var/log/syslog']
+        )
+
+        self.assertIn('203.0.113.7', overview)
+        self.assertIn('Brute force', sections['/var/log/auth.log'])
+        self.assertIn('Scan', sections['/var/log/apache2/access.log'])
+        self.assertNotIn('/var/log/syslog', sections)
+
+        # Nom ambigu : attribué à aucun des deux fichiers ; chemin complet : au bon fichier
+        analysis = (
+            "SEVERITY_SCORE: 5\nRAS\n### access.log\nSEVERITY_SCORE: 9\nAmbigu\n"
+            "### /var/log/nginx/access.log\nSEVERITY_SCORE: 4\nScan nginx\n"
+        )
+        _, sections = split_correlated_analysis(
+            analysis, ['/var/log/apache2/access.log', '/var/log/nginx/access.log']
+        )
+        self.assertEqual(list(sections), ['/var/log/nginx/access.log'])
+        self.assertIn('Scan nginx', sections['/var/log/nginx/access.log'])
+
+    @patch('log_monitor.send_alert_email')
+    @patch('log_monitor.chat_complete')
+    def test_files_without_section_share_one_alert(self, mock_chat, mock_alert):
+        """Test une seule alerte pour l'analyse globale des fichiers sans section"""
+        from log_monitor import process_correlated_batches
+
+        mock_chat.return_value = "SEVERITY_SCORE: 9\nAttaque coordonnée depuis 203.0.113.7"
+        process_correlated_batches({
+            '/var/log/auth.log': ["Failed password from 203.0.113.7\n"],
+            '/var/log/apache2/access.log': ["203.0.113.7 GET /wp-admin 404\n"],
+            '/var/log/nginx/access.log': ["203.0.113.7 GET /.env 404\n"],
+        }, self.config)
+
+        mock_alert.assert_called_once()
+        self.assertIn('/var/log/nginx/access.log', mock_alert.call_args[0][0])
+        self.assertEqual(mock_alert.call_args[0][2], 9)
+
+    @patch('log_monitor.send_alert_email')
+    @patch('log_monitor.chat_complete')
+    def test_single_call_per_cycle(self, mock_chat, mock_alert):
+        """Test un seul appel IA par cycle et alertes réparties par fichier"""
+        from log_monitor import process_correlated_batches
+
+        mock_chat.return_value = (
+            "SEVERITY_SCORE: 8\nCorrélation\n"
+            "### /var/log/auth.log\nSEVERITY_SCORE: 9\nBrute force\n"
+            "### /var/log/apache2/access.log\nSEVERITY_SCORE: 2\nRAS\n"
+        )
+        process_correlated_batches({
+            '/var/log/auth.log': ["Failed password from 203.0.113.7\n"],
+            '/var/log/apache2/access.log': ["203.0.113.7 GET /wp-admin 404\n"],
+            '/var/log/syslog': [],
+        }, self.config)
+
+        self.assertEqual(mock_chat.call_count, 1)
+        mock_alert.assert_called_once()
+        self.assertEqual(mock_alert.call_args[0][0], '/var/log/auth.log')
+        self.assertEqual(mock_alert.call_args[0][2], 9)
+
+
+class TestBackpressure(unittest.TestCase):
+    """Tests pour la contre-pression et le délestage"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.test_log = os.path.join(self.test_dir, 'access.log')
+        with open(self.test_log, 'w') as f:
+            for i in range(1000):
+                f.write(f"GET /page/{i} 200\n")
+            f.write("Failed password for root\n")
+            for i in range(1000, 1100):
+                f.write(f"GET /page/{i} 200\n")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_shed_policies(self):
+        """Test des politiques de délestage"""
+        import random
+        import re
+        from backpressure import BoundedLineQueue
+
+        lines = [f"line {i}\n" for i in range(100)] + ["Failed password\n"] + [f"line {i}\n" for i in range(100, 200)]
+        for policy in ('newest', 'reservoir', 'prefilter'):
+            queue = BoundedLineQueue(10, policy, re.compile("Failed"), random.Random(1))
+            for line in lines:
+                queue.offer(line)
+            kept = queue.drain()
+            self.assertEqual(len(kept), 10)
+            self.assertEqual(queue.shed, len(lines) - 10)
+            if policy == 'newest':
+                self.assertEqual(kept[-1], "line 199\n")
+            if policy == 'prefilter':
+                self.assertIn("Failed password\n", kept)
+
+    def test_collect_bounds_batch_and_reports_lag(self):
+        """Test lecture bornée et mesure du retard"""
+        from backpressure import BackpressureMonitor
+        from log_monitor import collect_log_batch
+
+        backpressure = BackpressureMonitor(50, policy='prefilter', prefilter="Failed password")
+        logs, position = collect_log_batch(self.test_log, 0, {}, {'backpressure': backpressure})
+
+        self.assertEqual(len(logs), 50)
+        self.assertIn("Failed password for root\n", logs)
+        self.assertEqual(position, os.path.getsize(self.test_log))
+        self.assertEqual(backpressure.stats[self.test_log]['shed_lines'], 1051)
+        self.assertIn('1051 délestées', backpressure.report_section())
+
+    def test_skip_to_newest_bytes(self):
+        """Test saut aux données récentes quand le retard dépasse max_bytes"""
+        from backpressure import BackpressureMonitor
+        from log_monitor import collect_log_batch
+
+        backpressure = BackpressureMonitor(1000, max_bytes=100)
+        logs, _ = collect_log_batch(self.test_log, 0, {}, {'backpressure': backpressure})
+
+        self.assertTrue(all(line.startswith("GET /page/") for line in logs))
+        self.assertEqual(logs[-1], "GET /page/1099 200\n")
+        self.assertGreater(backpressure.stats[self.test_log]['skipped_bytes'], 0)
+
+
+class TestProfiling(unittest.TestCase):
+    """Tests pour le profilage des cycles"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_stage_timings_and_capture(self):
+        """Test mesure des étapes et capture cProfile à la demande"""
+        from profiling import CycleProfiler
+
+        profiler = CycleProfiler(self.test_dir, tracemalloc_enabled=True)
+        profiler.capture_requested = True
+        profiler.start_cycle()
+        with profiler.stage('read'):
+            sum(range(1000))
+        profiler.wrap(sorted)([3, 1, 2])
+        profiler.end_cycle()
+
+        files = os.listdir(self.test_dir)
+        self.assertIn('cycle_timings.jsonl', files)
+        self.assertTrue(any(name.startswith('profile_') and name.endswith('.prof') for name in files))
+        self.assertTrue(any(name.startswith('tracemalloc_') for name in files))
+        self.assertIn('read', profiler.report_section())
+        tracemalloc.stop()
+
+    def test_capture_stopped_when_cycle_fails(self):
+        """Test profil désactivé même si le cycle lève une exception"""
+        import log_monitor
+        from profiling import CycleProfiler
+
+        profiler = CycleProfiler(self.test_dir)
+        profiler.capture_requested = True
+
+        def failing_acquire(log_files):
+            log_monitor.shutdown_flag = True
+            raise RuntimeError("base partagée indisponible")
+
+        coordinator = Mock(owned=set(), acquire=Mock(side_effect=failing_acquire))
+        config = {
+            'log_files': [os.path.join(self.test_dir, 'app.log')],
+            'log_check_interval': 0.01,
+            'email_receiver': 'admin@example.com',
+            'daily_report_file': os.path.join(self.test_dir, 'report.txt'),
+        }
+        runtime = {'watchdog': Mock(), 'profiler': profiler, 'coordinator': coordinator}
+        with patch.object(log_monitor, 'shutdown_flag', False):
+            log_monitor.monitor_logs(config, runtime)
+
+        self.assertIsNone(profiler._main_profile)
+        self.assertEqual(profiler.cycles, 1)
+        self.assertTrue(any(name.startswith('profile_') for name in os.listdir(self.test_dir)))
+
+    def test_disabled_stage_is_neutral(self):
+        """Test contexte neutre lorsque le profilage est désactivé"""
+        from log_monitor import stage
+        from profiling import NO_STAGE
+
+        self.assertIs(stage({}, 'read'), NO_STAGE)
+        self.assertIs(stage(None, 'ai'), NO_STAGE)
+
+
+class TestSyslogReceiver(unittest.TestCase):
+    """Tests pour la réception syslog sur l'interface locale"""
+
+    def test_parse_rfc3164_and_rfc5424(self):
+        """Test analyse des formats RFC 3164 et RFC 5424"""
+        from syslog_receiver import parse_syslog_message
+
+        record = parse_syslog_message(b"<38>Nov  9 10:15:32 web01 sshd[123]: Failed password for root")
+        self.assertEqual((record['host'], record['app'], record['severity']), ('web01', 'sshd', 6))
+        self.assertEqual(record['message'], "Failed password for root")
+
+        record = parse_syslog_message(
+            b'<165>1 2026-10-19T10:00:00Z db01 postgres 42 ID47 [meta x="1"] connection refused'
+        )
+        self.assertEqual((record['host'], record['app'], record['facility']), ('db01', 'postgres', 20))
+        self.assertEqual(record['message'], "connection refused")
+
+    def test_udp_and_tcp_over_loopback(self):
+        """Test réception UDP et TCP (comptage d'octets et saut de ligne)"""
+        import socket
+        import time
+        from syslog_receiver import SyslogReceiver
+
+        receiver = SyslogReceiver('127.0.0.1', udp_port=0, tcp_port=0, max_lines_per_host=2)
+        receiver.start()
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp:
+                udp.sendto(b"<38>Nov  9 10:15:32 web01 sshd[1]: Failed password", receiver.udp_address)
+
+            message = b"<165>1 2026-10-19T10:00:00Z db01 app - - - one"
+            with socket.create_connection(receiver.tcp_address) as tcp:
+                tcp.sendall(str(len(message)).encode() + b" " + message)
+                tcp.sendall(b"<165>1 2026-10-19T10:00:01Z db01 app - - - two\n")
+                tcp.sendall(b"<165>1 2026-10-19T10:00:02Z db01 app - - - three\n")
+
+            for _ in range(100):
+                if 'web01' in receiver.stats and receiver.stats.get('db01', {}).get('received') == 3:
+                    break
+                time.sleep(0.02)
+            batches = receiver.drain()
+        finally:
+            receiver.stop()
+
+        self.assertIn("Failed password", batches['web01'][0])
+        self.assertEqual([line.split()[-1] for line in batches['db01']], ['two', 'three'])
+        self.assertEqual(receiver.stats['db01']['dropped'], 1)
+        self.assertIn('db01', receiver.report_section())
+
+
+class TestCoordination(unittest.TestCase):
+    """Tests pour la coordination multi-instances par baux"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, 'coordination.db')
+        self.files = ['/var/log/a.log', '/var/log/b.log', '/var/log/c.log', '/var/log/d.log']
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_files_are_shared_without_overlap(self):
+        """Test répartition équitable et sans doublon entre deux instances"""
+        from coordination import LeaseCoordinator
+
+        first = LeaseCoordinator(self.db_path, 'first', lease_ttl=60)
+        second = LeaseCoordinator(self.db_path, 'second', lease_ttl=60)
+
+        self.assertEqual(len(first.acquire(self.files, now=1000)), 4)
+        self.assertEqual(second.acquire(self.files, now=1001), [])
+        owned_first = first.acquire(self.files, now=1010)
+        owned_second = second.acquire(self.files, now=1011)
+
+        self.assertEqual(len(owned_first), 2)
+        self.assertEqual(sorted(owned_first + owned_second), self.files)
+
+    def test_failover_and_shared_offsets(self):
+        """Test reprise des fichiers et des positions après arrêt d'une instance"""
+        from coordination import LeaseCoordinator
+
+        first = LeaseCoordinator(self.db_path, 'first', lease_ttl=60)
+        second = LeaseCoordinator(self.db_path, 'second', lease_ttl=60)
+        first.acquire(self.files, now=time.time())
+        self.assertTrue(first.save_offset('/var/log/a.log', 1234))
+        self.assertFalse(second.save_offset('/var/log/a.log', 1))
+
+        # L'instance first ne renouvelle plus : ses baux expirent
+        owned = second.acquire(self.files, now=time.time() + 120)
+        self.assertEqual(owned, self.files)
+        self.assertEqual(second.load_offset('/var/log/a.log'), 1234)
+
+    def test_failover_keeps_buffered_lines(self):
+        """Test lignes en micro-lot publiées avec la position et reprises par l'autre instance"""
+        from coordination import LeaseCoordinator
+        from log_monitor import export_pending, restore_pending
+        from micro_batcher import MicroBatcher
+
+        first = LeaseCoordinator(self.db_path, 'first', lease_ttl=60)
+        second = LeaseCoordinator(self.db_path, 'second', lease_ttl=60)
+        first_runtime = {'batcher': MicroBatcher(max_lines=100)}
+        second_runtime = {'batcher': MicroBatcher(max_lines=100)}
+
+        first.acquire(self.files, now=time.time())
+        self.assertEqual(first_runtime['batcher'].add('/var/log/a.log', ["ligne lue 1\n", "ligne lue 2\n"]), [])
+        self.assertTrue(first.save_offset('/var/log/a.log', 500, pending=export_pending(first_runtime, '/var/log/a.log')))
+
+        # first s'arrête sans analyser son micro-lot : second reprend position et lignes
+        second_runtime['batcher'].add('/var/log/a.log', ["copie locale périmée\n"])
+        second.acquire(self.files, now=time.time() + 120)
+        self.assertEqual(second.load_offset('/var/log/a.log'), 500)
+        restore_pending(second_runtime, '/var/log/a.log', second.load_pending('/var/log/a.log'))
+        flushed = second_runtime['batcher'].flush_expired(now=time.time() + 3600)
+        self.assertEqual(flushed, {'/var/log/a.log': ["ligne lue 1\n", "ligne lue 2\n"]})
+
+    def test_expired_lease_cannot_publish_offset(self):
+        """Test position refusée lorsque le bail détenu a expiré"""
+        from coordination import LeaseCoordinator
+
+        first = LeaseCoordinator(self.db_path, 'first', lease_ttl=60)
+        first.acquire(self.files, now=time.time() - 120)
+        self.assertFalse(first.save_offset('/var/log/a.log', 1234))
+        self.assertIsNone(first.load_offset('/var/log/a.log'))
+
+    def test_lease_ttl_covers_longest_cycle(self):
+        """Test bail par défaut plus long que le cycle le plus lent du gouverneur"""
+        from coordination import default_lease_ttl, max_cycle_time
+
+        config = {'log_check_interval': 60, 'token_budget': 100000, 'coordination_db': self.db_path}
+        self.assertEqual(max_cycle_time(config), 4 * 60 + 60)
+        config['lease_ttl'] = default_lease_ttl(config)
+        self.assertGreater(config['lease_ttl'], max_cycle_time(config))
+        self.assertFalse(any('lease_ttl' in error for error in validate_configuration(config)[1]))
+
+        config['lease_ttl'] = 180
+        self.assertTrue(any('lease_ttl' in error for error in validate_configuration(config)[1]))
+
+
+class TestReportSummarizer(unittest.TestCase):
+    """Tests pour la synthèse hiérarchique du rapport quotidien"""
+
+    REPORT = (
+        "📊 Rapport quotidien des logs\n"
+        "[2026-01-01 10:00:00] [/var/log/auth.log]\nSEVERITY_SCORE: 8\nBrute force SSH\n\n"
+        "[2026-01-01 11:00:00] [/var/log/auth.log]\nSEVERITY_SCORE: 9\nBrute force SSH\n\n"
+        "[2026-01-01 12:00:00] [/var/log/syslog]\nSEVERITY_SCORE: 0\nRAS\n\n"
+    )
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.config = {
+            'ai_model': 'mistral-small-latest',
+            'report_summary_workers': 2,
+            'summary_cache_file': os.path.join(self.test_dir, 'summary_cache.json'),
+        }
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_entries_grouped_by_source_and_severity(self):
+        """Test découpage du rapport et regroupement par gravité"""
+        from report_summarizer import parse_report_entries, group_entries
+
+        entries = parse_report_entries(self.REPORT)
+        self.assertEqual([entry['severity'] for entry in entries], [8, 9, 0])
+
+        groups = group_entries(entries)
+        self.assertEqual(list(groups), [('/var/log/auth.log', 'critique'), ('/var/log/syslog', 'aucune')])
+        self.assertEqual(len(groups[('/var/log/auth.log', 'critique')]), 2)
+
+    def test_digest_reuses_cached_summaries(self):
+        """Test synthèse map-reduce et réutilisation du cache au second passage"""
+        from report_summarizer import build_report_digest
+
+        with patch('report_summarizer.chat_complete', return_value="Synthèse") as mock_chat:
+            digest = build_report_digest(self.REPORT, self.config)
+            self.assertEqual(mock_chat.call_count, 2)
+            self.assertIn("RÉSUMÉ EXÉCUTIF", digest)
+            self.assertIn("/var/log/syslog", digest)
+
+            build_report_digest(self.REPORT, self.config)
+            self.assertEqual(mock_chat.call_count, 2)
+
+    def test_digest_calls_go_through_dispatcher(self):
+        """Test synthèses du rapport soumises aux limites de débit du répartiteur"""
+        from email_sender import send_daily_report
+
+        report_file = os.path.join(self.test_dir, 'daily_report.txt')
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(self.REPORT)
+        config = {**self.config, 'daily_report_file': report_file, 'report_summarize': True}
+        dispatcher = Mock()
+
+        with patch('report_summarizer.chat_complete', return_value="Synthèse") as mock_chat, \
+                patch('email_sender.send_email', return_value=True):
+            self.assertTrue(send_daily_report(config, dispatcher=dispatcher))
+        self.assertEqual(mock_chat.call_count, 2)
+        self.assertTrue(all(call.kwargs['dispatcher'] is dispatcher for call in mock_chat.call_args_list))
+
+
+class TestReportIndex(unittest.TestCase):
+    """Tests pour l'index plein texte des rapports archivés"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.archive_dir = os.path.join(self.test_dir, 'archives')
+        os.makedirs(self.archive_dir)
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _write_archive(self, day, content):
+        path = os.path.join(self.archive_dir, f"rapport_{day}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_search_by_ip_user_terms_and_date(self):
+        """Test recherche par IP, utilisateur, termes et fenêtre de dates"""
+        import datetime
+        from report_index import ReportIndex
+
+        self._write_archive('2026-01-01', (
+            "[2026-01-01 10:00:00] [/var/log/auth.log]\nSEVERITY_SCORE: 8\n"
+            "Failed password for invalid user admin from 203.0.113.7\n"
+        ))
+        self._write_archive('2026-03-20', (
+            "[2026-03-20 09:00:00] [/var/log/auth.log]\nSEVERITY_SCORE: 3\n"
+            "Connexion refusée depuis 203.0.113.7, utilisateur deploy\n\n"
+            "[2026-03-20 11:00:00] [/var/log/nginx/access.log]\nSEVERITY_SCORE: 0\nTrafic normal\n"
+        ))
+
+        index = ReportIndex(os.path.join(self.test_dir, 'index.db'))
+        self.assertEqual(index.update(self.archive_dir), 2)
+        self.assertEqual(index.update(self.archive_dir), 0)
+
+        today = datetime.date(2026, 3, 31)
+        self.assertEqual(len(index.search('203.0.113.7', today=today)), 2)
+        recent = index.search('203.0.113.7', days=30, today=today)
+        self.assertEqual([result['day'] for result in recent], ['2026-03-20'])
+        self.assertEqual(len(index.search('203.0.113.7', min_severity=7)), 1)
+        self.assertEqual(len(index.search('user:admin')), 1)
+        self.assertEqual(len(index.search('user:deploy')), 1)
+        self.assertEqual(index.search('trafic')[0]['source'], '/var/log/nginx/access.log')
+
+    def test_reindexing_archive_replaces_entries(self):
+        """Test réindexation d'une archive réécrite sans doublons"""
+        from report_index import ReportIndex
+
+        index = ReportIndex(os.path.join(self.test_dir, 'index.db'))
+        content = "[2026-01-01 10:00:00] [/var/log/syslog]\nSEVERITY_SCORE: 5\nDisque plein\n"
+        path = self._write_archive('2026-01-01', content)
+        index.index_archive(path, content)
+        index.index_archive(path, content)
+        self.assertEqual(len(index.search('disque')), 1)
+
+    def test_search_quotes_log_terms(self):
+        """Test termes de logs courants recherchés sans erreur de syntaxe FTS5"""
+        from report_index import ReportIndex, ReportSearchError, main
+
+        content = (
+            "[2026-01-01 10:00:00] [/var/log/nginx/access.log]\nSEVERITY_SCORE: 7\n"
+            "Scan de wp-admin, lecture de /etc/passwd via GET /index.php?id=1 puis sshd[123] \"root\"\n"
+        )
+        db_file = os.path.join(self.test_dir, 'index.db')
+        index = ReportIndex(db_file)
+        index.index_archive(self._write_archive('2026-01-01', content), content)
+
+        for query in ('wp-admin', '/etc/passwd', 'sshd[123]', 'GET /index.php?id=1', '"root"'):
+            self.assertEqual(len(index.search(query)), 1, query)
+        self.assertEqual(index.search('wp-admin absent'), [])
+        self.assertEqual(index.search('/'), [])
+
+        # Syntaxe FTS5 explicite
+        self.assertEqual(len(index.search('passwd OR absent', raw=True)), 1)
+        with self.assertRaises(ReportSearchError):
+            index.search('wp-admin', raw=True)
+
+        with patch('config_loader.load_configuration', return_value={'report_index_db': db_file}):
+            self.assertEqual(main(['search', 'sshd[123]']), 0)
+            self.assertEqual(main(['search', '--raw', 'wp-admin']), 1)
+
+
+class TestReplayHarness(unittest.TestCase):
+    """Tests pour le banc de rejeu et la mesure du délai d'alerte"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_parse_timestamp_formats(self):
+        """Test lecture des horodatages ISO, syslog et format combiné"""
+        from replay_harness import parse_timestamp
+
+        iso = parse_timestamp("2026-01-01T10:00:05 host app: message")
+        syslog = parse_timestamp("Jan 01 10:00:06 host sshd[1]: message", year=2026)
+        combined = parse_timestamp('1.2.3.4 - - [01/Jan/2026:10:00:07 +0000] "GET / HTTP/1.1" 200 1')
+        self.assertEqual((syslog - iso, combined - iso), (1.0, 2.0))
+        self.assertIsNone(parse_timestamp("pas d'horodatage"))
+
+    def test_replay_measures_detection_latency(self):
+        """Test rejeu accéléré : incidents détectés et délais mesurés"""
+        from replay_harness import ReplayHarness
+
+        recording = os.path.join(self.test_dir, 'auth.log')
+        with open(recording, 'w') as f:
+            for second in range(20):
+                message = "Failed password for root from 10.0.0.1" if second in (5, 15) else "session opened"
+                f.write(f"2026-01-01T10:00:{second:02d} host sshd: {message}\n")
+
+        config = {
+            'log_check_interval': 0.05,
+            'ai_model': 'mistral-small-latest',
+            'ai_temperature': 0.5,
+            'ai_max_tokens': 1000,
+            'email_receiver': 'admin@example.com',
+            'byte_prefilter': '',
+            'backpressure_max_lines': 0,
+            'anomaly_gate': False,
+            'token_budget': 0,
+        }
+        harness = ReplayHarness([recording], config, speed=100.0,
+                                work_dir=os.path.join(self.test_dir, 'work'))
+        results = harness.run(drain=0.3)
+
+        self.assertEqual(results['lines_written'], 20)
+        self.assertEqual(results['incidents'], 2)
+        self.assertEqual(results['false_negative_rate'], 0.0)
+        self.assertLess(results['latency_max'], 1.0)
+
+    def test_replay_with_microbatching_links_held_incidents(self):
+        """Test rejeu avec micro-lots : les incidents retenus entre les lectures restent détectés"""
+        from replay_harness import ReplayHarness
+
+        recording = os.path.join(self.test_dir, 'auth.log')
+        with open(recording, 'w') as f:
+            for second in range(20):
+                message = f"Failed password for root from 10.0.0.{second}" if second in (5, 15) else "session opened"
+                f.write(f"2026-01-01T10:00:{second:02d} host sshd: {message}\n")
+
+        config = {
+            'log_check_interval': 0.05,
+            'ai_temperature': 0.5,
+            'ai_max_tokens': 1000,
+            'email_receiver': 'admin@example.com',
+            'microbatch': True,
+            'microbatch_max_lines': 1000,
+            'microbatch_max_bytes': 0,
+            'microbatch_max_age': 0.3,
+            'forward_patterns': '',
+        }
+        harness = ReplayHarness([recording], config, speed=100.0, work_dir=os.path.join(self.test_dir, 'work'))
+        results = harness.run(drain=0.8)
+
+        self.assertGreater(results['alerts'], 0)
+        self.assertEqual(results['incidents'], 2)
+        self.assertEqual(results['false_negative_rate'], 0.0)
+        self.assertGreaterEqual(results['latency_max'], 0.2)
+
+    @patch('ai_client.Mistral', side_effect=AssertionError("appel réel à l'API pendant le rejeu"))
+    def test_replay_with_analyzer_router_uses_stub(self, mock_mistral):
+        """Test rejeu avec bascule configurée : l'IA simulée répond, aucun appel réel"""
+        from replay_harness import ReplayHarness
+
+        recording = os.path.join(self.test_dir, 'auth.log')
+        with open(recording, 'w') as f:
+            for second in range(10):
+                message = "Failed password for root from 10.0.0.1" if second == 5 else "session opened"
+                f.write(f"2026-01-01T10:00:{second:02d} host sshd: {message}\n")
+
+        config = {
+            'log_check_interval': 0.05,
+            'ai_temperature': 0.5,
+            'ai_max_tokens': 1000,
+            'email_receiver': 'admin@example.com',
+            'analyzer_deadline': 5,
+            'analyzer_backend': 'openai',
+        }
+        harness = ReplayHarness([recording], config, speed=100.0, work_dir=os.path.join(self.test_dir, 'work'))
+        results = harness.run(drain=0.3)
+
+        mock_mistral.assert_not_called()
+        self.assertGreater(harness.ai_calls, 0)
+        self.assertEqual(results['false_negative_rate'], 0.0)
+
+    def test_replay_state_stays_in_work_dir(self):
+        """Test aucun fichier d'état de production utilisé par le rejeu"""
+        from config_loader import load_configuration
+        from replay_harness import ReplayHarness
+
+        config_file = os.path.join(self.test_dir, 'config.ini')
+        with open(config_file, 'w') as f:
+            f.write(
+                "[Settings]\nlog_files = /var/log/auth.log\nemail_sender = a@example.com\n"
+                "email_receiver = b@example.com\nsmtp_server = smtp.example.com\nsmtp_port = 587\n"
+                "log_check_interval = 60\nai_temperature = 0.5\nai_max_tokens = 1000\n"
+                "daily_report_file = /var/log/log_analyzer/daily_report.txt\n"
+                "state_dir = /var/lib/log_analyzer\nmicrobatch = true\nsimilarity_dedup = true\n"
+                "multiline_files = /var/log/app.log\n"
+            )
+        with patch.dict(os.environ, {'AI_API_KEY': 'key', 'SMTP_PASSWORD': 'pass'}):
+            config = load_configuration(config_file)
+
+        work_dir = os.path.join(self.test_dir, 'work')
+        isolated = ReplayHarness([], config, work_dir=work_dir).config
+        paths = {key: value for key, value in isolated.items()
+                 if key.endswith(('_file', '_db', '_dir')) and key != 'config_path' and value}
+        self.assertIn('similarity_state_file', paths)
+        self.assertIn('microbatch_state_file', paths)
+        for key, path in paths.items():
+            self.assertTrue(os.path.abspath(path).startswith(os.path.abspath(work_dir) + os.sep), key)
+
+
+class TestWatchdog(unittest.TestCase):
+    """Tests pour le suivi du retard de la boucle et les notifications systemd"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        import socket
+        self.test_dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.test_dir, 'notify.sock')
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.server.bind(self.socket_path)
+        self.server.settimeout(1)
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        self.server.close()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_ready_status_and_watchdog_notifications(self):
+        """Test notifications READY, STATUS et WATCHDOG sur le socket"""
+        from loop_watchdog import LoopWatchdog
+
+        watchdog = LoopWatchdog(10, 20, notify_socket=self.socket_path, watchdog_period=0)
+        watchdog.start()
+        self.assertIn("READY=1", self.server.recv(4096).decode())
+
+        watchdog.cycle_started(now=100.0)
+        watchdog.cycle_finished(10, now=102.0)
+        self.assertIn("STATUS=Cycle 1 : durée 2.0s", self.server.recv(4096).decode())
+
+        self.assertTrue(watchdog.pet(now=105.0))
+        self.assertEqual(self.server.recv(4096), b"WATCHDOG=1")
+
+    def test_watchdog_suspended_when_loop_stalls(self):
+        """Test arrêt de l'entretien du watchdog quand la boucle est bloquée"""
+        from loop_watchdog import LoopWatchdog
+
+        watchdog = LoopWatchdog(10, 20, notify_socket=self.socket_path, watchdog_period=0)
+        watchdog.cycle_started(now=100.0)
+        watchdog.cycle_finished(10, now=101.0)
+
+        # Cycle suivant démarré avec 5s de retard puis bloqué
+        watchdog.cycle_started(now=116.0)
+        self.assertEqual(watchdog.last_lag, 5.0)
+        self.assertTrue(watchdog.pet(now=130.0))
+        self.assertFalse(watchdog.pet(now=140.0))
+        self.assertEqual(watchdog.stalls, 1)
+
+        # La boucle repart : l'entretien reprend
+        watchdog.cycle_finished(10, now=141.0)
+        self.assertTrue(watchdog.pet(now=142.0))
+
+
+class TestAccessLogStats(unittest.TestCase):
+    """Tests pour l'analyse en colonnes des logs d'accès web"""
+
+    @staticmethod
+    def _line(ip, path, status, second=0):
+        return (f'{ip} - - [10/Oct/2026:13:55:{second:02d} +0000] "GET {path} HTTP/1.1" {status} 512 '
+                f'"-" "Mozilla/5.0"\n')
+
+    def test_columns_and_aggregates(self):
+        """Test colonnes, statuts, top IP et IP qui balaie des chemins inexistants"""
+        from access_log_stats import AccessLogColumns, aggregate
+
+        lines = [self._line('198.51.100.1', '/index.html?page=2', 200) for _ in range(30)]
+        lines += [self._line('203.0.113.9', f'/wp-admin/{n}.php', 404) for n in range(12)]
+        lines.append("ligne non reconnue\n")
+
+        columns = AccessLogColumns.parse(lines)
+        self.assertEqual((columns.parsed, columns.unparsed), (42, 1))
+
+        stats = aggregate(columns)
+        self.assertEqual(stats['status'], {200: 30, 404: 12})
+        self.assertEqual(stats['top_ips'][0], ('198.51.100.1', 30))
+        self.assertEqual(stats['top_paths'][0], ('/index.html', 30))
+        self.assertEqual(stats['scanners'], [('203.0.113.9', 12)])
+        self.assertEqual(stats['error_ratios'][0][:2], ('203.0.113.9', 1.0))
+
+    def test_vectorized_aggregates_match_counter_fallback(self):
+        """Test agrégats numpy identiques à ceux calculés sans numpy"""
+        import access_log_stats
+        from access_log_stats import AccessLogColumns, aggregate
+
+        if access_log_stats.np is None:
+            self.skipTest("numpy non installé")
+        lines = [self._line(f'198.51.100.{n % 7}', f'/page/{n % 13}', (200, 301, 404, 500)[n % 4], n % 60)
+                 for n in range(400)]
+        lines += [self._line('203.0.113.9', f'/wp-admin/{n}.php', 404, 59) for n in range(200)]
+        columns, empty = AccessLogColumns.parse(lines), AccessLogColumns.parse([])
+
+        vectorized, vectorized_empty = aggregate(columns), aggregate(empty)
+        with patch.object(access_log_stats, 'np', None):
+            self.assertEqual(aggregate(columns), vectorized)
+            self.assertEqual(aggregate(empty), vectorized_empty)
+        self.assertEqual(vectorized['scanners'][0], ('203.0.113.9', 200))
+
+    def test_summarizer_replaces_access_batches_only(self):
+        """Test résumé des lots d'accès, lignes brutes conservées pour les autres"""
+        from access_log_stats import AccessLogSummarizer
+
+        summarizer = AccessLogSummarizer(max_outliers=3, min_lines=10)
+        lines = [self._line('198.51.100.1', '/', 200) for _ in range(100)]
+        lines += [self._line('203.0.113.9', f'/.env{n}', 404) for n in range(20)]
+
+        summary = summarizer.summarize('/var/log/apache2/access.log', lines)
+        self.assertLess(len(summary), 20)
+        self.assertIn('203.0.113.9', ''.join(summary))
+        self.assertEqual(sum('"GET /.env' in line for line in summary), 3)
+
+        syslog = ["Jan 01 10:00:00 host sshd[1]: Accepted password\n"] * 20
+        self.assertIs(summarizer.summarize('/var/log/auth.log', syslog), syslog)
+
+
+class TestAIDispatcher(unittest.TestCase):
+    """Tests pour la file d'appels IA à priorités"""
+
+    def test_parse_priorities(self):
+        """Test lecture des priorités par motif, y compris les flux syslog"""
+        from ai_dispatcher import parse_priorities, AIDispatcher
+
+        priorities = parse_priorities("/var/log/auth.log:10:3, syslog://*:5, /var/log/apache2/*:1")
+        self.assertEqual(priorities['/var/log/auth.log'], (10, 3.0))
+        self.assertEqual(priorities['syslog://*'], (5, 1.0))
+
+        dispatcher = AIDispatcher(priorities=priorities)
+        self.assertEqual(dispatcher.priority_of('syslog://web01'), (5, 1.0))
+        self.assertEqual(dispatcher.priority_of('/var/log/apache2/access.log'), (1, 1.0))
+        self.assertEqual(dispatcher.priority_of('/var/log/other.log'), (0, 1.0))
+        with self.assertRaises(ValueError):
+            parse_priorities("/var/log/auth.log")
+
+    def test_high_priority_served_first_under_contention(self):
+        """Test passage prioritaire des logs de sécurité quand l'appel en cours bloque la file"""
+        import threading
+        from ai_dispatcher import AIDispatcher
+
+        dispatcher = AIDispatcher(max_concurrent=1, priorities={'/var/log/auth.log': (10, 1.0)})
+        order = []
+        running = dispatcher.acquire('/var/log/apache2/access.log', 100)
+
+        def call(source):
+            dispatcher.call(source, 100, lambda: (order.append(source), 100))
+
+        threads = [threading.Thread(target=call, args=(source,))
+                   for source in ('/var/log/apache2/access.log', '/var/log/syslog', '/var/log/auth.log')]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        dispatcher.release(running)
+        for thread in threads:
+            thread.join(timeout=5)
+
+        self.assertEqual(order[0], '/var/log/auth.log')
+        self.assertEqual(len(order), 3)
+
+    def test_retry_after_429(self):
+        """Test respect du délai Retry-After puis nouvelle tentative"""
+        from ai_dispatcher import AIDispatcher, retry_after_seconds
+
+        class RateLimited(Exception):
+            status_code = 429
+            headers = {'Retry-After': '0.2'}
+
+        self.assertEqual(retry_after_seconds(RateLimited()), 0.2)
+        self.assertIsNone(retry_after_seconds(ValueError()))
+
+        attempts = []
+
+        def flaky():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise RateLimited()
+            return "ok", 10
+
+        dispatcher = AIDispatcher(max_retries=2)
+        self.assertEqual(dispatcher.call('/var/log/auth.log', 10, flaky), "ok")
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.2)
+        self.assertEqual(dispatcher.stats['/var/log/auth.log']['rate_limited'], 1)
+
+    def test_requests_per_minute_limit(self):
+        """Test limitation du nombre de requêtes par minute"""
+        from ai_dispatcher import TokenBucket
+
+        bucket = TokenBucket(60)
+        now = bucket.updated
+        for _ in range(60):
+            self.assertEqual(bucket.wait_time(1, now), 0.0)
+            bucket.consume(1, now)
+        self.assertAlmostEqual(bucket.wait_time(1, now), 1.0)
+
+
+class TestPollScheduler(unittest.TestCase):
+    """Tests pour les vérifications adaptatives par fichier"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.hot = os.path.join(self.test_dir, 'auth.log')
+        self.idle = os.path.join(self.test_dir, 'idle.log')
+        for path in (self.hot, self.idle):
+            with open(path, 'w') as f:
+                f.write("ligne\n")
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_idle_files_back_off_and_active_files_speed_up(self):
+        """Test recul exponentiel au repos et accélération sur activité"""
+        from poll_scheduler import PollScheduler
+
+        scheduler = PollScheduler(60, 10, 240)
+        self.assertEqual(sorted(scheduler.due([self.hot, self.idle], now=0)), sorted([self.hot, self.idle]))
+        scheduler.record(self.hot, active=True, now=0)
+        scheduler.record(self.idle, active=False, now=0)
+        self.assertEqual(scheduler.next_delay(now=0), 30)
+
+        # Fichier inchangé : aucune lecture, seulement os.stat, puis recul
+        with open(self.hot, 'a') as f:
+            f.write("nouvelle ligne\n")
+        self.assertEqual(scheduler.due([self.hot, self.idle], now=30), [self.hot])
+        self.assertEqual(scheduler.due([self.hot, self.idle], now=1000), [])
+        self.assertEqual(scheduler.stats[self.idle]['stats_only'], 1)
+        self.assertEqual(scheduler._state[self.idle]['interval'], 240)
+
+    def test_severity_and_per_file_bounds(self):
+        """Test bornes par motif et revérification rapide après une analyse grave"""
+        from poll_scheduler import PollScheduler, parse_poll_bounds
+
+        bounds = parse_poll_bounds(f"{self.test_dir}/auth*:5:20")
+        scheduler = PollScheduler(60, 10, 240, bounds=bounds)
+        self.assertEqual(scheduler.bounds_of(self.hot), (5.0, 20.0))
+        self.assertEqual(scheduler.bounds_of(self.idle), (10, 240))
+
+        scheduler.due([self.hot], now=0)
+        scheduler.record(self.hot, active=False, now=0)
+        self.assertEqual(scheduler.next_delay(now=0), 20)
+        scheduler.note_severity(self.hot, 8, now=0)
+        self.assertEqual(scheduler.next_delay(now=0), 5)
+        with self.assertRaises(ValueError):
+            parse_poll_bounds("/var/log/auth.log:60:5")
+
+
+class TestReportWriter(unittest.TestCase):
+    """Tests pour l'écrivain unique du rapport quotidien"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.report_file = os.path.join(self.test_dir, 'daily_report.txt')
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_failed_write_is_retried(self):
+        """Test entrées conservées et descripteur fermé après un échec d'écriture"""
+        from report_writer import ReportWriter
+
+        blocked = os.path.join(self.test_dir, 'reports')
+        with open(blocked, 'w') as f:
+            f.write("fichier à la place du répertoire")
+        writer = ReportWriter(os.path.join(blocked, 'daily_report.txt'))
+        writer.write('/var/log/auth.log', "SEVERITY_SCORE: 8\nPremière")
+        writer.flush()
+        self.assertEqual(writer.stats['write_errors'], 1)
+
+        # Descripteur en erreur : fermé puis rouvert au prochain essai
+        failing = Mock()
+        failing.write.side_effect = OSError("No space left on device")
+        writer._handle = failing
+        writer.write('/var/log/auth.log', "SEVERITY_SCORE: 3\nDeuxième")
+        writer.flush()
+        failing.close.assert_called_once()
+        self.assertIsNone(writer._handle)
+
+        os.remove(blocked)
+        writer.write('/var/log/auth.log', "SEVERITY_SCORE: 1\nTroisième")
+        writer.close()
+        with open(writer.report_file, encoding='utf-8') as f:
+            content = f.read()
+        self.assertEqual([content.index(word) < content.index("Troisième") for word in ("Première", "Deuxième")],
+                         [True, True])
+        self.assertEqual(writer.stats['entries'], 3)
+
+    def test_concurrent_writes_survive_rotation(self):
+        """Test écritures concurrentes sans perte ni entrelacement pendant une rotation"""
+        import threading
+        from report_writer import ReportWriter
+        from report_summarizer import parse_report_entries
+
+        writer = ReportWriter(self.report_file, fsync_interval=0.05)
+        writer.start()
+
+        def produce(worker):
+            for n in range(200):
+                writer.write(f"/var/log/w{worker}.log", f"SEVERITY_SCORE: 1\nentrée {worker}-{n}")
+
+        threads = [threading.Thread(target=produce, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        rotated = writer.rotate()
+        for thread in threads:
+            thread.join()
+        writer.close()
+
+        contents = ""
+        for path in filter(None, (rotated, self.report_file)):
+            with open(path, encoding='utf-8') as f:
+                contents += f.read()
+        entries = parse_report_entries(contents)
+        self.assertEqual(len(entries), 800)
+        seen = set()
+        for entry in entries:
+            worker, n = entry['analysis'].split('entrée ')[1].split('-')
+            self.assertEqual(entry['source'], f"/var/log/w{worker}.log")
+            seen.add((worker, n))
+        self.assertEqual(len(seen), 800)
+
+    def test_daily_report_rotation_and_failed_send(self):
+        """Test envoi depuis le rapport mis de côté, repris après un échec"""
+        from report_writer import ReportWriter, pending_reports
+        from email_sender import send_daily_report
+
+        config = {'daily_report_file': self.report_file}
+        writer = ReportWriter(self.report_file)
+        writer.write('/var/log/auth.log', 'SEVERITY_SCORE: 8\nBrute force')
+        writer.flush()
+
+        with patch('email_sender.send_email', return_value=False):
+            self.assertFalse(send_daily_report(config, writer=writer))
+        self.assertEqual(len(pending_reports(self.report_file)), 1)
+
+        writer.write('/var/log/syslog', 'SEVERITY_SCORE: 2\nDisque')
+        with patch('email_sender.send_email', return_value=True) as mock_send, \
+                patch('email_sender._archive_report') as mock_archive:
+            self.assertTrue(send_daily_report(config, writer=writer))
+        body = mock_send.call_args[0][1]
+        self.assertIn('Brute force', body)
+        self.assertIn('Disque', body)
+        self.assertEqual(body.count('Rapport quotidien des logs'), 1)
+        mock_archive.assert_called_once()
+        self.assertEqual(pending_reports(self.report_file), [])
+        writer.close()
+
+
+class TestSimilarityIndex(unittest.TestCase):
+    """Tests pour la réutilisation des analyses de lots quasi identiques"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.scan = [
+            f'203.0.113.7 - - [10/Oct/2026:13:55:{n % 60:02d} +0000] "GET /{path} HTTP/1.1" 404 209 "-" "Nikto"\n'
+            for n, path in enumerate(f"admin/{name}.php" for name in (
+                "config", "setup", "install", "phpinfo", "login", "backup", "db", "shell",
+                "upload", "test", "debug", "console", "panel", "user", "wp-login", "xmlrpc",
+                "adminer", "sql", "dump", "old",
+            ))
+        ]
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_near_duplicate_reused_and_distinct_batch_missed(self):
+        """Test réutilisation d'un lot presque identique, pas d'un lot différent"""
+        from similarity_index import SimilarityIndex
+
+        state_file = os.path.join(self.test_dir, 'similarity.json')
+        index = SimilarityIndex(state_file, threshold=0.8)
+        index.add('/var/log/apache2/access.log', self.scan, "SEVERITY_SCORE: 6\nScan Nikto", 6, now=1000)
+
+        variant = [line.replace('203.0.113.7', '198.51.100.4') for line in self.scan[1:]]
+        match = index.lookup('/var/log/apache2/access.log', variant, now=2000)
+        self.assertIsNotNone(match)
+        self.assertEqual(match['severity'], 6)
+        self.assertGreaterEqual(match['similarity'], 0.8)
+
+        # Autre fichier, lot différent ou analyse trop ancienne : pas de réutilisation
+        self.assertIsNone(index.lookup('/var/log/nginx/access.log', variant, now=2000))
+        self.assertIsNone(index.lookup('/var/log/apache2/access.log',
+                                       ["sshd[1]: Failed password for root\n"], now=2000))
+        self.assertIsNone(index.lookup('/var/log/apache2/access.log', variant, now=1000 + 25 * 3600))
+        self.assertEqual(index.stats['saved_calls'], 1)
+
+        index.save()
+        reloaded = SimilarityIndex(state_file, threshold=0.8)
+        self.assertIsNotNone(reloaded.lookup('/var/log/apache2/access.log', variant, now=2000))
+
+    def test_scanner_probing_other_paths_reused(self):
+        """Test même scanner sur quelques chemins différents : analyse réutilisée"""
+        from similarity_index import SimilarityIndex, template
+
+        self.assertEqual(template('1.2.3.4 "GET /admin/setup.php HTTP/1.1" 404'),
+                         template('5.6.7.8 "GET /wp/xmlrpc.php HTTP/1.1" 404'))
+        self.assertNotEqual(template('"GET /admin/setup.php HTTP/1.1"'), template('"GET /../../etc/passwd HTTP/1.1"'))
+
+        index = SimilarityIndex(threshold=0.8)
+        index.add('/var/log/apache2/access.log', self.scan, "SEVERITY_SCORE: 6\nScan Nikto", 6, now=1000)
+
+        probe = self.scan[0].replace('admin/config.php', '{}')
+        other_paths = [probe.replace('{}', path) for path in ("cms/readme.php", "admin/cgi.php", "old/index.php")]
+        match = index.lookup('/var/log/apache2/access.log', self.scan[3:] + other_paths, now=2000)
+        self.assertIsNotNone(match)
+        self.assertEqual(match['severity'], 6)
+
+        # Traversée de répertoires : gabarit inédit, nouvelle analyse
+        traversal = self.scan[3:] + [probe.replace('{}', '../../etc/passwd')]
+        self.assertIsNone(index.lookup('/var/log/apache2/access.log', traversal, now=2000))
+
+    def test_batch_with_novel_line_not_reused(self):
+        """Test lot routinier plus une ligne inédite : nouvelle analyse"""
+        from similarity_index import SimilarityIndex
+
+        sections = ("news", "shop", "blog", "docs", "help", "about", "team", "jobs", "press", "legal")
+        agents = [f"{prefix}{suffix}" for prefix in ("Fire", "Chrome", "Safa", "Ope", "Bra")
+                  for suffix in ("fox", "ium", "ri", "ra", "ve", "x", "tel", "mo", "ka", "zu")]
+        routine = [
+            f'10.0.{n // 250}.{n % 250} - - [10/Oct/2026:13:55:{n % 60:02d} +0000] '
+            f'"GET /{sections[n % 10]}/index HTTP/1.1" 200 {5000 + n} "-" '
+            f'"{agents[n // 10 % 50]} Engine {agents[n // 10 % 50]}Kit"\n'
+            for n in range(2000)
+        ]
+        index = SimilarityIndex(threshold=0.9, forward_patterns="Accepted password for root")
+        index.add('/var/log/nginx/access.log', routine, "SEVERITY_SCORE: 1\nTrafic normal", 1, now=0)
+
+        other = [line.replace('10.0.', '10.1.') for line in routine[:1500]]
+        self.assertIsNotNone(index.lookup('/var/log/nginx/access.log', other, now=1))
+
+        # Ligne inédite absente du lot de référence
+        novel = other + ["sshd[812]: session opened for user deploy from 203.0.113.9 via backdoor\n"]
+        self.assertIsNone(index.lookup('/var/log/nginx/access.log', novel, now=1))
+        self.assertEqual(index.stats['novel'], 1)
+
+        # Ligne correspondant à forward_patterns, même déjà présente dans le lot de référence
+        attack = other + ["sshd: Accepted password for root from 203.0.113.9 after repeated failures\n"]
+        index.add('/var/log/nginx/access.log', attack, "SEVERITY_SCORE: 1", 1, now=1)
+        self.assertIsNone(index.lookup('/var/log/nginx/access.log', attack, now=2))
+
+    def test_bounded_table_evicts_oldest(self):
+        """Test éviction des lots les moins utilisés au-delà de la capacité"""
+        from similarity_index import SimilarityIndex
+
+        index = SimilarityIndex(max_entries=2)
+        batches = [[f"kernel: event{kind} device{kind} failure{kind} code{kind}\n"] for kind in "abc"]
+        for n, batch in enumerate(batches):
+            index.add('/var/log/syslog', batch, f"SEVERITY_SCORE: {n}", n, now=0)
+        self.assertEqual(index.stats['evictions'], 1)
+        self.assertIsNone(index.lookup('/var/log/syslog', batches[0], now=1))
+        self.assertIsNotNone(index.lookup('/var/log/syslog', batches[2], now=1))
+        self.assertTrue(all(len(bucket) <= 2 for bucket in index._buckets.values()))
+
+    @patch('log_monitor.handle_analysis')
+    @patch('log_monitor.analyze_logs_with_ai', return_value="SEVERITY_SCORE: 5\nScan")
+    def test_analyze_batch_skips_ai_call(self, mock_ai, mock_handle):
+        """Test un seul appel IA pour deux lots quasi identiques"""
+        from log_monitor import analyze_batch
+        from similarity_index import SimilarityIndex
+
+        runtime = {'similarity': SimilarityIndex(threshold=0.8)}
+        config = {'ai_max_tokens': 1000}
+        analyze_batch('/var/log/apache2/access.log', self.scan, config, runtime)
+        analyze_batch('/var/log/apache2/access.log', self.scan[1:], config, runtime)
+
+        self.assertEqual(mock_ai.call_count, 1)
+        reused = mock_handle.call_args_list[1]
+        self.assertEqual(reused.kwargs['severity_score'], 5)
+        self.assertIn("Analyse reprise", reused.args[1])
+
+
+class TestMicroBatcher(unittest.TestCase):
+    """Tests pour l'accumulation des lignes en micro-lots"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.test_dir, 'microbatches.json')
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_flush_triggers(self):
+        """Test vidage par taille, par motif et par âge"""
+        from micro_batcher import MicroBatcher
+
+        batcher = MicroBatcher(max_lines=5, max_bytes=0, max_age=60, forward_patterns="Failed password")
+        self.assertEqual(batcher.add('/var/log/syslog', ["cron: a\n", "cron: b\n"], now=0), [])
+        self.assertEqual(batcher.add('/var/log/syslog', ["cron: c\n"] * 2, now=10), [])
+        self.assertEqual(len(batcher.add('/var/log/syslog', ["cron: d\n"], now=20)), 5)
+
+        # Motif critique : vidage immédiat avec les lignes déjà en attente
+        batcher.add('/var/log/auth.log', ["sshd: session opened\n"], now=30)
+        flushed = batcher.add('/var/log/auth.log', ["sshd: Failed password for root\n"], now=31)
+        self.assertEqual(len(flushed), 2)
+
+        # Âge : tampon vidé même sans nouvelle ligne
+        batcher.add('/var/log/kern.log', ["kernel: usb\n"], now=40)
+        self.assertEqual(batcher.next_delay(now=50), 50)
+        self.assertEqual(batcher.flush_expired(now=99), {})
+        self.assertEqual(batcher.flush_expired(now=100), {'/var/log/kern.log': ["kernel: usb\n"]})
+        self.assertIsNone(batcher.next_delay(now=100))
+        self.assertEqual((batcher.stats['size'], batcher.stats['pattern'], batcher.stats['age']), (1, 1, 1))
+        self.assertEqual(batcher.avoided_calls(), 3)
+
+    def test_buffers_survive_restart(self):
+        """Test persistance des tampons entre deux démarrages"""
+        from micro_batcher import MicroBatcher
+
+        batcher = MicroBatcher(self.state_file, max_lines=10, max_age=60)
+        batcher.add('/var/log/syslog', ["ligne 1\n", "ligne 2\n"], now=0)
+        batcher.save()
+
+        restarted = MicroBatcher(self.state_file, max_lines=10, max_age=60)
+        self.assertEqual(restarted.flush_expired(now=60), {'/var/log/syslog': ["ligne 1\n", "ligne 2\n"]})
+
+    @patch('log_monitor.analyze_logs_with_ai', return_value="SEVERITY_SCORE: 0\nRien")
+    def test_trickle_costs_one_call(self, mock_ai):
+        """Test quelques lignes par cycle : un seul appel IA au seuil de taille"""
+        from log_monitor import process_log_lines
+        from micro_batcher import MicroBatcher
+
+        runtime = {'batcher': MicroBatcher(max_lines=6, max_age=3600)}
+        config = {'daily_report_file': os.path.join(self.test_dir, 'report.txt'), 'ai_max_tokens': 100}
+        for cycle in range(3):
+            process_log_lines('syslog://web01', [f"cron[{cycle}]: run\n", "cron: done\n"], config, runtime)
+        self.assertEqual(mock_ai.call_count, 1)
+        self.assertEqual(len(mock_ai.call_args[0][0]), 6)
+
+
+class TestAnalyzerBackends(unittest.TestCase):
+    """Tests pour les moteurs d'analyse et la bascule heuristique"""
+
+    def test_heuristic_backend_scores_signatures(self):
+        """Test score heuristique : aggravation avec le nombre d'occurrences"""
+        from analyzer_backends import HeuristicBackend
+        from log_monitor import extract_severity_score
+
+        backend = HeuristicBackend()
+        logs = [f"sshd[1]: Failed password for root from 203.0.113.{n % 3} port 22\n" for n in range(12)]
+        analysis = backend.analyze(logs, {})
+        self.assertEqual(extract_severity_score(analysis), 7)
+        self.assertIn("203.0.113.0", analysis)
+        self.assertEqual(extract_severity_score(backend.analyze(logs[:2], {})), 4)
+        self.assertEqual(extract_severity_score(backend.analyze(["CRON[2]: session opened\n"], {})), 0)
+
+    def test_router_per_file_selection(self):
+        """Test choix du moteur par motif de fichier"""
+        from analyzer_backends import AnalyzerRouter, parse_backend_map
+
+        mapping = parse_backend_map("/var/log/apache2/*:heuristic, syslog://*:openai")
+        self.assertEqual(mapping, {'/var/log/apache2/*': 'heuristic', 'syslog://*': 'openai'})
+        with self.assertRaises(ValueError):
+            parse_backend_map("/var/log/auth.log:gpt")
+
+        router = AnalyzerRouter.from_config({'analyzer_backends': mapping})
+        self.assertEqual(router.backend_for('/var/log/apache2/error.log'), 'heuristic')
+        self.assertEqual(router.backend_for('syslog://web01'), 'openai')
+        self.assertEqual(router.backend_for('/var/log/auth.log'), 'mistral')
+
+    def test_deadline_failover_and_late_analysis(self):
+        """Test bascule heuristique au-delà du délai, analyse tardive livrée ensuite"""
+        import threading
+        from analyzer_backends import AnalyzerRouter, HeuristicBackend
+
+        release = threading.Event()
+
+        class SlowBackend:
+            name = 'mistral'
+
+            def analyze(self, logs, config, log_file=None, budget=None, dispatcher=None):
+                release.wait(5)
+                return "SEVERITY_SCORE: 9\nAnalyse détaillée"
+
+        late = []
+        delivered = threading.Event()
+        router = AnalyzerRouter({'mistral': SlowBackend(), 'heuristic': HeuristicBackend()}, deadline=0.05)
+        logs = ["kernel: Out of memory: Killed process 4242 (java)\n"]
+
+        start = time.monotonic()
+        analysis = router.analyze('/var/log/kern.log', logs, {},
+                                  on_late=lambda result, fallback: (late.append((result, fallback)), delivered.set()))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(analysis.startswith("SEVERITY_SCORE: 7"))
+        self.assertIn("délai", analysis)
+
+        release.set()
+        self.assertTrue(delivered.wait(5))
+        self.assertEqual(late, [("SEVERITY_SCORE: 9\nAnalyse détaillée", analysis)])
+        self.assertEqual(router.stats['mistral']['timeouts'], 1)
+
+    @patch('log_monitor.save_analysis_to_report')
+    @patch('log_monitor.send_alert_email')
+    def test_late_analysis_does_not_alert_twice(self, mock_alert, mock_report):
+        """Test analyse tardive : une seule alerte par lot, analyse toujours enregistrée"""
+        from log_monitor import handle_late_analysis
+
+        late = "SEVERITY_SCORE: 9\nAnalyse détaillée"
+        handle_late_analysis('/var/log/kern.log', late, "SEVERITY_SCORE: 7\nHeuristique", {})
+        mock_alert.assert_not_called()
+        mock_report.assert_called_once_with('/var/log/kern.log', late, {}, None)
+
+        # L'heuristique n'avait pas alerté : l'analyse tardive alerte
+        handle_late_analysis('/var/log/kern.log', late, "SEVERITY_SCORE: 2\nHeuristique", {})
+        mock_alert.assert_called_once_with('/var/log/kern.log', late, 9, {})
+        self.assertEqual(mock_report.call_count, 2)
+
+    def test_openai_compatible_backend(self):
+        """Test moteur HTTP compatible OpenAI contre un serveur local"""
+        import json
+        import threading
+        from http.server import BaseHTTPRequestHandler, HTTPServer
+        from analyzer_backends import OpenAICompatibleBackend
+
+        requests = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                requests.append((self.path, self.headers.get('Authorization'),
+                                 json.loads(self.rfile.read(int(self.headers['Content-Length'])))))
+                body = json.dumps({
+                    'choices': [{'message': {'content': " SEVERITY_SCORE: 3\nRien de grave "}}],
+                    'usage': {'prompt_tokens': 40, 'completion_tokens': 10, 'total_tokens': 50},
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            backend = OpenAICompatibleBackend(f"http://127.0.0.1:{server.server_port}/v1", 'local-model',
+                                              api_key='secret')
+            budget = Mock()
+            analysis = backend.analyze(["sshd: ok\n"], {'ai_max_tokens': 128}, log_file='/var/log/auth.log',
+                                       budget=budget)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(analysis, "SEVERITY_SCORE: 3\nRien de grave")
+        path, authorization, payload = requests[0]
+        self.assertEqual((path, authorization), ('/v1/chat/completions', 'Bearer secret'))
+        self.assertEqual((payload['model'], payload['max_tokens']), ('local-model', 128))
+        budget.record.assert_called_once_with('/var/log/auth.log', 'local-model', 40, 10)
+
+
+class TestModelBenchmark(unittest.TestCase):
+    """Tests pour le banc de comparaison des modèles"""
+
+    def setUp(self):
+        """Préparation avant chaque test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.corpus_dir = os.path.join(os.path.dirname(__file__), '../benchmarks/corpus')
+
+    def tearDown(self):
+        """Nettoyage après chaque test"""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def _fake_chat_complete(self, messages, config, log_file=None, budget=None, **options):
+        """Modèle simulé : 'good' retrouve les étiquettes, 'bad' répond toujours 1"""
+        time.sleep(0.01)
+        budget.record(log_file, config['ai_model'], 1000, 100)
+        if config['ai_model'] == 'bad':
+            return "SEVERITY_SCORE: 1\nRien"
+        return f"SEVERITY_SCORE: {self.labels[log_file]}\nAnalyse"
+
+    def test_models_compared_on_labelled_corpus(self):
+        """Test comparaison concurrente : latences, tokens, coût et justesse"""
+        import csv
+        import json
+        from model_benchmark import ModelBenchmark, load_corpus, load_replay, write_csv
+
+        corpus = load_corpus(self.corpus_dir)
+        self.assertGreaterEqual(len(corpus), 6)
+        self.labels = {case['name']: case['severity'] for case in corpus}
+
+        config = {'ai_max_tokens': 256, 'ai_token_prices': {'good': (2.0, 6.0)}}
+        with patch('analyzer_backends.chat_complete', side_effect=self._fake_chat_complete) as mock_chat:
+            benchmark = ModelBenchmark(corpus, ['good', 'bad', 'heuristic'], config, repeat=2, concurrency=8)
+            rows = {row['model']: row for row in benchmark.run()}
+        self.assertEqual(mock_chat.call_count, 4 * len(corpus))
+
+        good, bad = rows['good'], rows['bad']
+        self.assertEqual(good['calls'], 2 * len(corpus))
+        self.assertEqual((good['band_accuracy'], good['alert_accuracy'], good['severity_mae']), (1.0, 1.0, 0.0))
+        self.assertLess(bad['alert_accuracy'], 1.0)
+        self.assertEqual(good['prompt_tokens'], 1000 * 2 * len(corpus))
+        self.assertAlmostEqual(good['cost_usd'], 2 * len(corpus) * (1000 * 2.0 + 100 * 6.0) / 1e6)
+        self.assertGreaterEqual(good['latency_p90'], good['latency_p50'])
+        self.assertEqual(rows['heuristic']['prompt_tokens'], 0)
+
+        csv_file = os.path.join(self.test_dir, 'models.csv')
+        write_csv(list(rows.values()), csv_file)
+        with open(csv_file, newline='') as f:
+            self.assertEqual([row['model'] for row in csv.DictReader(f)], ['good', 'bad', 'heuristic'])
+
+        # Rejeu : les réponses enregistrées sont réévaluées sans appel API
+        replay_file = os.path.join(self.test_dir, 'models.json')
+        with open(replay_file, 'w') as f:
+            json.dump({'calls': benchmark.calls}, f)
+        with patch('analyzer_backends.chat_complete') as mock_chat:
+            replayed = ModelBenchmark(corpus, ['good'], config, repeat=2, replay=load_replay(replay_file))
+            self.assertEqual(replayed.run()[0]['band_accuracy'], 1.0)
+        mock_chat.assert_not_called()
+
+    def test_replay_skips_missing_recordings(self):
+        """Test rejeu : un appel non enregistré est ignoré, jamais exécuté en réel"""
+        from model_benchmark import ModelBenchmark, load_corpus
+
+        corpus = load_corpus(self.corpus_dir)
+        recorded = {
+            'model': 'good', 'fixture': corpus[0]['name'], 'attempt': 0, 'latency': 0.5,
+            'prompt_tokens': 10, 'completion_tokens': 5, 'error': False,
+            'analysis': f"SEVERITY_SCORE: {corpus[0]['severity']}\nAnalyse",
+        }
+        replay = {f"good|{corpus[0]['name']}|0": recorded}
+
+        with patch('analyzer_backends.chat_complete') as mock_chat:
+            benchmark = ModelBenchmark(corpus, ['good', 'heuristic'], {}, replay=replay)
+            rows = {row['model']: row for row in benchmark.run()}
+        mock_chat.assert_not_called()
+
+        self.assertEqual(rows['good']['calls'], 1)
+        self.assertEqual(rows['good']['band_accuracy'], 1.0)
+        self.assertEqual(rows['heuristic']['calls'], len(corpus))
+        self.assertEqual(len(benchmark.skipped), len(corpus) - 1)
+
+    def test_errors_reported_apart_from_accuracy(self):
+        """Test appels en échec : taux d'échec séparé, justesse calculée sur les réussites"""
+        import subprocess
+        from model_benchmark import ModelBenchmark, format_summary, load_corpus
+
+        corpus = load_corpus(self.corpus_dir)
+        self.labels = {case['name']: case['severity'] for case in corpus}
+        failing = {corpus[0]['name'], corpus[1]['name']}
+
+        def flaky(messages, config, log_file=None, budget=None, **options):
+            if log_file in failing:
+                raise ConnectionError("délai réseau dépassé")
+            return self._fake_chat_complete(messages, config, log_file=log_file, budget=budget)
+
+        with patch('analyzer_backends.chat_complete', side_effect=flaky):
+            row = ModelBenchmark(corpus, ['good'], {'ai_max_tokens': 256}).run()[0]
+        self.assertEqual((row['calls'], row['errors']), (len(corpus), 2))
+        self.assertAlmostEqual(row['error_rate'], round(2 / len(corpus), 4))
+        self.assertEqual((row['band_accuracy'], row['alert_accuracy'], row['severity_mae']), (1.0, 1.0, 0.0))
+        self.assertIn("appels réussis", format_summary([row]))
+
+        # Le banc n'importe pas log_monitor (gestionnaires de signaux)
+        src_dir = os.path.join(os.path.dirname(__file__), '../src')
+        imported = subprocess.run(
+            [sys.executable, '-c', "import sys, model_benchmark; print('log_monitor' in sys.modules)"],
+            cwd=src_dir, capture_output=True, text=True
+        )
+        self.assertEqual(imported.stdout.strip(), "False")
+
+
+class TestEventAssembler(unittest.TestCase):
+    """Tests pour l'assemblage des événements multi-lignes"""
+
+    TRACE = [
+        "2026-10-19 10:00:01 ERROR [http-nio-8080] Request failed\n",
+        "java.lang.NullPointerException: null\n",
+        "\tat com.example.Service.handle(Service.java:42)\n",
+        "\tat com.example.Controller.get(Controller.java:17)\n",
+        "Caused by: java.io.IOException: Broken pipe\n",
+        "\t... 12 more\n",
+    ]
+
+    def test_trace_split_across_cycles_is_one_event(self):
+        """Test trace de pile lue sur deux cycles : un seul événement"""
+        from event_assembler import EventAssembler
+
+        assembler = EventAssembler(['/var/log/app.log'], flush_timeout=5)
+        self.assertTrue(assembler.applies_to('/var/log/app.log'))
+        self.assertFalse(assembler.applies_to('/var/log/auth.log'))
+
+        self.assertEqual(assembler.feed('/var/log/app.log', self.TRACE[:3], now=0), [])
+        events = assembler.feed('/var/log/app.log', self.TRACE[3:] + ["2026-10-19 10:00:02 INFO ok\n"], now=1)
+        # Une ligne qui ne peut pas se poursuivre n'attend pas le cycle suivant
+        self.assertEqual(events, ["".join(self.TRACE), "2026-10-19 10:00:02 INFO ok\n"])
+
+        # Trace inachevée : jointe à la lecture suivante après le délai
+        error = "2026-10-19 10:00:03 ERROR Unhandled exception:\n"
+        self.assertEqual(assembler.feed('/var/log/app.log', [error], now=2), [])
+        self.assertEqual(assembler.feed('/var/log/app.log', [], now=6), [])
+        self.assertEqual(assembler.feed('/var/log/app.log', [], now=7), [error])
+
+        # Source non relue : transmise par flush_expired
+        assembler.feed('/var/log/app.log', [error], now=10)
+        self.assertEqual(assembler.flush_expired(now=14), {})
+        self.assertEqual(assembler.flush_expired(now=15), {'/var/log/app.log': [error]})
+
+        stats = assembler.stats['/var/log/app.log']
+        self.assertEqual((stats['events'], stats['multiline'], stats['max_lines'], stats['timeouts']), (4, 1, 6, 2))
+        self.assertEqual(assembler.histogram['6-20'], 1)
+
+    def test_pending_event_survives_restart(self):
+        """Test événement en attente conservé entre deux démarrages"""
+        from event_assembler import EventAssembler
+
+        test_dir = tempfile.mkdtemp()
+        try:
+            state_file = os.path.join(test_dir, 'multiline.json')
+            assembler = EventAssembler(['*'], flush_timeout=5, state_file=state_file)
+            self.assertEqual(assembler.feed('/var/log/app.log', self.TRACE[:3], now=0), [])
+            assembler.save()
+
+            restarted = EventAssembler(['*'], flush_timeout=5, state_file=state_file)
+            events = restarted.feed('/var/log/app.log', self.TRACE[3:] + ["2026-10-19 10:00:02 INFO ok\n"], now=1)
+            self.assertEqual(events[0], "".join(self.TRACE))
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+    def test_pending_event_wakes_loop_at_deadline(self):
+        """Test une trace en attente avance la vérification suivante à son échéance"""
+        from event_assembler import EventAssembler
+        from log_monitor import next_check_delay
+
+        runtime = {'assembler': EventAssembler(['*'], flush_timeout=5)}
+        self.assertEqual(next_check_delay({'log_check_interval': 60}, runtime), 60)
+        runtime['assembler'].feed('/var/log/app.log', self.TRACE[:3])
+        self.assertLessEqual(next_check_delay({'log_check_interval': 60}, runtime), 5)
+        self.assertEqual(runtime['assembler'].next_delay(now=time.time() + 10), 0.0)
+
+    def test_single_line_errors_not_held(self):
+        """Test lignes d'erreur isolées et motifs toujours transmis analysés sans attente"""
+        from event_assembler import EventAssembler
+        from anomaly_scorer import DEFAULT_FORWARD_PATTERNS
+
+        assembler = EventAssembler(['*'], flush_timeout=5, forward_patterns=DEFAULT_FORWARD_PATTERNS)
+        samples = [
+            "[Mon Oct 19 10:00:01 2026] [php:error] [pid 42] [client 10.0.0.1] PHP Warning:  Undefined index\n",
+            "[Mon Oct 19 10:00:02 2026] [core:error] [pid 43] AH00124: Request exceeded the limit\n",
+            "Oct 19 10:00:03 host sshd[44]: error: kex_exchange_identification: Connection closed\n",
+        ]
+        for sample in samples:
+            self.assertEqual(assembler.feed('/var/log/app.log', [sample], now=0), [sample])
+
+        fatal = "[Mon Oct 19 10:00:04 2026] [php:error] PHP Fatal error:  Uncaught Exception in /app/index.php:\n"
+        self.assertEqual(assembler.feed('/var/log/app.log', [fatal], now=0), [fatal])
+        self.assertIsNone(assembler.next_delay(now=0))
+
+    def test_expired_event_joins_micro_batch(self):
+        """Test événement expiré joint au micro-lot du fichier plutôt qu'analysé seul"""
+        from event_assembler import EventAssembler
+        from log_monitor import collect_expired_batches
+        from micro_batcher import MicroBatcher
+
+        runtime = {'assembler': EventAssembler(['*'], flush_timeout=0), 'batcher': MicroBatcher(max_age=300)}
+        runtime['assembler']._pending['/var/log/app.log'] = {'lines': self.TRACE[:3], 'bytes': 0, 'updated': 0}
+        self.assertEqual(collect_expired_batches(runtime), {})
+        self.assertEqual(runtime['batcher'].flush_expired(now=time.time() + 300),
+                         {'/var/log/app.log': ["".join(self.TRACE[:3])]})
+
+    def test_bounded_event_size(self):
+        """Test découpage d'un événement au-delà de la taille maximale"""
+        from event_assembler import EventAssembler
+
+        assembler = EventAssembler(['*'], max_lines=4, flush_timeout=0)
+        events = assembler.feed('/var/log/app.log', self.TRACE, now=0)
+        self.assertEqual([event.count("\n") for event in events], [4, 2])
+        self.assertEqual(assembler.stats['/var/log/app.log']['split'], 1)
+
+    @patch('log_monitor.analyze_logs_with_ai', return_value="SEVERITY_SCORE: 3\nTrace")
+    def test_pipeline_analyses_whole_events(self, mock_ai):
+        """Test lecture en deux cycles : l'IA reçoit la trace complète"""
+        from event_assembler import EventAssembler
+        from log_monitor import collect_expired_batches, process_log_file
+
+        test_dir = tempfile.mkdtemp()
+        try:
+            log_file = os.path.join(test_dir, 'app.log')
+            config = {'daily_report_file': os.path.join(test_dir, 'report.txt'), 'ai_max_tokens': 100}
+            runtime = {'assembler': EventAssembler([log_file], flush_timeout=0.2)}
+
+            with open(log_file, 'w') as f:
+                f.writelines(self.TRACE[:2])
+            position = process_log_file(log_file, 0, config, runtime)
+            with open(log_file, 'a') as f:
+                f.writelines(self.TRACE[2:])
+            process_log_file(log_file, position, config, runtime)
+            mock_ai.assert_not_called()
+
+            time.sleep(0.25)
+            batches = collect_expired_batches(runtime)
+            self.assertEqual(batches, {log_file: ["".join(self.TRACE)]})
+        finally:
+            shutil.rmtree(test_dir, ignore_errors=True)
+
+
+class TestStructuredAnalysis(unittest.TestCase):
+    """Tests pour la sortie JSON structurée des analyses"""
+
+    LOGS = [
+        "Oct 19 10:00:01 host sshd[1]: Accepted publickey for admin\n",
+        "Oct 19 10:00:02 host sshd[2]: Failed password for root from 203.0.113.9\n",
+    ]
+    RESPONSE = (
+        '{"severity": 6, "findings": [{"line": 2, "issue": "Échec de connexion root"}], '
+        '"recommendations": ["Bloquer 203.0.113.9"]}'
+    )
+
+    def test_parse_and_render_record(self):
+        """Test enregistrement typé et rendu citant la ligne référencée"""
+        from log_monitor import extract_severity_score
+        from structured_analysis import Finding, parse_record, render_record
+
+        record = parse_record(self.RESPONSE)
+        self.assertEqual(record.severity, 6)
+        self.assertEqual(record.findings, [Finding("Échec de connexion root", 2)])
+
+        analysis = render_record(record, self.LOGS)
+        self.assertTrue(analysis.startswith("SEVERITY_SCORE: 6\n"))
+        self.assertIn("- [L2] Échec de connexion root", analysis)
+        self.assertIn("> Oct 19 10:00:02 host sshd[2]: Failed password", analysis)
+        self.assertIn("- Bloquer 203.0.113.9", analysis)
+        self.assertEqual(extract_severity_score(analysis), 6)
+
+    def test_lenient_parsing_and_invalid_response(self):
+        """Test JSON entouré de texte, gravité bornée et réponse hors format"""
+        from structured_analysis import StructuredOutputError, parse_record
+
+        record = parse_record('```json\n{"severity": "42", "findings": ["sans ligne"]}\n```')
+        self.assertEqual((record.severity, record.findings[0].line), (10, None))
+        for response in ("Gravité élevée", '{"findings": []}', '[1, 2]',
+                         '{"severity": 5, "findings": "none"}',
+                         '{"severity": 5, "findings": {"line": 2, "issue": "x"}}',
+                         '{"severity": 5, "findings": [], "recommendations": "Bloquer"}'):
+            with self.assertRaises(StructuredOutputError):
+                parse_record(response)
+
+    @patch('log_monitor.chat_complete')
+    def test_structured_call_is_bounded(self, mock_chat):
+        """Test appel en format JSON avec complétion bornée"""
+        from log_monitor import analyze_logs_with_ai
+
+        mock_chat.return_value = self.RESPONSE
+        config = {'ai_structured_output': True, 'ai_structured_max_tokens': 256, 'ai_max_tokens': 4096}
+        analysis = analyze_logs_with_ai(self.LOGS, config, log_file='auth.log')
+
+        args, kwargs = mock_chat.call_args
+        self.assertEqual(kwargs['response_format'], {"type": "json_object"})
+        self.assertEqual(args[1]['ai_max_tokens'], 256)
+        self.assertIn("L2: Oct 19", args[0][1]['content'])
+        self.assertTrue(analysis.startswith("SEVERITY_SCORE: 6"))
+
+    @patch('log_monitor.chat_complete', return_value="La gravité est élevée.")
+    def test_invalid_response_falls_back_to_heuristic(self, mock_chat):
+        """Test réponse hors format : score heuristique plutôt qu'un 0 silencieux"""
+        from analyzer_backends import HEURISTIC_MARKER
+        from log_monitor import analyze_logs_with_ai, extract_severity_score
+
+        config = {'ai_structured_output': True, 'ai_max_tokens': 4096}
+        analysis = analyze_logs_with_ai(self.LOGS, config, log_file='auth.log')
+        self.assertIn(HEURISTIC_MARKER, analysis)
+        self.assertIn("Réponse structurée", analysis)
+        self.assertGreater(extract_severity_score(analysis), 0)
+
+        # Champ de mauvais type : même repli, jamais un 0 silencieux
+        mock_chat.return_value = '{"severity": 8, "findings": {"line": 2, "issue": "root"}}'
+        analysis = analyze_logs_with_ai(self.LOGS, config, log_file='auth.log')
+        self.assertIn(HEURISTIC_MARKER, analysis)
+        self.assertGreater(extract_severity_score(analysis), 0)
+
+
 class TestIntegration(unittest.TestCase):
     """Tests d'intégration"""
 
@@ -211,6 +1953,27 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestConfigLoader))
     suite.addTests(loader.loadTestsFromTestCase(TestEmailSender))
     suite.addTests(loader.loadTestsFromTestCase(TestLogMonitor))
+    suite.addTests(loader.loadTestsFromTestCase(TestTokenBudget))
+    suite.addTests(loader.loadTestsFromTestCase(TestAnomalyScorer))
+    suite.addTests(loader.loadTestsFromTestCase(TestCorrelation))
+    suite.addTests(loader.loadTestsFromTestCase(TestBackpressure))
+    suite.addTests(loader.loadTestsFromTestCase(TestProfiling))
+    suite.addTests(loader.loadTestsFromTestCase(TestSyslogReceiver))
+    suite.addTests(loader.loadTestsFromTestCase(TestCoordination))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportSummarizer))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestReplayHarness))
+    suite.addTests(loader.loadTestsFromTestCase(TestWatchdog))
+    suite.addTests(loader.loadTestsFromTestCase(TestAccessLogStats))
+    suite.addTests(loader.loadTestsFromTestCase(TestAIDispatcher))
+    suite.addTests(loader.loadTestsFromTestCase(TestPollScheduler))
+    suite.addTests(loader.loadTestsFromTestCase(TestReportWriter))
+    suite.addTests(loader.loadTestsFromTestCase(TestSimilarityIndex))
+    suite.addTests(loader.loadTestsFromTestCase(TestMicroBatcher))
+    suite.addTests(loader.loadTestsFromTestCase(TestAnalyzerBackends))
+    suite.addTests(loader.loadTestsFromTestCase(TestModelBenchmark))
+    suite.addTests(loader.loadTestsFromTestCase(TestEventAssembler))
+    suite.addTests(loader.loadTestsFromTestCase(TestStructuredAnalysis))
     suite.addTests(loader.loadTestsFromTestCase(TestIntegration))
 
     # Exécuter les tests